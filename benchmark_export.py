@@ -0,0 +1,207 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import tracemalloc
+
+from benchmark_pipeline import best_of, scale_members
+from export_members import (SQLITE_FILENAME, available_formats, export_tables, iter_source, pyarrow_parquet,
+                            table_filenames)
+from snapshot_diff import member_key
+
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+SCALES = (1, 10, 100)
+REPEAT = 3  # Best of REPEAT at 1x, fewer at larger scales (at least one run)
+QUERY_FACTION = 'PDIP'
+QUERY_ROLE = 'Commission V'
+QUERY_PLATFORM = 'instagram'
+
+
+# --- Export ---
+
+def json_reload(filename):
+    """What analysts do today: load the whole pretty-printed file."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def peak_mib(function):
+    """Peak Python heap allocated while function runs."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_export(json_filename, export_format, out_dir, repeat):
+    """Returns (seconds, bytes written, peak MiB) for one format, streaming from the JSON file."""
+    def run():
+        export_tables(iter_source(json_filename), [export_format], out_dir)
+
+    seconds = best_of(run, repeat)
+    size = sum(os.path.getsize(filename) for filename in table_filenames([export_format], out_dir))
+    return seconds, size, peak_mib(run)
+
+
+# --- Queries ---
+# Each answers the same three questions from cold (open/load included), as an analyst's script would:
+#   faction:   ids of the QUERY_FACTION members
+#   role_link: keys (profile URLs) of QUERY_ROLE members with a QUERY_PLATFORM link
+#   coverage:  {faction: members with a QUERY_PLATFORM link}
+
+def query_json(filename, query):
+    members = json_reload(filename)
+    if query == 'faction':
+        return sorted(member['id'] for member in members if member.get('faction') == QUERY_FACTION)
+    if query == 'role_link':
+        return sorted(member_key(member) for member in members if QUERY_ROLE in (member.get('roles') or [])
+                      and (member.get('socials') or {}).get(QUERY_PLATFORM))
+    coverage = {}
+    for member in members:
+        if (member.get('socials') or {}).get(QUERY_PLATFORM):
+            coverage[member.get('faction')] = coverage.get(member.get('faction'), 0) + 1
+    return coverage
+
+
+def _csv_rows(out_dir, table):
+    with open(os.path.join(out_dir, f"{table}.csv"), 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def query_csv(out_dir, query):
+    if query == 'faction':
+        return sorted(row['id'] for row in _csv_rows(out_dir, 'members') if row['faction'] == QUERY_FACTION)
+    linked = {row['member_key'] for row in _csv_rows(out_dir, 'socials')
+              if row['platform'] == QUERY_PLATFORM and row['url']}
+    if query == 'role_link':
+        return sorted({row['member_key'] for row in _csv_rows(out_dir, 'roles')
+                       if row['role'] == QUERY_ROLE and row['member_key'] in linked})
+    coverage = {}
+    for row in _csv_rows(out_dir, 'members'):
+        if row['member_key'] in linked:
+            faction = row['faction'] or None
+            coverage[faction] = coverage.get(faction, 0) + 1
+    return coverage
+
+
+SQL_QUERIES = {
+    'faction': ('SELECT id FROM members WHERE faction = ? ORDER BY id', (QUERY_FACTION,)),
+    'role_link': ('SELECT DISTINCT r.member_key FROM roles r JOIN socials s ON s.member_key = r.member_key '
+                  'AND s.platform = ? WHERE r.role = ? AND s.url IS NOT NULL ORDER BY r.member_key',
+                  (QUERY_PLATFORM, QUERY_ROLE)),
+    'coverage': ('SELECT m.faction, COUNT(*) FROM socials s JOIN members m ON m.member_key = s.member_key '
+                 'WHERE s.platform = ? AND s.url IS NOT NULL GROUP BY m.faction', (QUERY_PLATFORM,)),
+}
+
+
+def query_sqlite(out_dir, query):
+    db = sqlite3.connect(os.path.join(out_dir, SQLITE_FILENAME))
+    try:
+        sql, params = SQL_QUERIES[query]
+        rows = db.execute(sql, params).fetchall()
+    finally:
+        db.close()
+    return dict(rows) if query == 'coverage' else [row[0] for row in rows]
+
+
+def query_parquet(out_dir, query):
+    def read(table, columns, filters=None):
+        return pyarrow_parquet.read_table(os.path.join(out_dir, f"{table}.parquet"), columns=columns,
+                                          filters=filters).to_pydict()
+
+    if query == 'faction':
+        return sorted(read('members', ['id'], [('faction', '=', QUERY_FACTION)])['id'])
+    # NULL urls fail every comparison, so this keeps the stored links only
+    linked = set(read('socials', ['member_key'], [('platform', '=', QUERY_PLATFORM), ('url', '!=', '')])['member_key'])
+    if query == 'role_link':
+        return sorted(set(read('roles', ['member_key'], [('role', '=', QUERY_ROLE)])['member_key']) & linked)
+    members = read('members', ['member_key', 'faction'])
+    coverage = {}
+    for key, faction in zip(members['member_key'], members['faction']):
+        if key in linked:
+            coverage[faction] = coverage.get(faction, 0) + 1
+    return coverage
+
+
+QUERIES = ('faction', 'role_link', 'coverage')
+
+
+def bench_queries(json_filename, out_dir, formats, repeat):
+    """Returns {query: {backend: seconds}}; every backend must give the JSON answer."""
+    backends = {'json': lambda query: query_json(json_filename, query)}
+    for export_format, query_function in (('csv', query_csv), ('sqlite', query_sqlite), ('parquet', query_parquet)):
+        if export_format in formats:
+            backends[export_format] = lambda query, query_function=query_function: query_function(out_dir, query)
+
+    results = {}
+    for query in QUERIES:
+        expected = backends['json'](query)
+        results[query] = {}
+        for backend, run in backends.items():
+            answer = run(query)
+            if answer != expected:
+                raise AssertionError(f"{backend} answers {query} differently from the JSON file")
+            results[query][backend] = best_of(lambda: run(query), repeat)
+    return results
+
+
+def run_benchmarks(scales, formats, repeat=REPEAT, socials_filename=SOCIALS_FILENAME):
+    members = json_reload(socials_filename)
+    work_dir = tempfile.mkdtemp(prefix='dpr_export_bench_')
+    export_results, query_results = {}, {}
+    try:
+        for scale in scales:
+            runs = max(1, repeat // scale) if scale > 1 else repeat
+            json_filename = os.path.join(work_dir, f"members_{scale}x.json")
+            with open(json_filename, 'w', encoding='utf-8') as f:
+                json.dump(scale_members(members, scale), f, ensure_ascii=False, indent=4)  # Like the scrapers
+            out_dir = os.path.join(work_dir, f"tables_{scale}x")
+            count = len(members) * scale
+
+            reload_seconds = best_of(lambda: json_reload(json_filename), runs)
+            export_results[f"json_reload {scale}x"] = (count, reload_seconds, os.path.getsize(json_filename),
+                                                       peak_mib(lambda: json_reload(json_filename)))
+            for export_format in formats:
+                export_results[f"{export_format} {scale}x"] = (count, *bench_export(json_filename, export_format,
+                                                                                    out_dir, runs))
+                print(f"  {export_format} export at {scale}x done")
+            query_results[scale] = bench_queries(json_filename, out_dir, formats, runs)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return export_results, query_results
+
+
+def format_results(export_results, query_results):
+    lines = [f"  {'export':<18} {'members/s':>12}  {'seconds':>8}  {'size KiB':>9}  {'peak MiB':>8}"]
+    for name, (count, seconds, size, peak) in export_results.items():
+        lines.append(f"  {name:<18} {count / seconds:12,.0f}  {seconds:8.3f}  {size / 1024:9,.0f}  {peak:8.1f}")
+    backends = list(next(iter(next(iter(query_results.values())).values())))
+    lines.append('')
+    lines.append(f"  {'query (ms, cold)':<18} " + ' '.join(f"{backend:>9}" for backend in backends))
+    for scale, by_query in query_results.items():
+        for query, by_backend in by_query.items():
+            lines.append(f"  {f'{query} {scale}x':<18} "
+                         + ' '.join(f"{by_backend[backend] * 1000:9.2f}" for backend in backends))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export throughput and query latency of the CSV, SQLite and "
+                                                 "Parquet tables versus reloading the JSON file.")
+    parser.add_argument('--scales', default=','.join(str(scale) for scale in SCALES),
+                        help="comma-separated member count multipliers (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="best of this many runs (default: %(default)s)")
+    args = parser.parse_args()
+
+    benchmark_formats = available_formats()
+    benchmark_scales = [int(scale) for scale in args.scales.split(',')]
+    print(f"Benchmarking {', '.join(benchmark_formats)} at {', '.join(f'{s}x' for s in benchmark_scales)}...\n")
+    export_timings, query_timings = run_benchmarks(benchmark_scales, benchmark_formats, args.repeat)
+    print()
+    print(format_results(export_timings, query_timings))
+    print("\nFINISH")
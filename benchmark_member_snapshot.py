@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from member_snapshot import MemberSnapshot, write_snapshot_for
+
+MEMBERS_FILENAMES = ['dpr_members.json', 'dpr_members_socials.json']
+REPEAT = 20
+
+# Run in a fresh interpreter per loader so each one starts from the same resident set
+RSS_PROBE = '''
+import json, os, sys
+from member_snapshot import MemberSnapshot
+
+def resident_kib():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+filename, loader = sys.argv[1], sys.argv[2]
+before = resident_kib()
+if loader == 'json':
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+elif loader == 'snapshot':
+    snapshot = MemberSnapshot(filename)
+    data = snapshot.to_members()
+else:
+    snapshot = MemberSnapshot(filename)
+    data = snapshot.column('faction')
+print(resident_kib() - before)
+'''
+
+
+def best_of(load, repeat=REPEAT):
+    best_seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        elapsed = time.perf_counter() - start
+        if best_seconds is None or elapsed < best_seconds:
+            best_seconds = elapsed
+    return best_seconds
+
+
+def load_json(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_snapshot(filename):
+    with MemberSnapshot(filename) as snapshot:
+        return snapshot.to_members()
+
+
+def load_snapshot_column(filename, field='faction'):
+    with MemberSnapshot(filename) as snapshot:
+        return snapshot.column(field)
+
+
+def rss_kib(filename, loader):
+    """RSS growth (KiB) of loading filename in a fresh interpreter, or None without /proc (non-Linux)."""
+    try:
+        output = subprocess.run([sys.executable, '-c', RSS_PROBE, filename, loader], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        return int(output.strip())
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+
+if __name__ == '__main__':
+    for json_filename in sys.argv[1:] or MEMBERS_FILENAMES:
+        members = load_json(json_filename)
+        snapshot_filename = write_snapshot_for(json_filename, members)
+        if snapshot_filename is None:
+            continue
+        assert load_snapshot(snapshot_filename) == members, f"{snapshot_filename} does not round-trip"
+
+        print(f"{json_filename}: {len(members)} members, {os.path.getsize(json_filename) / 1024:.0f} KiB JSON, "
+              f"{os.path.getsize(snapshot_filename) / 1024:.0f} KiB snapshot (best of {REPEAT})")
+        json_seconds = best_of(lambda: load_json(json_filename))
+        runs = [
+            ('json.load', json_seconds, json_filename, 'json'),
+            ('snapshot -> dicts', best_of(lambda: load_snapshot(snapshot_filename)), snapshot_filename, 'snapshot'),
+            ('snapshot column', best_of(lambda: load_snapshot_column(snapshot_filename)), snapshot_filename,
+             'column'),
+        ]
+        for label, seconds, filename, loader in runs:
+            rss = rss_kib(filename, loader)
+            rss_text = f"{rss:6d} KiB RSS" if rss is not None else "   n/a RSS"
+            print(f"  {label:<20} {seconds * 1000:7.2f} ms  {json_seconds / seconds:6.2f}x  {rss_text}")
+        print()
+
+    print("FINISH")
@@ -0,0 +1,115 @@
+import html
+import json
+import re
+import sys
+import time
+
+from member_parser import (DEFAULT_PARSER_BACKEND, FACTION_NAMES_ID, PARSER_BACKENDS, STREAM_PARSER_BACKENDS,
+                           iter_members, parse_members)
+
+# Saved copy of https://en.dpr.go.id/anggota/ (e.g. "Save Page As..." from the browser)
+SNAPSHOT_FILENAME = 'dpr_members_listing.html'
+# Used to render an equivalent listing page when no saved snapshot is available
+MEMBERS_FILENAME = 'dpr_members.json'
+REPEAT = 5
+OPTIONAL_END_TAG_PATTERN = re.compile(r'</t[dr]\s*>', re.IGNORECASE)
+
+FACTION_NAMES_EN = {faction_id: faction_en for faction_en, faction_id in FACTION_NAMES_ID.items()}
+
+
+def render_listing_html(members):
+    """Renders member dicts back into the listing table markup of en.dpr.go.id/anggota/."""
+    rows = []
+    for member in members:
+        relative_profile_url = member['profile_url'].replace('https://en.dpr.go.id', '')
+        email = member['email'].replace('@', '[at]')
+        roles = '<br>'.join(html.escape(role) for role in member['roles'])
+        rows.append(
+            '<tr>\n'
+            f'<td>{html.escape(member["id"])}</td>\n'
+            f'<td class="hidden-xs"><a href="{html.escape(relative_profile_url)}">'
+            f'<img src="{html.escape(member["image_url"])}" width="60"></a></td>\n'
+            f'<td><a href="{html.escape(relative_profile_url)}">{html.escape(member["name"])}</a><br>\n'
+            f'{html.escape(FACTION_NAMES_EN.get(member["faction"], "N/A"))}<br>\n'
+            f'{html.escape(member["district"])}<br>\n'
+            f'{html.escape(email)}</td>\n'
+            f'<td>{roles}</td>\n'
+            '</tr>'
+        )
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Members</title></head>\n'
+        '<body><div class="container"><table class="table">\n'
+        '<thead><tr><th>No</th><th class="hidden-xs">Photo</th><th>Name</th><th>Commission</th></tr></thead>\n'
+        '<tbody>\n' + '\n'.join(rows) + '\n</tbody>\n</table></div></body></html>\n'
+    )
+
+
+def load_listing_html(filename):
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        print(f"No saved snapshot at {filename}, rendering one from {MEMBERS_FILENAME} instead.")
+
+    with open(MEMBERS_FILENAME, 'r', encoding='utf-8') as f:
+        return render_listing_html(json.load(f))
+
+
+def omit_optional_end_tags(html_content):
+    """The same page without </td> and </tr>, which HTML allows to be omitted (and some CMS templates do)."""
+    return OPTIONAL_END_TAG_PATTERN.sub('', html_content)
+
+
+def parse_with(html_content, backend, streaming=False):
+    if streaming:
+        return list(iter_members(html_content, backend=backend))
+    return parse_members(html_content, backend=backend)
+
+
+def time_parser_backend(html_content, backend, repeat=REPEAT, streaming=False):
+    """Returns (best_seconds, members) over `repeat` runs of one backend."""
+    best_seconds = None
+    members = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        members = parse_with(html_content, backend, streaming)
+        elapsed = time.perf_counter() - start
+        if best_seconds is None or elapsed < best_seconds:
+            best_seconds = elapsed
+    return best_seconds, members
+
+
+if __name__ == '__main__':
+    snapshot_filename = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_FILENAME
+    listing_html = load_listing_html(snapshot_filename)
+    implied_html = omit_optional_end_tags(listing_html)
+    backend_count = len(PARSER_BACKENDS) + len(STREAM_PARSER_BACKENDS)
+    print(f"Benchmarking {backend_count} parser backends on {len(listing_html) / 1024:.0f} KiB of HTML "
+          f"(best of {REPEAT}); output compared with {DEFAULT_PARSER_BACKEND}, also without </td> and </tr>...\n")
+
+    # Compare the serialized output, which is what ends up in dpr_members.json
+    reference_json = json.dumps(parse_members(listing_html, backend=DEFAULT_PARSER_BACKEND), ensure_ascii=False)
+    implied_reference_json = json.dumps(parse_members(implied_html, backend=DEFAULT_PARSER_BACKEND),
+                                        ensure_ascii=False)
+    baseline_seconds = None
+    benchmark_runs = [(backend, False) for backend in PARSER_BACKENDS]
+    benchmark_runs += [(backend, True) for backend in STREAM_PARSER_BACKENDS]
+    for backend, streaming in benchmark_runs:
+        label = f"stream:{backend}" if streaming else backend
+        try:
+            best_seconds, members = time_parser_backend(listing_html, backend, streaming=streaming)
+        except ImportError as e:
+            print(f"  {label:<20} skipped: {e}")
+            continue
+
+        if baseline_seconds is None:
+            baseline_seconds = best_seconds
+        identical = 'identical' if json.dumps(members, ensure_ascii=False) == reference_json else 'DIFFERENT OUTPUT'
+        implied_members = parse_with(implied_html, backend, streaming)
+        if json.dumps(implied_members, ensure_ascii=False) != implied_reference_json:
+            identical += f", DIFFERENT without end tags ({len(implied_members)} members)"
+
+        print(f"  {label:<20} {best_seconds * 1000:8.1f} ms  {baseline_seconds / best_seconds:5.2f}x  "
+              f"{len(members)} members  {identical}")
+
+    print("\nFINISH")
@@ -0,0 +1,376 @@
+"""
+Scaling benchmarks of the parse, filter, save, listing scrape and search paths at 1x, 10x and 100x members,
+replaying recorded listing HTML and Custom Search JSON fixtures through a local stub server.
+
+This is a standalone script, not a pytest-benchmark or asv suite: neither is a dependency of the repo,
+and the other benchmark_*.py scripts are plain scripts as well. It provides what those
+tools would here: best-of-N timings, a --output results file and a --baseline comparison that flags
+regressions (REGRESSION_RATIO) and non-linear scaling (NONLINEAR_RATIO).
+"""
+import argparse
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmark_parsers import load_listing_html
+from benchmark_profile_link_classifier import CONTENT_SUFFIXES, platform_domain_of
+from http_cache import ResponseCache
+from hybrid_fetcher import HybridFetcher
+from member_parser import DEFAULT_PARSER_BACKEND, parse_members
+from member_snapshot import write_snapshot_for
+from profile_link_classifier import classify_link
+from scrape_socials import save_update_json_file
+from search_result_store import RESULT_STORE_FILENAME, get_result_store
+import social_search
+from social_search import PLATFORMS, build_search_query, find_potential_links, filter_potential_profile_link
+from socials_journal import write_json_atomically
+
+FIXTURES_DIR = 'benchmark_fixtures'  # Recorded on the first run, replayed afterwards so runs stay comparable
+LISTING_FIXTURE = 'listing.html'
+SEARCH_FIXTURE = 'search_results.json'  # {query: Custom Search JSON response}
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+LISTING_SNAPSHOT_FILENAME = 'dpr_members_listing.html'  # Saved by `dpr.py run fetch`; preferred over a rendering
+
+SCALES = (1, 10, 100)
+REPEAT = 5  # Best of REPEAT at 1x, fewer at larger scales (at least one run)
+SEARCH_BASE_QUERIES = 50  # End-to-end searches at 1x; every search is a real HTTP round trip to the stub
+NONLINEAR_RATIO = 1.5  # Per-item time at a scale vs 1x above this is reported as non-linear
+REGRESSION_RATIO = 1.25  # Slower than the baseline file by more than this is reported as a regression
+
+TBODY_PATTERN = re.compile(r'(<tbody\b[^>]*>)(.*?)(</tbody>)', re.IGNORECASE | re.DOTALL)
+
+
+# --- Fixtures ---
+
+def synthesize_search_results(members):
+    """
+    Custom Search responses shaped like the real API's for every member/platform query: the stored profile
+    link (if any) among post/video links of the same account and unrelated platform pages.
+    """
+    responses = {}
+    for member in members:
+        for platform, domain in PLATFORMS.items():
+            link = (member.get('socials') or {}).get(platform)
+            handle = re.sub(r'\W+', '', member.get('name', '').lower())[:15] or 'dpr'
+            base = link.rstrip('/') if link else f"https://www.{domain}/{handle}"
+            links = ([link] if link else []) + [base + suffix for suffix in CONTENT_SUFFIXES[domain]]
+            links += [f"https://www.{domain}/explore/tags/{handle}", f"https://www.{domain}/search?q={handle}"]
+            items = [{'title': member.get('name'), 'link': item_link, 'displayLink': domain} for item_link in links]
+            responses[build_search_query(member.get('name'), platform, domain)] = {
+                'kind': 'customsearch#search',
+                'searchInformation': {'totalResults': str(len(items))},
+                'items': items,
+            }
+    return responses
+
+
+def recorded_search_results():
+    """Responses of real searches kept in the search result store, if any were made on this machine."""
+    if not os.path.exists(RESULT_STORE_FILENAME):
+        return {}
+    result_store = get_result_store()
+    responses = {}
+    for query in result_store.queries():
+        items = result_store.items(query)
+        responses[query] = {'searchInformation': {'totalResults': str(len(items))}, 'items': items}
+    return responses
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """
+    Returns (listing_html, search_responses), recording them into `directory` first if it is empty:
+    the saved listing page (or one rendered from dpr_members.json), and the stored real search results
+    (or synthesized ones built from the reviewed socials).
+    """
+    listing_filename = os.path.join(directory, LISTING_FIXTURE)
+    search_filename = os.path.join(directory, SEARCH_FIXTURE)
+    if not (os.path.exists(listing_filename) and os.path.exists(search_filename)):
+        os.makedirs(directory, exist_ok=True)
+        print(f"Recording fixtures into {directory}/...")
+        listing_html = load_listing_html(LISTING_SNAPSHOT_FILENAME)
+        search_responses = recorded_search_results()
+        if not search_responses:
+            with open(SOCIALS_FILENAME, 'r', encoding='utf-8') as f:
+                search_responses = synthesize_search_results(json.load(f))
+        with open(listing_filename, 'w', encoding='utf-8') as f:
+            f.write(listing_html)
+        write_json_atomically(search_filename, search_responses)
+
+    with open(listing_filename, 'r', encoding='utf-8') as f:
+        listing_html = f.read()
+    with open(search_filename, 'r', encoding='utf-8') as f:
+        search_responses = json.load(f)
+    return listing_html, search_responses
+
+
+def scale_listing_html(listing_html, scale):
+    """Repeats the listing's member rows `scale` times inside the same document."""
+    match = TBODY_PATTERN.search(listing_html)
+    if match is None or scale == 1:
+        return listing_html
+    return listing_html[:match.start(2)] + match.group(2) * scale + listing_html[match.end(2):]
+
+
+def scale_members(members, scale):
+    """`scale` copies of the members; copies after the first get distinct ids and profile URLs."""
+    scaled = []
+    for copy in range(scale):
+        for member in members:
+            if copy:
+                member = dict(member, id=f"{member.get('id')}-{copy}",
+                              profile_url=f"{member.get('profile_url')}-{copy}")
+            scaled.append(member)
+    return scaled
+
+
+def scaled_queries(queries, count):
+    """`count` distinct queries cycling through the fixture ones; ' #n' keeps repeats apart in the HTTP cache."""
+    return [queries[i % len(queries)] + (f" #{i // len(queries)}" if i >= len(queries) else '') for i in range(count)]
+
+
+# --- Stub server ---
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /anggota/?scale=N (the scaled listing) and /customsearch/v1?q=... (the recorded responses)."""
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real servers
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls on keep-alive
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if parsed.path.startswith('/anggota'):
+            scale = int(params.get('scale', ['1'])[0])
+            body = self.server.listing_for(scale)
+            content_type = 'text/html; charset=utf-8'
+        elif parsed.path == '/customsearch/v1':
+            query = re.sub(r' #\d+$', '', params.get('q', [''])[0])
+            response = self.server.search_responses.get(query, {'searchInformation': {'totalResults': '0'}})
+            body = json.dumps(response).encode('utf-8')
+            content_type = 'application/json; charset=UTF-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, listing_html, search_responses):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.listing_html = listing_html
+        self.search_responses = search_responses
+        self._listings = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def listing_for(self, scale):
+        with self._lock:
+            if scale not in self._listings:
+                self._listings[scale] = scale_listing_html(self.listing_html, scale).encode('utf-8')
+            return self._listings[scale]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+# --- Benchmarks ---
+
+def best_of(function, repeat):
+    best_seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best_seconds is None or elapsed < best_seconds:
+            best_seconds = elapsed
+    return best_seconds
+
+
+def bench_parse(listing_html, scale, repeat, backend=DEFAULT_PARSER_BACKEND):
+    html_content = scale_listing_html(listing_html, scale)
+    members = parse_members(html_content, backend=backend)
+    return len(members), best_of(lambda: parse_members(html_content, backend=backend), repeat)
+
+
+def bench_filter(search_responses, scale, repeat):
+    """Every result link through filter_potential_profile_link, uncached (the classifier memoizes per link)."""
+    corpus = []
+    for response in search_responses.values():
+        for item in response.get('items', []):
+            domain = platform_domain_of(item.get('link', ''))
+            if domain:
+                corpus.append((item['link'], domain))
+
+    def run():
+        for _ in range(scale):
+            classify_link.cache_clear()
+            for link, domain in corpus:
+                filter_potential_profile_link(link, domain)
+
+    return len(corpus) * scale, best_of(run, repeat)
+
+
+def bench_save(members, scale, repeat, work_dir):
+    scaled = scale_members(members, scale)
+    filename = os.path.join(work_dir, f"save_{scale}x.json")
+
+    def run():
+        with redirect_stdout(io.StringIO()):  # It confirms every save
+            save_update_json_file(filename, scaled)
+
+    return len(scaled), best_of(run, repeat)
+
+
+def bench_listing_scrape(server, scale, repeat, work_dir, backend=DEFAULT_PARSER_BACKEND):
+    """fetch (plain HTTP path of HybridFetcher, no cache) -> parse_members -> atomic JSON save + snapshot."""
+    url = f"{server.base_url}/anggota/?scale={scale}"
+    filename = os.path.join(work_dir, f"scrape_{scale}x.json")
+    counts = {}
+
+    def run():
+        hybrid_fetcher = HybridFetcher()
+        try:
+            members = parse_members(hybrid_fetcher.fetch(url), backend=backend)
+        finally:
+            hybrid_fetcher.close()
+        write_json_atomically(filename, members)
+        write_snapshot_for(filename, members)
+        counts['members'] = len(members)
+
+    seconds = best_of(run, repeat)
+    return counts['members'], seconds
+
+
+def bench_search(server, search_responses, scale, repeat, work_dir):
+    """call_google_search_api against the stub through an always-stale cache, then find_potential_links."""
+    queries = scaled_queries(list(search_responses), SEARCH_BASE_QUERIES * scale)
+    cache = ResponseCache(cache_dir=os.path.join(work_dir, f"cache_{scale}x"), ttl_seconds=0)
+    social_search.SEARCH_API_URL = f"{server.base_url}/customsearch/v1"
+
+    def run():
+        for query in queries:
+            domain = next((domain for domain in PLATFORMS.values() if f"site:{domain}" in query), None)
+            find_potential_links(social_search.call_google_search_api(query, 'benchmark', 'benchmark', cache=cache),
+                                 domain)
+
+    try:
+        return len(queries), best_of(run, repeat)
+    finally:
+        cache.close()
+
+
+BENCHMARKS = ('parse', 'filter', 'save', 'listing_scrape', 'search')
+UNITS = {'parse': 'members', 'filter': 'links', 'save': 'members', 'listing_scrape': 'members', 'search': 'queries'}
+
+
+def run_benchmarks(scales, selected, backend=DEFAULT_PARSER_BACKEND, fixtures_dir=FIXTURES_DIR):
+    """Returns {benchmark: {scale: {'items', 'seconds'}}}."""
+    listing_html, search_responses = load_fixtures(fixtures_dir)
+    members = parse_members(listing_html, backend=backend)
+    with open(SOCIALS_FILENAME, 'r', encoding='utf-8') as f:
+        socials_by_url = {member.get('profile_url'): member.get('socials') for member in json.load(f)}
+    for member in members:
+        member['socials'] = socials_by_url.get(member.get('profile_url')) or {}
+
+    results = {name: {} for name in selected}
+    work_dir = tempfile.mkdtemp(prefix='dpr_benchmark_')
+    try:
+        with StubServer(listing_html, search_responses) as server:
+            for scale in scales:
+                repeat = max(1, REPEAT // scale)
+                runs = {
+                    'parse': lambda: bench_parse(listing_html, scale, repeat, backend),
+                    'filter': lambda: bench_filter(search_responses, scale, repeat),
+                    'save': lambda: bench_save(members, scale, repeat, work_dir),
+                    'listing_scrape': lambda: bench_listing_scrape(server, scale, repeat, work_dir, backend),
+                    'search': lambda: bench_search(server, search_responses, scale, repeat, work_dir),
+                }
+                for name in selected:
+                    items, seconds = runs[name]()
+                    results[name][str(scale)] = {'items': items, 'seconds': seconds}
+                    print(f"  {name:<15} {scale:>4}x  {items:>8} {UNITS[name]:<8} {seconds * 1000:10.1f} ms "
+                          f"(best of {repeat})")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def format_results(results, baseline=None):
+    """Throughput table; flags per-item slowdowns against 1x (non-linear scaling) and against a baseline run."""
+    lines = [f"  {'benchmark':<15} {'scale':>5}  {'items/s':>12}  {'us/item':>9}  {'vs 1x':>6}  notes"]
+    for name, by_scale in results.items():
+        first = by_scale.get('1')
+        for scale, result in by_scale.items():
+            per_item = result['seconds'] / result['items'] if result['items'] else 0
+            ratio = per_item / (first['seconds'] / first['items']) if first and first['items'] else 1
+            notes = []
+            if ratio > NONLINEAR_RATIO:
+                notes.append("NON-LINEAR")
+            previous = (baseline or {}).get(name, {}).get(scale)
+            if previous and previous['items'] == result['items'] and previous['seconds']:
+                change = result['seconds'] / previous['seconds']
+                notes.append(f"{change:.2f}x baseline" + (" REGRESSION" if change > REGRESSION_RATIO else ''))
+            items_per_second = result['items'] / result['seconds'] if result['seconds'] else 0
+            lines.append(f"  {name:<15} {scale + 'x':>5}  {items_per_second:12,.0f}  {per_item * 1e6:9.1f}  "
+                         f"{ratio:6.2f}  {', '.join(notes)}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scaling benchmarks of the parse, filter, save and scrape paths, "
+                                                 "replaying recorded fixtures through a local stub server.")
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark', help=f"any of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--scales', default=','.join(str(scale) for scale in SCALES),
+                        help="comma-separated member count multipliers (default: %(default)s)")
+    parser.add_argument('--backend', default=DEFAULT_PARSER_BACKEND, help="parser backend (default: %(default)s)")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="fixture directory (default: %(default)s)")
+    parser.add_argument('--output', help="save the results as JSON, e.g. to serve as a later --baseline")
+    parser.add_argument('--baseline', help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    selected_benchmarks = [name for name in BENCHMARKS if name in (args.benchmarks or BENCHMARKS)]
+    benchmark_scales = [int(scale) for scale in args.scales.split(',')]
+
+    print(f"Benchmarking {', '.join(selected_benchmarks)} at {', '.join(f'{s}x' for s in benchmark_scales)} "
+          f"({args.backend} parser)...\n")
+    benchmark_results = run_benchmarks(benchmark_scales, selected_benchmarks, args.backend, args.fixtures)
+
+    baseline_results = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline_results = json.load(f)
+    print()
+    print(format_results(benchmark_results, baseline_results))
+    if args.output:
+        write_json_atomically(args.output, benchmark_results)
+        print(f"\nResults saved to {args.output}")
+
+    print("\nFINISH")
@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from member_parser import DEFAULT_PARSER_BACKEND, parse_members
+
+OUTPUT_FILENAME = 'dpr_members_history.jsonl'
+SNAPSHOT_EXTENSIONS = ('.html', '.htm', '.html.gz', '.htm.gz')
+MAX_WORKERS = os.cpu_count() or 2
+CHUNK_SIZE = 4  # Snapshots per task: enough to amortize inter-process transfer, small enough to balance load
+MAX_CHUNKS_IN_FLIGHT = MAX_WORKERS * 2  # Bounds memory when reading a large tarball
+
+# '2025-04-29', '2025_04_29', '20250429' anywhere in the file name
+SNAPSHOT_DATE_PATTERN = re.compile(r'(20\d{2})[-_.]?(0[1-9]|1[0-2])[-_.]?(0[1-9]|[12]\d|3[01])')
+
+
+def is_snapshot_name(name):
+    return name.lower().endswith(SNAPSHOT_EXTENSIONS)
+
+
+def snapshot_date(name, mtime):
+    """The date written in the snapshot's file name, or else the day of its modification time (UTC)."""
+    match = SNAPSHOT_DATE_PATTERN.search(os.path.basename(name))
+    if match:
+        return '-'.join(match.groups())
+    return datetime.fromtimestamp(mtime, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def iter_directory_snapshots(directory):
+    """Yields (name, date, path, None) for every snapshot file under directory, oldest date first."""
+    found = []
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if is_snapshot_name(filename):
+                path = os.path.join(root, filename)
+                found.append((os.path.relpath(path, directory), snapshot_date(filename, os.path.getmtime(path)), path))
+    for name, date, path in sorted(found, key=lambda item: (item[1], item[0])):
+        yield name, date, path, None
+
+
+def iter_tarball_snapshots(tarball):
+    """
+    Yields (name, date, None, content) for every snapshot in a .tar/.tar.gz, reading members sequentially
+    so compressed archives are decompressed once. This is archive order, not date order;
+    bulk_parse_snapshots() sorts the output by date.
+    """
+    with tarfile.open(tarball, 'r:*') as archive:
+        for member in archive:
+            if not member.isfile() or not is_snapshot_name(member.name):
+                continue
+            content = archive.extractfile(member).read()
+            yield member.name, snapshot_date(member.name, member.mtime), None, content
+
+
+def iter_snapshots(source):
+    if os.path.isdir(source):
+        return iter_directory_snapshots(source)
+    return iter_tarball_snapshots(source)
+
+
+def iter_chunks(items, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_snapshot_chunk(chunk, backend=DEFAULT_PARSER_BACKEND):
+    """
+    Runs in a worker process: parses each (name, date, path, content) snapshot of the chunk.
+    Directory snapshots are read by the worker itself, so only file names cross the process boundary.
+    Returns [(name, date, sha256 of the HTML, members or None on error)].
+    """
+    results = []
+    for name, date, path, content in chunk:
+        try:
+            if content is None:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            if name.lower().endswith('.gz'):
+                content = gzip.decompress(content)
+            digest = hashlib.sha256(content).hexdigest()
+            members = parse_members(content.decode('utf-8', errors='replace'), backend=backend)
+            results.append((name, date, digest, members))
+        except (OSError, EOFError, ValueError) as e:
+            print(f"Error parsing snapshot {name}: {e}")
+            results.append((name, date, None, None))
+    return results
+
+
+def iter_parsed_snapshots(snapshots, max_workers=MAX_WORKERS, chunk_size=CHUNK_SIZE,
+                          max_in_flight=MAX_CHUNKS_IN_FLIGHT, backend=DEFAULT_PARSER_BACKEND):
+    """
+    Fans chunks of snapshots out over a process pool and yields each parsed snapshot as soon as its chunk
+    (and every earlier one) is done, so results stream out in input order while at most `max_in_flight`
+    chunks are held in memory.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for chunk in iter_chunks(snapshots, chunk_size):
+            pending.append(executor.submit(parse_snapshot_chunk, chunk, backend))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def copy_in_date_order(filename, spans, output_filename):
+    """Copies the (date, name, start, end) byte ranges of filename into output_filename, oldest date first."""
+    with open(filename, 'rb') as source, open(output_filename, 'wb') as out:
+        for _, _, start, end in sorted(spans):
+            source.seek(start)
+            out.write(source.read(end - start))
+
+
+def bulk_parse_snapshots(source, output_filename=OUTPUT_FILENAME, max_workers=MAX_WORKERS):
+    """
+    Parses every snapshot in a directory or tarball into one JSONL dataset: one member per line, tagged with
+    'snapshot_date' and 'snapshot', oldest date first. Byte-identical snapshots (same SHA-256) of the same
+    date are written once; an identical page on a later date is kept, as it shows the roster still held then.
+    Returns {'snapshots', 'duplicates', 'empty', 'failed', 'members'}.
+    """
+    counts = {'snapshots': 0, 'duplicates': 0, 'empty': 0, 'failed': 0, 'members': 0}
+    seen = set()  # (digest, date)
+    spans = []  # (date, name, start, end) of each snapshot's lines in the temp file
+    temp_filename = f"{output_filename}.tmp"
+    with open(temp_filename, 'wb') as out:
+        for name, date, digest, members in iter_parsed_snapshots(iter_snapshots(source), max_workers):
+            if members is None:
+                counts['failed'] += 1
+                continue
+            if not members:
+                counts['empty'] += 1
+                print(f"  {date} {name}: no member rows (not a listing page?), skipped")
+                continue
+            if (digest, date) in seen:
+                counts['duplicates'] += 1
+                print(f"  {date} {name}: identical to another snapshot of the same date, skipped")
+                continue
+            seen.add((digest, date))
+            counts['snapshots'] += 1
+            start = out.tell()
+            for member in members:
+                record = {'snapshot_date': date, 'snapshot': name}
+                record.update(member)
+                out.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+            spans.append((date, name, start, out.tell()))
+            counts['members'] += len(members)
+            print(f"  {date} {name}: {len(members)} members")
+
+    if spans == sorted(spans):  # Directories are read in date order already
+        os.replace(temp_filename, output_filename)
+    else:
+        sorted_filename = f"{output_filename}.sorted.tmp"
+        copy_in_date_order(temp_filename, spans, sorted_filename)
+        os.replace(sorted_filename, output_filename)
+        os.remove(temp_filename)
+    return counts
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f"Usage: python {os.path.basename(__file__)} <snapshot directory or tarball> [output.jsonl]")
+        exit()
+
+    snapshot_source = sys.argv[1]
+    history_filename = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_FILENAME
+    print(f"Parsing snapshots from {snapshot_source} with {MAX_WORKERS} processes ({DEFAULT_PARSER_BACKEND})...")
+    start = time.perf_counter()
+    parse_counts = bulk_parse_snapshots(snapshot_source, history_filename)
+    print(f"{parse_counts['snapshots']} snapshots ({parse_counts['members']} member rows) written to "
+          f"{history_filename} in {time.perf_counter() - start:.1f} s; {parse_counts['duplicates']} duplicates, "
+          f"{parse_counts['empty']} without members, {parse_counts['failed']} failed")
+    print("\nFINISH")
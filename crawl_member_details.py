@@ -0,0 +1,163 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from http_client import AdaptiveRateLimiter, RequestExecutor, create_session
+from instrumentation import metrics, start_profiling, write_reports
+from member_snapshot import load_members, write_snapshot_for
+from snapshot_diff import changed_keys, load_changelog_for, member_key
+
+SOURCE_FILENAME = 'dpr_members.json'
+OUTPUT_FILENAME = 'dpr_members_details.json'
+HEADERS = {'User-Agent': 'Lynx'}
+REQUEST_TIMEOUT_SECONDS = 15
+MAX_WORKERS = 8  # Concurrent detail page downloads
+REQUEST_INTERVAL_SECONDS = 0.25  # Starting spacing between two requests to the same host; adapts to the server
+
+
+@metrics.timed('details')
+def fetch_detail_html(executor, url):
+    try:
+        response = executor.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return response.text
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+
+def parse_member_details(detail_html_content):
+    """
+    Extracts the label/value pairs of a member's detail page.
+    The page lays them out as two-cell table rows (<th>/<td> or <td>/<td>) and <dt>/<dd> lists;
+    everything found is returned as {label: value}, so new fields on the site are picked up as well.
+    """
+    if not detail_html_content:
+        return {}
+
+    soup = BeautifulSoup(detail_html_content, 'html.parser')
+    details = {}
+
+    for row in soup.select('tr'):
+        cells = row.find_all(['th', 'td'], recursive=False)
+        if len(cells) != 2:
+            continue
+        label = cells[0].get_text(' ', strip=True).rstrip(':').strip()
+        value = cells[1].get_text(' ', strip=True).lstrip(':').strip()
+        if label and value:
+            details.setdefault(label, value)
+
+    for term in soup.find_all('dt'):
+        definition = term.find_next_sibling('dd')
+        if definition is None:
+            continue
+        label = term.get_text(' ', strip=True).rstrip(':').strip()
+        value = definition.get_text(' ', strip=True)
+        if label and value:
+            details.setdefault(label, value)
+
+    return details
+
+
+def detail_url_for(member, base_url=None):
+    """Returns the detail page URL of a member, optionally re-rooted on `base_url` (e.g. a local stub server)."""
+    profile_url = member.get('profile_url')
+    if not profile_url or profile_url == 'N/A':
+        return None
+    if base_url:
+        return urljoin(base_url, urlparse(profile_url).path)
+    return profile_url
+
+
+def reuse_previous_details(members, source_filename=SOURCE_FILENAME, previous_filename=OUTPUT_FILENAME):
+    """
+    Copies the details of the previous crawl to every member the roster changelog does not list as added
+    or changed. Returns the keys still to crawl (changed members and those without previous details),
+    or None to crawl everyone when the changelog does not describe the roster the previous crawl used.
+    """
+    changelog = load_changelog_for(source_filename, previous_filename)
+    if changelog is None:
+        return None
+    try:
+        previous_members = load_members(previous_filename, fields=('profile_url', 'name', 'id', 'details'))
+    except (IOError, json.JSONDecodeError):
+        return None
+    previous_details = {member_key(member): member.get('details') for member in previous_members}
+
+    keys = set(changed_keys(changelog))
+    for member in members:
+        key = member_key(member)
+        if key in keys:
+            continue
+        if previous_details.get(key):
+            member['details'] = previous_details[key]
+        else:
+            keys.add(key)  # Its page failed last time
+    return keys
+
+
+def crawl_member_details(members, max_workers=MAX_WORKERS, request_interval=REQUEST_INTERVAL_SECONDS,
+                         base_url=None, session=None, only_keys=None):
+    """
+    Fetches the detail page of every member (or only those whose member_key is in only_keys) over one pooled
+    session with `max_workers` concurrent requests and stores the parsed fields in member['details'].
+    Members whose page could not be fetched are left untouched. Returns the number of members that got details.
+    """
+    session = session or create_session(HEADERS, pool_size=max_workers)
+    rate_limiter = AdaptiveRateLimiter(request_interval)
+    request_executor = RequestExecutor(session, rate_limiter)
+    if only_keys is not None:
+        members = [member for member in members if member_key(member) in only_keys]
+    jobs = [(member, detail_url_for(member, base_url)) for member in members]
+    jobs = [(member, url) for member, url in jobs if url]
+
+    def crawl_one(job):
+        member, url = job
+        return member, parse_member_details(fetch_detail_html(request_executor, url))
+
+    crawled = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() keeps the input order, so progress output follows the listing
+        for index, (member, details) in enumerate(executor.map(crawl_one, jobs)):
+            if details:
+                member['details'] = details
+                crawled += 1
+            print(f"  [{index + 1}/{len(jobs)}] {member.get('name', 'N/A')}: {len(details)} fields")
+
+    print(request_executor.summary())
+    print(rate_limiter.summary())
+    return crawled
+
+
+if __name__ == '__main__':
+    start_profiling()  # Only when DPR_PROFILE is set
+    base_url_override = sys.argv[1] if len(sys.argv) > 1 else None
+
+    try:
+        with open(SOURCE_FILENAME, 'r', encoding='utf-8') as f:
+            dpr_members = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error loading {SOURCE_FILENAME}: {e}")
+        exit()
+
+    # Only members added or changed since the previous crawl, when the roster changelog allows it
+    keys_to_crawl = reuse_previous_details(dpr_members)
+    crawl_count = len(dpr_members) if keys_to_crawl is None else len(keys_to_crawl)
+    print(f"Crawling detail pages of {crawl_count} of {len(dpr_members)} members with {MAX_WORKERS} workers...")
+    crawled_count = crawl_member_details(dpr_members, base_url=base_url_override, only_keys=keys_to_crawl)
+
+    print(f"\nSaving {crawled_count} member details to {OUTPUT_FILENAME}...")
+    try:
+        with open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(dpr_members, f, ensure_ascii=False, indent=4)
+        print(f"Successfully saved data to {OUTPUT_FILENAME}")
+        write_snapshot_for(OUTPUT_FILENAME, dpr_members)  # Compact copy for fast partial loads
+    except IOError as e:
+        print(f"Error saving data to {OUTPUT_FILENAME}: {e}")
+
+    write_reports()
+    print("\nFINISH")
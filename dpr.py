@@ -0,0 +1,320 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from export_members import EXPORT_DIR, available_formats, export_tables, table_filenames
+from instrumentation import metrics, start_profiling, write_reports
+from member_parser import DEFAULT_PARSER_BACKEND, parse_members
+from member_snapshot import load_members, write_snapshot_for
+from snapshot_diff import member_key, record_roster_changes
+from socials_journal import SocialsJournal, write_json_atomically
+
+LISTING_FILENAME = 'dpr_members_listing.html'
+MEMBERS_FILENAME = 'dpr_members.json'
+DETAILS_FILENAME = 'dpr_members_details.json'
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+CANDIDATES_FILENAME = 'dpr_members_social_candidates.json'
+VERIFIED_FILENAME = 'dpr_members_socials_verified.json'
+IMAGE_MANIFEST_FILENAME = os.path.join('member_images', 'manifest.json')
+EXPORT_FILENAME = 'dpr_members_export.json'
+PIPELINE_STATE_FILENAME = '.dpr_pipeline_state.json'
+
+PARSER_BACKEND = DEFAULT_PARSER_BACKEND  # 'lxml' when installed; see member_parser.PARSER_BACKENDS
+TABLE_FORMATS = available_formats()  # Members/roles/socials tables: CSV, SQLite and Parquet (with pyarrow)
+
+
+class StageError(Exception):
+    """A stage could not produce its outputs; the pipeline stops and the next run resumes from that stage."""
+
+
+class Stage:
+    """
+    One pipeline step. It reruns only when the content hash of an input (or its params) changed since its last
+    successful run, or when one of its outputs is missing, like a make rule.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, description=''):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.description = description
+
+
+def file_hash(filename):
+    """SHA-256 of a file's content, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def load_json(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def require(filename):
+    if not os.path.exists(filename):
+        raise StageError(f"{filename} is missing; run the stage that produces it first")
+    return filename
+
+
+# --- Stages ---
+
+def run_fetch(options):
+    from dpr_members_scraper_for_dprgoid import BASE_URL, HEADERS, http_cache
+    from hybrid_fetcher import HybridFetcher
+
+    hybrid_fetcher = HybridFetcher(headers=HEADERS, cache=http_cache)
+    try:
+        members_html = hybrid_fetcher.fetch(BASE_URL)
+    finally:
+        hybrid_fetcher.close()
+    print(hybrid_fetcher.summary())
+    if not members_html:
+        raise StageError(f"Failed to fetch {BASE_URL}")
+
+    temp_filename = f"{LISTING_FILENAME}.tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        f.write(members_html)
+    os.replace(temp_filename, LISTING_FILENAME)
+
+
+def run_parse(options):
+    with open(require(LISTING_FILENAME), 'r', encoding='utf-8') as f:
+        dpr_members = parse_members(f.read(), backend=PARSER_BACKEND)
+    if not dpr_members:
+        raise StageError(f"No members found in {LISTING_FILENAME}")
+
+    record_roster_changes(MEMBERS_FILENAME, dpr_members)
+    write_json_atomically(MEMBERS_FILENAME, dpr_members)
+    write_snapshot_for(MEMBERS_FILENAME, dpr_members)
+    print(f"{len(dpr_members)} members saved to {MEMBERS_FILENAME}")
+
+
+def run_details(options):
+    from crawl_member_details import crawl_member_details, reuse_previous_details
+
+    dpr_members = load_json(require(MEMBERS_FILENAME))
+    keys_to_crawl = reuse_previous_details(dpr_members, MEMBERS_FILENAME, DETAILS_FILENAME)
+    crawled_count = crawl_member_details(dpr_members, base_url=options.base_url, only_keys=keys_to_crawl)
+    if not crawled_count and not any(member.get('details') for member in dpr_members):
+        raise StageError("No detail page could be crawled")
+    write_json_atomically(DETAILS_FILENAME, dpr_members)
+    write_snapshot_for(DETAILS_FILENAME, dpr_members)
+    print(f"{crawled_count} member details saved to {DETAILS_FILENAME}")
+
+
+def run_socials(options):
+    """Non-interactive half of the socials work: merges the roster and prefetches the refresh plan's searches."""
+    from search_result_store import get_result_store
+    from social_candidates import load_candidate_store, prefetch_candidates, reclassify_candidates, save_candidate_store
+    from social_search import api_credentials_missing
+    from socials_refresh import MISSING_LINK_TTL_SECONDS, describe_plan, prepare_refresh
+
+    if not os.path.exists(SOCIALS_FILENAME):
+        write_json_atomically(SOCIALS_FILENAME, load_json(require(MEMBERS_FILENAME)))
+
+    member_data = load_json(SOCIALS_FILENAME)
+    socials_journal = SocialsJournal(SOCIALS_FILENAME)
+    socials_journal.replay(member_data)
+    candidate_store = load_candidate_store(CANDIDATES_FILENAME)
+
+    refresh_plan = prepare_refresh(member_data, SOCIALS_FILENAME, candidate_store, roster_filename=MEMBERS_FILENAME)
+    socials_journal.compact(member_data)
+    print(describe_plan(refresh_plan, member_data))
+
+    if api_credentials_missing():
+        print("Skipping the search prefetch; the review will search as it goes.")
+    else:
+        prefetch_candidates(member_data, candidate_store, plan=refresh_plan, max_age_seconds=MISSING_LINK_TTL_SECONDS)
+        get_result_store().wait_for_pages()
+        reclassify_candidates(candidate_store)
+    save_candidate_store(candidate_store, CANDIDATES_FILENAME)
+    get_result_store().close()
+    print("Review the candidates with: python scrape_socials.py --refresh")
+
+
+def run_images(options):
+    from mirror_member_images import (MIRROR_DIR, load_manifest, make_thumbnails, mirror_member_images,
+                                      photo_keys_to_refresh, save_manifest)
+
+    dpr_members = load_json(require(MEMBERS_FILENAME))
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    image_manifest = load_manifest(IMAGE_MANIFEST_FILENAME)
+    mirror_counts = mirror_member_images(dpr_members, image_manifest, base_url=options.base_url,
+                                         only_keys=photo_keys_to_refresh(MEMBERS_FILENAME, IMAGE_MANIFEST_FILENAME))
+    make_thumbnails(image_manifest)
+    save_manifest(image_manifest, IMAGE_MANIFEST_FILENAME)
+    if mirror_counts['failed'] and not (mirror_counts['fetched'] or mirror_counts['not_modified']):
+        raise StageError("No member photo could be downloaded")
+
+
+def run_verify(options):
+    """Rechecks links older than verify_socials.VERIFY_TTL_SECONDS; use --force to recheck on an unchanged file."""
+    from verify_socials import load_verified, verify_socials
+
+    member_data = load_members(require(SOCIALS_FILENAME), fields=('socials',))  # Only the links are checked
+    verified = load_verified(VERIFIED_FILENAME)
+    verify_counts = verify_socials(member_data, verified, base_url=options.base_url)
+    write_json_atomically(VERIFIED_FILENAME, verified)
+    print(f"{verify_counts.pop('checked')} links checked; stored links: "
+          + ', '.join(f"{count} {status}" for status, count in sorted(verify_counts.items())))
+
+
+def run_export(options):
+    """
+    Merges listing, socials and detail data into one file keyed like the roster diff (profile_url), and writes
+    the members, roles and socials tables (with link statuses from the verify stage) for analysis.
+    """
+    dpr_members = load_json(require(SOCIALS_FILENAME))
+    details_by_key = {}
+    if os.path.exists(DETAILS_FILENAME):
+        detail_members = load_members(DETAILS_FILENAME, fields=('profile_url', 'name', 'id', 'details'))
+        details_by_key = {member_key(member): member.get('details') for member in detail_members}
+    for member in dpr_members:
+        details = details_by_key.get(member_key(member))
+        if details:
+            member['details'] = details
+    write_json_atomically(EXPORT_FILENAME, dpr_members)
+    print(f"{len(dpr_members)} members exported to {EXPORT_FILENAME}")
+
+    verified = load_json(VERIFIED_FILENAME) if os.path.exists(VERIFIED_FILENAME) else None
+    row_counts = export_tables(dpr_members, TABLE_FORMATS, EXPORT_DIR, verified)
+    print(', '.join(f"{count} {table}" for table, count in row_counts.items())
+          + f" rows written to {EXPORT_DIR}/ ({', '.join(TABLE_FORMATS)})")
+
+
+STAGES = [
+    Stage('fetch', run_fetch, outputs=[LISTING_FILENAME],
+          description="download the member listing (through the HTTP cache)"),
+    Stage('parse', run_parse, inputs=[LISTING_FILENAME], outputs=[MEMBERS_FILENAME],
+          params={'backend': PARSER_BACKEND}, description="parse the listing into dpr_members.json"),
+    Stage('details', run_details, inputs=[MEMBERS_FILENAME], outputs=[DETAILS_FILENAME],
+          description="crawl every member's detail page"),
+    Stage('socials', run_socials, inputs=[MEMBERS_FILENAME], outputs=[SOCIALS_FILENAME, CANDIDATES_FILENAME],
+          description="merge the roster into the socials file and prefetch searches"),
+    Stage('images', run_images, inputs=[MEMBERS_FILENAME], outputs=[IMAGE_MANIFEST_FILENAME],
+          description="mirror member photos and thumbnails"),
+    Stage('verify', run_verify, inputs=[SOCIALS_FILENAME], outputs=[VERIFIED_FILENAME],
+          description="check that the stored socials links still resolve"),
+    Stage('export', run_export, inputs=[SOCIALS_FILENAME, DETAILS_FILENAME, VERIFIED_FILENAME],
+          outputs=[EXPORT_FILENAME] + table_filenames(TABLE_FORMATS, EXPORT_DIR), params={'formats': TABLE_FORMATS},
+          description="merge everything into one export and the CSV/SQLite/Parquet tables"),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+# --- Incremental execution ---
+
+def load_state(filename=PIPELINE_STATE_FILENAME):
+    try:
+        return load_json(filename)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Warning: Ignoring unreadable pipeline state {filename}: {e}")
+        return {}
+
+
+def stage_fingerprint(stage):
+    """What a stage's last run depended on: the content hash of each input plus its params."""
+    return {'inputs': {filename: file_hash(filename) for filename in stage.inputs}, 'params': stage.params}
+
+
+def stale_reason(stage, state):
+    """Returns why the stage has to run, or None when it can be skipped."""
+    if not stage.inputs:
+        return "no inputs to compare (always runs)"
+    previous = state.get(stage.name)
+    if previous is None:
+        return "never ran"
+    missing = [filename for filename in stage.outputs if not os.path.exists(filename)]
+    if missing:
+        return f"missing output {', '.join(missing)}"
+    fingerprint = stage_fingerprint(stage)
+    if fingerprint['params'] != previous.get('params'):
+        return "params changed"
+    changed = [filename for filename, digest in fingerprint['inputs'].items()
+               if previous.get('inputs', {}).get(filename) != digest]
+    if changed:
+        return f"input changed: {', '.join(changed)}"
+    return None
+
+
+def run_pipeline(stage_names, options, state_filename=PIPELINE_STATE_FILENAME):
+    """
+    Runs the given stages in pipeline order, skipping up-to-date ones. State is saved after every stage,
+    so after a failure the next run resumes at the failed stage. Returns True if every stage succeeded.
+    """
+    state = load_state(state_filename)
+    for stage in STAGES:
+        if stage.name not in stage_names:
+            continue
+        reason = "forced" if options.force else stale_reason(stage, state)
+        if reason is None:
+            print(f"[{stage.name}] up to date, skipped")
+            continue
+
+        print(f"[{stage.name}] running: {reason}")
+        fingerprint = stage_fingerprint(stage)
+        start = time.perf_counter()
+        try:
+            with metrics.timer(f"pipeline.{stage.name}"):
+                stage.run(options)
+        except StageError as e:
+            print(f"[{stage.name}] FAILED: {e}")
+            print("Fix the problem and rerun; completed stages will be skipped.")
+            return False
+
+        state[stage.name] = dict(fingerprint, outputs={filename: file_hash(filename) for filename in stage.outputs},
+                                 finished_at=time.time())
+        write_json_atomically(state_filename, state)
+        print(f"[{stage.name}] done in {time.perf_counter() - start:.1f} s")
+    return True
+
+
+def print_status(state_filename=PIPELINE_STATE_FILENAME):
+    state = load_state(state_filename)
+    for stage in STAGES:
+        reason = stale_reason(stage, state)
+        status = "up to date" if reason is None else f"would run ({reason})"
+        print(f"  {stage.name:<8} {status:<60} {stage.description}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='dpr', description="DPR member pipeline: " + " -> ".join(STAGES_BY_NAME))
+    subcommands = parser.add_subparsers(dest='command')
+    run_parser = subcommands.add_parser('run', help="run stages whose inputs changed (all stages by default)")
+    run_parser.add_argument('stages', nargs='*', metavar='stage', help=f"any of: {', '.join(STAGES_BY_NAME)}")
+    run_parser.add_argument('--force', action='store_true', help="run even if the inputs did not change")
+    run_parser.add_argument('--offline', action='store_true', help="skip the fetch stage")
+    run_parser.add_argument('--base-url', help="re-root detail, photo and socials URLs (e.g. a local stub server)")
+    run_parser.add_argument('--profile', metavar='FILE', help="dump a cProfile of the run to FILE")
+    subcommands.add_parser('status', help="show which stages would run")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        print_status()
+    elif args.command == 'run':
+        unknown = [name for name in args.stages if name not in STAGES_BY_NAME]
+        if unknown:
+            parser.error(f"unknown stage {', '.join(unknown)}; choose from {', '.join(STAGES_BY_NAME)}")
+        selected = set(args.stages or STAGES_BY_NAME)
+        if args.offline:
+            selected.discard('fetch')
+        start_profiling(args.profile)
+        succeeded = run_pipeline(selected, args)
+        write_reports()
+        sys.exit(0 if succeeded else 1)
+    else:
+        parser.print_help()
@@ -0,0 +1,309 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+from instrumentation import metrics
+from member_names import name_key
+from member_parser import iter_members
+from member_store import province_of
+from snapshot_diff import member_key
+from socials_refresh import CHECKED_AT_FIELD
+
+# pyarrow is optional: without it only the CSV and SQLite tables are written
+try:
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+    pyarrow_parquet = None
+
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+EXPORT_DIR = 'dpr_members_tables'
+SQLITE_FILENAME = 'dpr_members.sqlite3'  # Inside the export directory, next to the CSV and Parquet files
+FORMATS = ('csv', 'sqlite', 'parquet')
+CHUNK_MEMBERS = 5000  # Members buffered per write; one Parquet row group and one SQLite executemany each
+JSON_READ_SIZE = 64 * 1024
+
+# Normalized tables: (column, SQLite type). One row per member, per role held and per platform reviewed.
+# A socials row with a NULL url means the platform was searched and nothing was found.
+# Rows are keyed by member_key (the profile URL, see snapshot_diff): the listing id is a row number that repeats
+# across concatenated or historical sources, so it is kept as a plain column.
+TABLES = {
+    'members': [('member_key', 'TEXT'), ('id', 'TEXT'), ('name', 'TEXT'), ('name_key', 'TEXT'), ('faction', 'TEXT'),
+                ('district', 'TEXT'), ('province', 'TEXT'), ('email', 'TEXT'), ('profile_url', 'TEXT'),
+                ('image_url', 'TEXT')],
+    'roles': [('member_key', 'TEXT'), ('position', 'INTEGER'), ('role', 'TEXT')],
+    'socials': [('member_key', 'TEXT'), ('platform', 'TEXT'), ('url', 'TEXT'), ('checked_at', 'TEXT'),
+                ('status', 'TEXT')],
+}
+PRIMARY_KEYS = {'members': 'member_key', 'roles': 'member_key, position', 'socials': 'member_key, platform'}
+# Created after the bulk load, which is faster than maintaining them row by row
+SQLITE_INDEXES = [
+    'CREATE INDEX members_faction ON members (faction)',
+    'CREATE INDEX members_district ON members (district)',
+    'CREATE INDEX members_province ON members (province)',
+    'CREATE INDEX members_name_key ON members (name_key)',
+    'CREATE INDEX roles_role ON roles (role, member_key)',
+    'CREATE INDEX socials_platform ON socials (platform, url)',
+]
+
+
+def available_formats(formats=FORMATS):
+    """The requested formats that can be written here (Parquet needs pyarrow)."""
+    return [export_format for export_format in formats if export_format != 'parquet' or pyarrow is not None]
+
+
+def table_filenames(formats=FORMATS, directory=EXPORT_DIR):
+    """Every file export_tables() writes for these formats."""
+    filenames = []
+    for export_format in available_formats(formats):
+        if export_format == 'sqlite':
+            filenames.append(os.path.join(directory, SQLITE_FILENAME))
+        else:
+            filenames.extend(os.path.join(directory, f"{table}.{export_format}") for table in TABLES)
+    return filenames
+
+
+# --- Sources ---
+
+def iter_json_array(f, read_size=JSON_READ_SIZE):
+    """
+    Yields the objects of a top-level JSON array one by one while reading the file in blocks,
+    so a large dpr_members_socials.json is never held (or parsed) as a whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    for block in iter(lambda: f.read(read_size), ''):
+        buffer = buffer[position:] + block
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Expected a JSON array of members")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                member, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # The object continues in the next block
+            yield member
+    raise ValueError("Truncated JSON array" if started else "Expected a JSON array of members")
+
+
+def iter_source(filename):
+    """Members from a saved listing page (.html, parsed as it streams) or a members JSON file."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        if filename.lower().endswith(('.html', '.htm')):
+            yield from iter_members(f)
+        else:
+            yield from iter_json_array(f)
+
+
+# --- Rows ---
+
+def member_rows(member, verified=None):
+    """Splits one member dict into its rows: (members row, [roles rows], [socials rows])."""
+    key = member_key(member)
+    district = member.get('district')
+    members_row = (key, member.get('id'), member.get('name'), name_key(member.get('name') or ''), member.get('faction'),
+                   district, province_of(district), member.get('email'), member.get('profile_url'),
+                   member.get('image_url'))
+    roles_rows = [(key, position, role) for position, role in enumerate(member.get('roles') or [])]
+    checked_at = member.get(CHECKED_AT_FIELD) or {}
+    socials_rows = [(key, platform, link, checked_at.get(platform),
+                     (verified or {}).get(link, {}).get('status') if link else None)
+                    for platform, link in (member.get('socials') or {}).items()]
+    return members_row, roles_rows, socials_rows
+
+
+# --- Writers ---
+
+class CsvTableWriter:
+    """One CSV file per table with a header row; RFC 4180 quoting, empty field for NULL."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = {}
+        for table, columns in TABLES.items():
+            temp_filename = os.path.join(directory, f"{table}.csv.tmp")
+            f = open(temp_filename, 'w', encoding='utf-8', newline='')
+            writer = csv.writer(f)
+            writer.writerow([column for column, _ in columns])
+            self._files[table] = (f, writer, temp_filename)
+
+    def write(self, table, rows):
+        self._files[table][1].writerows(rows)
+
+    def close(self):
+        for table, (f, _, temp_filename) in self._files.items():
+            f.close()
+            os.replace(temp_filename, os.path.join(self.directory, f"{table}.csv"))
+
+    def abort(self):
+        for f, _, temp_filename in self._files.values():
+            f.close()
+            os.remove(temp_filename)
+
+
+class SqliteTableWriter:
+    """
+    One SQLite database with a table per TABLES entry. Loaded without a journal into a temp file that
+    replaces the previous database at the end, then indexed and analyzed for the query planner.
+    """
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, SQLITE_FILENAME)
+        self.temp_filename = f"{self.filename}.tmp"
+        if os.path.exists(self.temp_filename):
+            os.remove(self.temp_filename)
+        self._db = sqlite3.connect(self.temp_filename)
+        self._db.execute('PRAGMA journal_mode = OFF')
+        self._db.execute('PRAGMA synchronous = OFF')
+        for table, columns in TABLES.items():
+            self._db.execute(f"CREATE TABLE {table} ({', '.join(f'{column} {kind}' for column, kind in columns)},"
+                             f" PRIMARY KEY ({PRIMARY_KEYS[table]}))")
+
+    def write(self, table, rows):
+        placeholders = ', '.join('?' * len(TABLES[table]))
+        self._db.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+    def close(self):
+        for statement in SQLITE_INDEXES:
+            self._db.execute(statement)
+        self._db.execute('ANALYZE')
+        self._db.commit()
+        self._db.close()
+        os.replace(self.temp_filename, self.filename)
+
+    def abort(self):
+        self._db.close()
+        os.remove(self.temp_filename)
+
+
+class ParquetTableWriter:
+    """One Parquet file per table; every chunk becomes a row group, so memory stays bounded by CHUNK_MEMBERS."""
+
+    TYPES = {'TEXT': 'string', 'INTEGER': 'int32'}
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._schemas = {}
+        self._writers = {}
+        for table, columns in TABLES.items():
+            schema = pyarrow.schema([(column, self.TYPES[kind]) for column, kind in columns])
+            temp_filename = os.path.join(directory, f"{table}.parquet.tmp")
+            self._schemas[table] = schema
+            self._writers[table] = (pyarrow_parquet.ParquetWriter(temp_filename, schema), temp_filename)
+
+    def write(self, table, rows):
+        data = {column: [row[i] for row in rows] for i, (column, _) in enumerate(TABLES[table])}
+        self._writers[table][0].write_table(pyarrow.Table.from_pydict(data, schema=self._schemas[table]))
+
+    def close(self):
+        for table, (writer, temp_filename) in self._writers.items():
+            writer.close()
+            os.replace(temp_filename, os.path.join(self.directory, f"{table}.parquet"))
+
+    def abort(self):
+        for writer, temp_filename in self._writers.values():
+            writer.close()
+            os.remove(temp_filename)
+
+
+TABLE_WRITERS = {'csv': CsvTableWriter, 'sqlite': SqliteTableWriter, 'parquet': ParquetTableWriter}
+
+
+@metrics.timed('export')
+def export_tables(members, formats=FORMATS, directory=EXPORT_DIR, verified=None, chunk_members=CHUNK_MEMBERS):
+    """
+    Streams members (any iterable, e.g. iter_source()) into the members, roles and socials tables of every
+    available format, CHUNK_MEMBERS at a time. verified ({link: result} of verify_socials) fills the
+    socials status column. A member whose key was already written (e.g. the same member in two concatenated
+    sources) is skipped, so the first occurrence is kept. Files replace the previous export only once complete.
+    Returns {table: rows written}.
+    """
+    formats = available_formats(formats)
+    os.makedirs(directory, exist_ok=True)
+    writers = [TABLE_WRITERS[export_format](directory) for export_format in formats]
+    counts = dict.fromkeys(TABLES, 0)
+    chunk = {table: [] for table in TABLES}
+    keys_seen = set()
+    repeated = 0
+
+    def flush():
+        for table, rows in chunk.items():
+            if rows:
+                for writer in writers:
+                    writer.write(table, rows)
+                counts[table] += len(rows)
+                chunk[table] = []
+
+    try:
+        for member in members:
+            members_row, roles_rows, socials_rows = member_rows(member, verified)
+            if members_row[0] in keys_seen:
+                repeated += 1
+                continue
+            keys_seen.add(members_row[0])
+            chunk['members'].append(members_row)
+            chunk['roles'].extend(roles_rows)
+            chunk['socials'].extend(socials_rows)
+            if len(chunk['members']) >= chunk_members:
+                flush()
+        flush()
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    for writer in writers:
+        writer.close()
+    if repeated:
+        print(f"Skipped {repeated} repeated members (first occurrence kept)")
+    metrics.add_current(items=counts['members'])
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Export members into members/roles/socials tables as CSV, SQLite and Parquet.")
+    parser.add_argument('source', nargs='?', default=SOCIALS_FILENAME,
+                        help="members JSON file or a saved listing page (.html)")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--output', default=EXPORT_DIR, help="directory for the table files")
+    parser.add_argument('--verified', metavar='FILE', help="dpr_members_socials_verified.json for link statuses")
+    args = parser.parse_args()
+
+    if 'parquet' in args.formats and pyarrow is None:
+        print("pyarrow is not installed; skipping Parquet (pip install pyarrow)")
+    verified_links = None
+    if args.verified:
+        try:
+            with open(args.verified, 'r', encoding='utf-8') as verified_file:
+                verified_links = json.load(verified_file)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"Error loading {args.verified}: {e}")
+            exit()
+
+    start = time.perf_counter()
+    try:
+        row_counts = export_tables(iter_source(args.source), args.formats, args.output, verified_links)
+    except (IOError, ValueError, sqlite3.Error) as e:
+        print(f"Error exporting {args.source}: {e}")
+        exit()
+    print(', '.join(f"{count} {table}" for table, count in row_counts.items())
+          + f" rows written in {time.perf_counter() - start:.2f} s:")
+    for table_filename in table_filenames(args.formats, args.output):
+        print(f"  {table_filename} ({os.path.getsize(table_filename) / 1024:.0f} KiB)")
+    print("\nFINISH")
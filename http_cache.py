@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+from instrumentation import metrics, record_response
+
+DEFAULT_CACHE_DIR = '.http_cache'
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    On-disk cache for fetched pages and API responses, shared by every fetcher.
+
+    Bodies are stored content-addressed under blobs/<sha256>, so identical responses are kept once.
+    A small SQLite index maps each request key (URL + params) to its blob, validators
+    (ETag / Last-Modified) and timestamps. Entries younger than their TTL are served without any
+    network access; older ones are revalidated with a conditional GET when validators exist.
+    Once the blobs exceed max_bytes the least recently used entries are evicted.
+
+    The TTL, size limit and eviction belong to the directory, so caches with different TTLs (listing pages,
+    search API responses) each get their own cache_dir. One instance is safe to share between threads.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'rejected': 0, 'bytes_saved': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        os.makedirs(os.path.join(cache_dir, 'blobs'), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY, url TEXT, blob TEXT, size INTEGER,'
+            ' etag TEXT, last_modified TEXT, stored_at REAL, last_access REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._db.commit()
+
+    # --- Keys and entries ---
+
+    @staticmethod
+    def make_key(url, params=None, ignore_params=()):
+        """Hashes the URL and its sorted params. Params in ignore_params (e.g. API keys) do not split the cache."""
+        kept_params = sorted((k, str(v)) for k, v in (params or {}).items() if k not in ignore_params)
+        request_line = f"{url}?{urlencode(kept_params)}" if kept_params else url
+        return hashlib.sha256(request_line.encode('utf-8')).hexdigest(), request_line
+
+    def _blob_path(self, blob):
+        return os.path.join(self.cache_dir, 'blobs', blob)
+
+    def _read_entry(self, key):
+        with self._lock:
+            row = self._db.execute(
+                'SELECT blob, etag, last_modified, stored_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, etag, last_modified, stored_at = row
+        try:
+            with open(self._blob_path(blob), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return {'body': body, 'etag': etag, 'last_modified': last_modified, 'stored_at': stored_at}
+
+    def _touch(self, key, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute('UPDATE entries SET stored_at = ?, last_access = ? WHERE key = ?', (now, now, key))
+            else:
+                self._db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+            self._db.commit()
+
+    def _store(self, key, url, body, etag=None, last_modified=None):
+        blob = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(blob)
+        if not os.path.exists(blob_path):
+            temp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, blob_path)
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, blob, len(body), etag, last_modified, now, now)
+            )
+            self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            # Blobs are shared between keys, so sizes are counted once per blob
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT blob, size FROM entries)'
+                                     ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute('SELECT key, blob, size FROM entries ORDER BY last_access').fetchall()
+            evicted_blobs = set()
+            for key, blob, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._count('evictions')
+                still_used = self._db.execute('SELECT 1 FROM entries WHERE blob = ? LIMIT 1', (blob,)).fetchone()
+                if not still_used:
+                    evicted_blobs.add(blob)
+                    total -= size
+            self._db.commit()
+        for blob in evicted_blobs:
+            try:
+                os.remove(self._blob_path(blob))
+            except FileNotFoundError:
+                pass
+
+    def _is_fresh(self, entry, ttl_seconds):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        return time.time() - entry['stored_at'] < ttl
+
+    def _count(self, stat, amount=1):
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    def _record_hit(self, entry, stat='hits'):
+        self._count(stat)
+        self._count('bytes_saved', len(entry['body']))
+        metrics.add_current(cache_hits=1)
+
+    # --- Fetching through the cache ---
+
+    def get_text(self, session, url, params=None, headers=None, timeout=15, ttl_seconds=None, ignore_params=(),
+                 validate=None):
+        """
+        GETs url with `session` (a requests.Session or the requests module) unless a fresh copy is cached.
+        Stale entries with an ETag or Last-Modified are revalidated; a 304 reuses the stored body.
+        A body for which validate(text) is false (e.g. a WAF challenge served with 200) is returned but not cached.
+        Raises requests exceptions like a plain GET would, so callers keep their error handling.
+        """
+        key, request_line = self.make_key(url, params, ignore_params)
+        entry = self._read_entry(key)
+
+        if entry and self._is_fresh(entry, ttl_seconds):
+            self._record_hit(entry)
+            self._touch(key)
+            return entry['body'].decode('utf-8')
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        # A per-request hook replaces a session's own, so the response is counted once either way
+        response = session.get(url, params=params, headers=request_headers, timeout=timeout,
+                               hooks={'response': record_response})
+        if entry and response.status_code == 304:
+            self._record_hit(entry, 'revalidated')
+            self._touch(key, refreshed=True)
+            return entry['body'].decode('utf-8')
+
+        response.raise_for_status()
+        self._count('misses')
+        text = response.text
+        if validate is None or validate(text):
+            self._store(key, request_line, text.encode('utf-8'),
+                        response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        else:
+            self._count('rejected')
+        return text
+
+    def get_json(self, session, url, params=None, headers=None, timeout=15, ttl_seconds=None, ignore_params=()):
+        """Like get_text, for JSON APIs."""
+        return json.loads(self.get_text(session, url, params, headers, timeout, ttl_seconds, ignore_params))
+
+    def get_or_fetch(self, url, fetch, ttl_seconds=None, validate=None):
+        """
+        For fetchers without HTTP validators (e.g. a browser): returns the cached body of url while fresh,
+        otherwise calls fetch() and caches its result unless it is None or validate(text) is false.
+        """
+        key, request_line = self.make_key(url)
+        entry = self._read_entry(key)
+        if entry and self._is_fresh(entry, ttl_seconds):
+            self._record_hit(entry)
+            self._touch(key)
+            return entry['body'].decode('utf-8')
+
+        self._count('misses')
+        text = fetch()
+        if text is None:
+            return None
+        if validate is None or validate(text):
+            self._store(key, request_line, text.encode('utf-8'))
+        else:
+            self._count('rejected')
+        return text
+
+    def put(self, url, text):
+        """Stores text as the current body of url (e.g. HTML obtained by another fetcher)."""
+        key, request_line = self.make_key(url)
+        self._store(key, request_line, text.encode('utf-8'))
+
+    def invalidate(self, url, params=None, ignore_params=()):
+        """Drops the entry for url (e.g. a WAF challenge page that must not be served again)."""
+        key, _ = self.make_key(url, params, ignore_params)
+        with self._lock:
+            row = self._db.execute('SELECT blob FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._db.commit()
+            still_used = self._db.execute('SELECT 1 FROM entries WHERE blob = ? LIMIT 1', (row[0],)).fetchone()
+        if not still_used:
+            try:
+                os.remove(self._blob_path(row[0]))
+            except FileNotFoundError:
+                pass
+
+    def summary(self):
+        requests_seen = self.stats['hits'] + self.stats['revalidated'] + self.stats['misses']
+        return (f"HTTP cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated (304), "
+                f"{self.stats['misses']} misses out of {requests_seen} requests "
+                f"({self.stats['rejected']} not cached as invalid), "
+                f"{self.stats['bytes_saved'] / 1024:.0f} KiB not downloaded, {self.stats['evictions']} evictions")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
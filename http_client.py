@@ -0,0 +1,306 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import metrics, record_response
+
+DEFAULT_HEADERS = {'User-Agent': 'Lynx'}
+DEFAULT_POOL_SIZE = 10
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})  # Throttling and transient server errors
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5  # First retry waits up to this long, doubling per attempt (full jitter)
+BACKOFF_MAX_SECONDS = 60
+MAX_WAIT_SECONDS = 300  # Total time one request may spend waiting on backoff, Retry-After or an open circuit
+FAILURE_THRESHOLD = 5  # Consecutive failed attempts against a host that open its circuit
+CIRCUIT_OPEN_SECONDS = 30
+HALF_OPEN_POLL_SECONDS = 1  # How often requests queued behind a half-open circuit's trial request look again
+SPEEDUP_AFTER = 5  # Consecutive successes before an adaptive host interval is shortened
+SPEEDUP_FACTOR = 0.8
+SLOWDOWN_FACTOR = 2.0
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def create_session(headers=None, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Creates a requests.Session that keeps connections alive and can serve `pool_size`
+    concurrent requests per host without opening new TCP/TLS connections. Responses are counted in
+    instrumentation.metrics.
+    """
+    session = requests.Session()
+    session.headers.update(headers or DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.hooks['response'].append(record_response)  # Request and byte counts per stage
+    return session
+
+
+class HostRateLimiter:
+    """Thread-safe limiter allowing at most one request per `min_interval` seconds to each host."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def interval_for(self, host):
+        return self.min_interval
+
+    def wait(self, url):
+        host = host_of(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval_for(host)
+        # Sleep outside the lock so other hosts are not held up
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record_success(self, url):
+        """Called by RequestExecutor after a healthy response; the fixed-interval limiter ignores it."""
+
+    def record_throttle(self, url, retry_after=None):
+        """Called by RequestExecutor after a 429/5xx or connection error; holds the host for Retry-After."""
+        if retry_after:
+            host = host_of(url)
+            with self._lock:
+                self._next_slot[host] = max(self._next_slot.get(host, 0), time.monotonic() + retry_after)
+
+
+class AdaptiveRateLimiter(HostRateLimiter):
+    """
+    Per-host interval that starts at `interval`, shrinks by SPEEDUP_FACTOR after every SPEEDUP_AFTER consecutive
+    healthy responses (down to `min_interval`) and doubles on each 429/5xx (up to `max_interval`),
+    so long crawls run as fast as the server tolerates.
+    """
+
+    def __init__(self, interval, min_interval=None, max_interval=BACKOFF_MAX_SECONDS):
+        super().__init__(interval)
+        self.start_interval = interval
+        self.floor_interval = interval / 2 if min_interval is None else min_interval
+        self.max_interval = max_interval
+        self._intervals = {}
+        self._successes = {}
+
+    def interval_for(self, host):
+        return self._intervals.get(host, self.start_interval)
+
+    def record_success(self, url):
+        host = host_of(url)
+        with self._lock:
+            self._successes[host] = self._successes.get(host, 0) + 1
+            if self._successes[host] >= SPEEDUP_AFTER:
+                self._successes[host] = 0
+                self._intervals[host] = max(self.floor_interval, self.interval_for(host) * SPEEDUP_FACTOR)
+
+    def record_throttle(self, url, retry_after=None):
+        host = host_of(url)
+        with self._lock:
+            self._successes[host] = 0
+            # At least a small step up, so an interval of 0 can still back off
+            slower = max(self.interval_for(host) * SLOWDOWN_FACTOR, self.floor_interval, 0.05)
+            self._intervals[host] = min(self.max_interval, slower)
+        super().record_throttle(url, retry_after)
+
+    def summary(self):
+        with self._lock:
+            intervals = ', '.join(f"{host} {interval:.2f} s" for host, interval in sorted(self._intervals.items()))
+        return f"Adaptive request intervals: {intervals or 'unchanged'}"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills `rate` tokens per second up to `capacity`.
+    acquire() blocks until a token is available, so bursts are allowed but the long-run rate is capped.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit stays open longer than the request may wait."""
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. FAILURE_THRESHOLD consecutive failed attempts open a host's circuit for
+    `open_seconds`; afterwards a single trial request is let through (half-open) and closes it again on success.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, open_seconds=CIRCUIT_OPEN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._hosts = {}  # host -> {'failures', 'open_until', 'trial'}
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0}
+
+    def blocked_for(self, host):
+        """Seconds a request to host has to wait; 0 means it may go now (possibly as the half-open trial)."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state['open_until'] is None:
+                return 0
+            remaining = state['open_until'] - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if state['trial']:
+                return HALF_OPEN_POLL_SECONDS
+            state['trial'] = True
+            return 0
+
+    def record_success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'open_until': None, 'trial': False})
+            state['failures'] += 1
+            if state['trial'] or (state['open_until'] is None and state['failures'] >= self.failure_threshold):
+                self._open(host, self.open_seconds, f"after {state['failures']} failed attempts")
+
+    def trip(self, host, seconds):
+        """Opens host's circuit for `seconds`, e.g. a Retry-After longer than anyone should wait."""
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'open_until': None, 'trial': False})
+            self._open(host, seconds, "(Retry-After)")
+
+    def _open(self, host, seconds, reason):
+        state = self._hosts[host]
+        state['open_until'] = time.monotonic() + seconds
+        state['trial'] = False
+        self.stats['opened'] += 1
+        print(f"Circuit for {host} opened for {seconds:.0f} s {reason}.")
+
+
+def retry_after_seconds(response):
+    """The Retry-After of a response in seconds (delta-seconds or HTTP-date), or None."""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RequestExecutor:
+    """
+    Drop-in for session.get() (so it also works as the `session` of ResponseCache.get_text) that paces requests
+    through `rate_limiter`, retries connection errors, timeouts and RETRY_STATUSES with jittered exponential
+    backoff honouring Retry-After, and stops hammering hosts that keep failing via a per-host circuit breaker.
+    Like session.get() it returns the last response (callers still call raise_for_status()) and raises the
+    last exception when no response came back. Thread-safe; retries are counted in instrumentation.metrics.
+    """
+
+    def __init__(self, session=None, rate_limiter=None, breaker=None, max_retries=MAX_RETRIES,
+                 max_wait_seconds=MAX_WAIT_SECONDS):
+        self.session = session or create_session()
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.max_wait_seconds = max_wait_seconds
+        self.stats = {'requests': 0, 'retries': 0, 'gave_up': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        host = host_of(url)
+        deadline = time.monotonic() + self.max_wait_seconds
+        attempt = 0
+        while True:
+            blocked_seconds = self.breaker.blocked_for(host)
+            if blocked_seconds:
+                if time.monotonic() + blocked_seconds > deadline:
+                    self._count('gave_up')
+                    raise CircuitOpenError(f"Circuit for {host} is open for another {blocked_seconds:.0f} s")
+                time.sleep(blocked_seconds)
+                continue
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(url)
+            self._count('requests')
+            response, error = None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except Exception:
+                # Not retried (InvalidURL, ChunkedEncodingError, ...), but a half-open trial must not stay claimed
+                self.breaker.record_failure(host)
+                raise
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success(host)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_success(url)
+                return response
+
+            retry_after = retry_after_seconds(response)
+            self.breaker.record_failure(host)
+            if self.rate_limiter is not None:
+                self.rate_limiter.record_throttle(url, retry_after)
+
+            delay = max(backoff_delay(attempt), retry_after or 0)
+            if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+                if retry_after and retry_after > self.max_wait_seconds:
+                    self.breaker.trip(host, retry_after)
+                self._count('gave_up')
+                if response is not None:
+                    return response
+                raise error
+
+            attempt += 1
+            self._count('retries')
+            metrics.add_current(retries=1)
+            reason = response.status_code if response is not None else type(error).__name__
+            print(f"Retrying {url} in {delay:.1f} s ({reason}, retry {attempt}/{self.max_retries})")
+            time.sleep(delay)
+
+    def summary(self):
+        return (f"Requests: {self.stats['requests']} sent, {self.stats['retries']} retried, "
+                f"{self.stats['gave_up']} given up, {self.breaker.stats['opened']} circuit openings")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,114 @@
+import re
+
+import requests
+
+from http_client import RequestExecutor, create_session
+from instrumentation import metrics
+
+# Selenium is only needed when a page has to be escalated to a real browser
+try:
+    from selenium_driver_pool import USER_AGENT as BROWSER_USER_AGENT
+    from selenium_driver_pool import DriverPool, wait_for_page
+except ImportError:
+    BROWSER_USER_AGENT = None
+    DriverPool = None
+    wait_for_page = None
+
+REQUEST_TIMEOUT_SECONDS = 15
+BROWSER_WAIT_SECONDS = 15
+
+# A listing page is usable when it has at least one row inside a <tbody> (what parse_members selects)
+MEMBER_ROWS_PATTERN = re.compile(r'<tbody\b[^>]*>.*?<tr\b', re.IGNORECASE | re.DOTALL)
+
+
+def has_member_rows(html_content):
+    """Cheap check (no DOM) that a page contains the member table rather than a WAF challenge or an empty shell."""
+    return bool(html_content) and MEMBER_ROWS_PATTERN.search(html_content) is not None
+
+
+class HybridFetcher:
+    """
+    Fetches pages over a plain keep-alive requests session and only escalates to a headless browser
+    when the response fails `is_usable` (challenge page, empty body, HTTP error).
+    Cookies the browser obtains (e.g. a passed WAF challenge) are copied into the session together with the
+    browser's User-Agent, so the following requests go back to the cheap path.
+    """
+
+    def __init__(self, headers=None, cache=None, is_usable=has_member_rows, browser_pool_size=1):
+        self.session = create_session(headers)
+        self.executor = RequestExecutor(self.session)  # Retries transient failures before escalating
+        self.cache = cache
+        self.is_usable = is_usable
+        self.browser_pool_size = browser_pool_size
+        self._driver_pool = None
+        self.stats = {'plain': 0, 'escalated': 0, 'failed': 0}
+
+    @metrics.timed('fetch')
+    def _fetch_plain(self, url):
+        try:
+            if self.cache:
+                return self.cache.get_text(self.executor, url, timeout=REQUEST_TIMEOUT_SECONDS, validate=self.is_usable)
+            response = self.executor.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            return response.text
+        except requests.exceptions.RequestException as e:
+            print(f"Plain HTTP fetch of {url} failed: {e}")
+            return None
+
+    @metrics.timed('fetch_browser')
+    def _fetch_with_browser(self, url):
+        if DriverPool is None:
+            print("Selenium is not installed, cannot escalate to a browser.")
+            return None
+        if self._driver_pool is None:
+            self._driver_pool = DriverPool(size=self.browser_pool_size)
+
+        # Errors are caught outside the with block, so the pool sees a WebDriverException and discards the browser
+        try:
+            with self._driver_pool.driver() as driver:
+                if not driver:
+                    return None
+                print(f"Escalating {url} to Selenium...")
+                driver.get(url)
+                wait_for_page(driver, timeout=BROWSER_WAIT_SECONDS)
+                html_content = driver.page_source
+                self._adopt_browser_cookies(driver)
+                return html_content
+        except Exception as e:
+            print(f"Selenium error fetching {url}: {e}")
+            return None
+
+    def _adopt_browser_cookies(self, driver):
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        # Clearance cookies are usually bound to the User-Agent that earned them
+        self.session.headers['User-Agent'] = BROWSER_USER_AGENT
+
+    def fetch(self, url):
+        """Returns usable HTML for url, or None if neither plain HTTP nor the browser produced any."""
+        html_content = self._fetch_plain(url)
+        if self.is_usable(html_content):
+            self.stats['plain'] += 1
+            return html_content
+
+        if self.cache:
+            self.cache.invalidate(url)  # Never serve a challenge page from the cache
+        html_content = self._fetch_with_browser(url)
+        if self.is_usable(html_content):
+            self.stats['escalated'] += 1
+            if self.cache:
+                self.cache.put(url, html_content)
+            return html_content
+
+        self.stats['failed'] += 1
+        return None
+
+    def summary(self):
+        return (f"Hybrid fetcher: {self.stats['plain']} plain HTTP, {self.stats['escalated']} escalated to browser, "
+                f"{self.stats['failed']} failed. {self.executor.summary()}")
+
+    def close(self):
+        self.session.close()
+        if self._driver_pool is not None:
+            self._driver_pool.close()
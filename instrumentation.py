@@ -0,0 +1,205 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_FILENAME = 'dpr_metrics.json'
+PROMETHEUS_FILENAME = 'dpr_metrics.prom'  # For node_exporter's textfile collector
+PROFILE_ENV = 'DPR_PROFILE'  # DPR_PROFILE=run.pstats python <script> dumps a cProfile of the run there
+METRIC_PREFIX = 'dpr_stage'
+UNATTRIBUTED_STAGE = 'other'
+
+# Counters kept per stage. 'bytes' is bytes received for network stages and bytes written for 'save'.
+COUNTERS = ('calls', 'errors', 'busy_seconds', 'requests', 'bytes', 'retries', 'cache_hits', 'items')
+# Reported next to the counters: first call start to last call end, so concurrent calls are counted once
+WALL_SECONDS = 'wall_seconds'
+METRIC_HELP = {
+    'calls': "Calls of the instrumented function.",
+    'errors': "Calls that raised.",
+    'busy_seconds': "Time spent in calls of the stage, summed over calls (inclusive of nested stages); "
+                    "exceeds wall time when calls run concurrently.",
+    WALL_SECONDS: "Time from the first call of the stage starting to the last one ending.",
+    'requests': "HTTP responses received.",
+    'bytes': "Bytes received over HTTP, or written to disk by the save stage.",
+    'retries': "HTTP requests that were retried.",
+    'cache_hits': "Requests answered from the HTTP cache or the search result store.",
+    'items': "Records produced (members parsed, results returned, ...).",
+}
+
+
+class Metrics:
+    """
+    Thread-safe per-stage counters. `timer(stage)` times a block and makes it the current stage of its thread,
+    so counters recorded deeper down (HTTP responses, cache hits) with `add_current` land on that stage.
+    Worker threads get their own current stage from the instrumented function they run.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._stages = {}
+        self._spans = {}  # stage -> [first call start, last call end], perf_counter() values
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, stage, **counts):
+        with self._lock:
+            counters = self._stages.setdefault(stage, dict.fromkeys(COUNTERS, 0))
+            for counter, value in counts.items():
+                counters[counter] += value
+
+    def add_call(self, stage, start, end, **counts):
+        """Counts one call of `stage` that ran from `start` to `end` (perf_counter() values)."""
+        self.add(stage, calls=1, busy_seconds=end - start, **counts)
+        with self._lock:
+            span = self._spans.setdefault(stage, [start, end])
+            span[0], span[1] = min(span[0], start), max(span[1], end)
+
+    def current_stage(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else UNATTRIBUTED_STAGE
+
+    def add_current(self, **counts):
+        self.add(self.current_stage(), **counts)
+
+    @contextmanager
+    def timer(self, stage):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(stage)
+        start = time.perf_counter()
+        errors = 0
+        try:
+            yield
+        except BaseException:
+            errors = 1
+            raise
+        finally:
+            stack.pop()
+            self.add_call(stage, start, time.perf_counter(), errors=errors)
+
+    def timed(self, stage):
+        """Decorator form of timer()."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def report(self):
+        with self._lock:
+            stages = {stage: dict(counters) for stage, counters in self._stages.items()}
+            for stage, counters in stages.items():
+                start, end = self._spans.get(stage, (0, 0))
+                counters[WALL_SECONDS] = end - start
+        return {'started_at': self.started_at, 'wall_seconds': time.time() - self.started_at, 'stages': stages}
+
+    def summary(self):
+        stages = self.report()['stages']
+        lines = ["Timing by stage:"]
+        for stage, counters in sorted(stages.items(), key=lambda item: -item[1][WALL_SECONDS]):
+            details = ', '.join(f"{counters[counter]} {counter.replace('_', ' ')}"
+                                for counter in ('requests', 'cache_hits', 'retries', 'items') if counters[counter])
+            if counters['bytes']:
+                details = ', '.join(filter(None, [details, f"{counters['bytes'] / 1024:.0f} KiB"]))
+            lines.append(f"  {stage:<18} {counters[WALL_SECONDS]:8.2f} s  {counters['busy_seconds']:8.2f} s busy  "
+                         f"{counters['calls']:>6} calls"
+                         f"{'  (' + details + ')' if details else ''}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._spans.clear()
+        self.started_at = time.time()
+
+
+metrics = Metrics()
+
+
+def record_response(response, *args, **kwargs):
+    """requests 'response' hook: counts the response and its body size on the current stage."""
+    metrics.add_current(requests=1, bytes=len(response.content))  # Nothing here streams, so the body is read anyway
+    return response
+
+
+def _write_atomically(filename, text):
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_filename, filename)
+
+
+def write_json_report(filename=REPORT_FILENAME, registry=metrics):
+    _write_atomically(filename, json.dumps(registry.report(), indent=4))
+
+
+def format_prometheus(registry=metrics):
+    """
+    Prometheus text exposition format: one dpr_stage_<metric> family per counter, labelled by stage.
+    Typed as gauges: each file holds the totals of one run, which start from zero again on the next run.
+    """
+    report = registry.report()
+    lines = []
+    for metric in COUNTERS + (WALL_SECONDS,):
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {METRIC_HELP[metric]}")
+        lines.append(f"# TYPE {name} gauge")
+        for stage, counters in sorted(report['stages'].items()):
+            label = stage.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{name}{{stage="{label}"}} {counters[metric]}')
+    lines.append(f"# HELP {METRIC_PREFIX}_run_started_seconds Unix time the run started.")
+    lines.append(f"# TYPE {METRIC_PREFIX}_run_started_seconds gauge")
+    lines.append(f"{METRIC_PREFIX}_run_started_seconds {report['started_at']}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus_report(filename=PROMETHEUS_FILENAME, registry=metrics):
+    # Written to a temp file and renamed, as the textfile collector requires
+    _write_atomically(filename, format_prometheus(registry))
+
+
+_profiler = None
+_profile_filename = None
+
+
+def start_profiling(filename=None):
+    """
+    Starts cProfile when a filename is given (default: the DPR_PROFILE environment variable), else does nothing.
+    cProfile only sees the calling thread; worker threads show up as time spent waiting on them.
+    """
+    global _profiler, _profile_filename
+    filename = filename or os.environ.get(PROFILE_ENV)
+    if not filename or _profiler is not None:
+        return
+    _profiler, _profile_filename = cProfile.Profile(), filename
+    _profiler.enable()
+
+
+def stop_profiling():
+    """Stops a running profile and dumps it (inspect with python -m pstats <file>). Returns the filename or None."""
+    global _profiler, _profile_filename
+    if _profiler is None:
+        return None
+    _profiler.disable()
+    _profiler.dump_stats(_profile_filename)
+    filename = _profile_filename
+    _profiler, _profile_filename = None, None
+    return filename
+
+
+def write_reports(json_filename=REPORT_FILENAME, prometheus_filename=PROMETHEUS_FILENAME, registry=metrics):
+    """End-of-run hook for the scripts: prints the timing summary, writes both reports and any profile."""
+    print(registry.summary())
+    try:
+        write_json_report(json_filename, registry)
+        write_prometheus_report(prometheus_filename, registry)
+        print(f"Metrics saved to {json_filename} and {prometheus_filename}")
+    except OSError as e:
+        print(f"Error saving metrics: {e}")
+    profile_filename = stop_profiling()
+    if profile_filename:
+        print(f"Profile saved to {profile_filename} (python -m pstats {profile_filename})")
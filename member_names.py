@@ -0,0 +1,198 @@
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from urllib.parse import urlparse
+
+MEMBERS_FILENAME = 'dpr_members.json'
+
+# Honorifics, ranks and titles written before the name, compared without dots and case: 'H.', 'Hj.', 'Dr.',
+# 'K.H.', 'Irjen. Pol. (Purn)', ... Initials such as the 'M.' of 'H. RUSLAN M. DAUD' are part of the name.
+NAME_PREFIXES = frozenset({
+    'h', 'hj', 'hc', 'dr', 'drs', 'dra', 'drh', 'drg', 'ir', 'prof', 'kh', 'krt', 'apt', 'tgk', 'ustadz',
+    'irjen', 'mayjen', 'brigjen', 'letjen', 'jenderal', 'komjen', 'kombes', 'pol', 'tni', 'purn', 'drtr',
+})
+# Degrees written after the name without the usual comma ('... M.Si', 'MBA')
+NAME_SUFFIXES = frozenset({
+    'se', 'sh', 'mm', 'msi', 'mh', 'st', 'ssos', 'map', 'msc', 'mba', 'mhum', 'sag', 'sip', 'spd', 'phd', 'lc',
+    'mag', 'mt', 'skom', 'mkn', 'mpd', 'spsi', 'bsc', 'llm', 'mak', 'mikom', 'sikom', 'mipol',
+})
+PARENTHESIZED_PATTERN = re.compile(r'\([^)]*\)\.?')
+# 'H.FAUZI' -> 'H. FAUZI': a title glued to the name
+GLUED_PREFIX_PATTERN = re.compile(r'^((?:[A-Za-z]{1,4}\.)+)(?=[A-Za-z]{3,})')
+# Handles and URLs: '@ruslan_daud.official' -> 'ruslan daud official'
+NON_LETTER_PATTERN = re.compile(r'[^a-z]+')
+HANDLE_NOISE = frozenset({
+    'official', 'real', 'dpr', 'dprri', 'ri', 'id', 'fp', 'page', 'channel', 'tv', 'the', 'haji',
+})
+NGRAM_SIZE = 3
+
+
+def _fold(text):
+    """Casefolds and strips accents: 'Ñúñez' -> 'nunez'."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _token_form(token):
+    return _fold(token).replace('.', '')
+
+
+@lru_cache(maxsize=4096)
+def search_name(name):
+    """
+    The member's name as people write it, for search queries: titles and degrees dropped, case kept.
+    'Dr. H. RUSLAN M. DAUD, S.E., M.A.P.' -> 'RUSLAN M. DAUD'. Falls back to the input if nothing is left.
+    """
+    if not name:
+        return ''
+    core = PARENTHESIZED_PATTERN.sub(' ', name.split(',')[0])
+    tokens = []
+    for token in core.split():
+        tokens.extend(GLUED_PREFIX_PATTERN.sub(r'\1 ', token).split())
+    while tokens and _token_form(tokens[0]) in NAME_PREFIXES:
+        tokens.pop(0)
+    while len(tokens) > 1 and _token_form(tokens[-1]) in NAME_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens) or name.strip()
+
+
+@lru_cache(maxsize=4096)
+def normalize_name(name):
+    """Casefolded search_name() with punctuation removed: 'Dr. H. RUSLAN M. DAUD, S.E.' -> 'ruslan m daud'."""
+    return ' '.join(NON_LETTER_PATTERN.sub(' ', _fold(search_name(name))).split())
+
+
+def name_key(name):
+    """Order-insensitive identity of a name, for joins across snapshots and sources: 'daud m ruslan'."""
+    return ' '.join(sorted(normalize_name(name).split()))
+
+
+def normalize_handle(text):
+    """
+    Display name, handle or profile URL -> comparable text: '@ruslan_daud.official' and
+    'https://instagram.com/ruslandaud_dpr' become 'ruslan daud' and 'ruslandaud'.
+    """
+    if '://' in text:
+        path = [part for part in urlparse(text).path.split('/') if part]
+        text = path[-1] if path else ''
+    words = NON_LETTER_PATTERN.sub(' ', _fold(text)).split()
+    return ' '.join(word for word in words if word not in HANDLE_NOISE) or ' '.join(words)
+
+
+def ngrams(text, size=NGRAM_SIZE):
+    """
+    Character n-grams of the text with spaces removed, padded at both ends, so 'ruslan daud' and the handle
+    'ruslandaud' share almost all of them.
+    """
+    padded = f" {text.replace(' ', '')} "
+    return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+
+def similarity(a_grams, b_grams):
+    """Dice coefficient of two n-gram sets (0..1)."""
+    if not a_grams or not b_grams:
+        return 0.0
+    return 2 * len(a_grams & b_grams) / (len(a_grams) + len(b_grams))
+
+
+def name_similarity(name, text):
+    """How much a handle, URL or display name looks like a member's name (0..1)."""
+    return similarity(ngrams(normalize_name(name)), ngrams(normalize_handle(text)))
+
+
+def rank_by_name(links, name, name_index=None):
+    """
+    Profile links ordered by how much their handle resembles name; ties keep the search result order.
+    With a MemberNameIndex of all members, links whose handle resembles another member more go last
+    (a search for one member often returns a colleague's profile).
+    """
+    grams = ngrams(normalize_name(name))
+    key = name_key(name)
+
+    def sort_key(link):
+        score = similarity(grams, ngrams(normalize_handle(link)))
+        if name_index is not None:
+            best = name_index.match(link, limit=1)
+            if best and best[0][0] > score and name_key(best[0][1].get('name', '')) != key:
+                return 1, -score
+        return 0, -score
+
+    return sorted(links, key=sort_key)
+
+
+class MemberNameIndex:
+    """
+    Precomputed normalized names and an inverted n-gram index over all members, so matching an external
+    handle or display name only scores the members sharing an n-gram with it (well under a millisecond
+    for the ~580 members). Exact name keys are answered from a dict.
+    """
+
+    def __init__(self, members):
+        self.members = list(members)
+        self.by_key = {}
+        self._grams = []
+        self._postings = {}
+        for position, member in enumerate(self.members):
+            normalized = normalize_name(member.get('name', ''))
+            self.by_key.setdefault(' '.join(sorted(normalized.split())), []).append(position)
+            grams = ngrams(normalized)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def find(self, name):
+        """Members whose name is the same as name up to titles, degrees, case and word order."""
+        return [self.members[position] for position in self.by_key.get(name_key(name), [])]
+
+    def match(self, text, limit=5, min_score=0.4):
+        """
+        Returns [(score, member)] best first for a handle, profile URL, display name or member name.
+        Scores are the Dice coefficient of character trigrams; an exact name key scores 1.0.
+        """
+        exact = self.by_key.get(name_key(text), [])
+        if exact:
+            return [(1.0, self.members[position]) for position in exact][:limit]
+
+        query_grams = ngrams(normalize_handle(text))
+        shared = Counter()
+        for gram in query_grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+
+        scored = []
+        for position, count in shared.items():
+            score = 2 * count / (len(query_grams) + len(self._grams[position]))
+            if score >= min_score:
+                scored.append((score, position))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(round(score, 3), self.members[position]) for score, position in scored[:limit]]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(f"Usage: python {sys.argv[0]} <handle, profile URL or name> [...]")
+        exit()
+
+    try:
+        with open(MEMBERS_FILENAME, 'r', encoding='utf-8') as f:
+            dpr_members = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error loading {MEMBERS_FILENAME}: {e}")
+        exit()
+
+    start = time.perf_counter()
+    name_index = MemberNameIndex(dpr_members)
+    print(f"Indexed {len(dpr_members)} names in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for text in sys.argv[1:]:
+        start = time.perf_counter()
+        matches = name_index.match(text)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\n{text} ({elapsed_ms:.3f} ms):")
+        for score, member in matches:
+            print(f"  {score:.3f}  {member.get('name')}  [{member.get('faction')}, {member.get('district')}]")
+        if not matches:
+            print("  no match")
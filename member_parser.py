@@ -0,0 +1,476 @@
+import codecs
+import json
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from instrumentation import metrics
+
+# lxml is optional: only needed for the 'lxml' backend
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_etree = None
+    lxml_html = None
+
+BASE_URL = 'https://en.dpr.go.id/anggota/'
+
+FACTION_NAMES_ID = {
+    'Great Indonesia Movement Party Faction': 'Gerindra',
+    'Democrat Party Faction': 'Demokrat',
+    'Indonesian Democratic Party of Struggle Faction': 'PDIP',
+    'Golkar Party Faction': 'Golkar',
+    'Prosperous Justice Party Faction': 'PKS',
+    'National Mandate Party Faction': 'PAN',
+    'National Democrat Party Faction': 'NasDem',
+    'National Awakening Party Faction': 'PKB'
+}
+
+# lxml applies HTML's implied end tags (a new <td> or <tr> closes the open one), like a browser. BeautifulSoup's
+# html.parser does not and nests such rows into each other, so 'html.parser' and 'strainer' give the same members
+# as 'lxml' only on markup with explicit </td> and </tr>.
+DEFAULT_PARSER_BACKEND = 'lxml' if lxml_html is not None else 'html.parser'
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Elements that never have children, so they are never pushed on the open-element stack
+VOID_ELEMENTS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+                           'source', 'track', 'wbr'])
+
+
+# --- Row extraction, one generator per backend ---
+# Every backend yields the same raw tuple per <tr>:
+#   (member_id, relative_profile_url, image_url, name, other_info, roles)
+# so the member dicts built from them are identical whichever backend is used.
+
+def _raw_row_from_bs4_cells(cells):
+    member_id = cells[0].text.strip()
+
+    # Cell 1: Image and Profile Link (td class="hidden-xs")
+    profile_link_tag = cells[1].find('a')
+    relative_profile_url = profile_link_tag['href'] if profile_link_tag else None
+
+    image_tag = cells[1].find('img')
+    image_url = image_tag['src'] if image_tag else 'N/A'
+
+    # Cell 2: Name, Faction, District, Email
+    name_link_tag = cells[2].find('a')
+    name = name_link_tag.text.strip() if name_link_tag else 'N/A'
+
+    # Text nodes directly inside the cell; <br> and the name link are skipped
+    other_info = []
+    for content in cells[2].contents:
+        if isinstance(content, str):
+            text = content.strip()
+            if text:
+                other_info.append(text)
+
+    # Cell 3: Commission
+    roles = list(cells[3].stripped_strings)
+
+    return member_id, relative_profile_url, image_url, name, other_info, roles
+
+
+def _iter_rows_bs4(html_content, parse_only=None):
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=parse_only)
+    member_rows = soup.select('tbody tr')  # Structure as per 06 Apr 2025
+
+    if not member_rows:
+        print('No members found. Wrong HTML selector?')
+
+    for row in member_rows:
+        cells = row.find_all('td')
+
+        # Basic check: Ensure we have enough cells to avoid IndexError
+        if len(cells) < 4:
+            continue  # Skip malformed rows
+
+        try:
+            yield _raw_row_from_bs4_cells(cells)
+        except (AttributeError, IndexError, TypeError) as e:
+            print(f"Error parsing a row: {e} - skipping row. HTML content might vary.")
+
+
+def _iter_rows_html_parser(html_content):
+    return _iter_rows_bs4(html_content)
+
+
+def _iter_rows_tbody_strainer(html_content):
+    # Only <tbody> subtrees are turned into Tag objects, the rest of the page is discarded while parsing
+    return _iter_rows_bs4(html_content, parse_only=SoupStrainer('tbody'))
+
+
+def _lxml_text(element):
+    # Equivalent of BeautifulSoup's Tag.text (comments are not text)
+    return ''.join(element.itertext())
+
+
+def _raw_row_from_lxml_cells(cells):
+    member_id = _lxml_text(cells[0]).strip()
+
+    profile_link_tag = cells[1].find('.//a')
+    relative_profile_url = profile_link_tag.attrib['href'] if profile_link_tag is not None else None
+
+    image_tag = cells[1].find('.//img')
+    image_url = image_tag.attrib['src'] if image_tag is not None else 'N/A'
+
+    name_link_tag = cells[2].find('.//a')
+    name = _lxml_text(name_link_tag).strip() if name_link_tag is not None else 'N/A'
+
+    # Mirror Tag.contents: the leading text, then each child's tail. Comments count as
+    # text nodes for BeautifulSoup (Comment subclasses str), so include them as well.
+    direct_strings = [cells[2].text]
+    for child in cells[2]:
+        if child.tag is lxml_etree.Comment:
+            direct_strings.append(child.text)
+        direct_strings.append(child.tail)
+
+    other_info = []
+    for content in direct_strings:
+        if content:
+            text = content.strip()
+            if text:
+                other_info.append(text)
+
+    roles = [text.strip() for text in cells[3].itertext() if text.strip()]
+
+    return member_id, relative_profile_url, image_url, name, other_info, roles
+
+
+def _iter_rows_lxml(html_content):
+    if lxml_html is None:
+        raise ImportError("The 'lxml' parser backend requires lxml (pip install lxml).")
+
+    if isinstance(html_content, str):
+        # lxml refuses str input carrying an XML encoding declaration, so hand it bytes
+        html_content = html_content.encode('utf-8')
+    parser = lxml_html.HTMLParser(encoding='utf-8')
+    document = lxml_html.document_fromstring(html_content, parser=parser)
+    member_rows = document.xpath('//tbody//tr')
+
+    if not member_rows:
+        print('No members found. Wrong HTML selector?')
+
+    for row in member_rows:
+        cells = row.findall('.//td')
+
+        if len(cells) < 4:
+            continue
+
+        try:
+            yield _raw_row_from_lxml_cells(cells)
+        except (AttributeError, IndexError, KeyError, TypeError) as e:
+            print(f"Error parsing a row: {e} - skipping row. HTML content might vary.")
+
+
+PARSER_BACKENDS = {
+    'html.parser': _iter_rows_html_parser,  # Full BeautifulSoup tree, pure Python; needs explicit </td>, </tr>
+    'strainer': _iter_rows_tbody_strainer,  # BeautifulSoup, but only <tbody> is kept; needs explicit </td>, </tr>
+    'lxml': _iter_rows_lxml,  # libxml2 parser + XPath, no BeautifulSoup objects at all; the reference backend
+}
+
+
+# --- Streaming row parsers ---
+# These never build the whole document: each <tr> inside a <tbody> is kept only until it closes,
+# turned into the same raw row tuple as above, and dropped.
+
+class _StreamComment(str):
+    """A comment inside a row. Part of a cell's direct contents, but not of its text (as in BeautifulSoup)."""
+
+
+class _StreamNode:
+    __slots__ = ('tag', 'attrs', 'children')
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.children = []
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def iter(self, tag):
+        for child in self.children:
+            if isinstance(child, _StreamNode):
+                if child.tag == tag:
+                    yield child
+                yield from child.iter(tag)
+
+    def find(self, tag):
+        return next(self.iter(tag), None)
+
+    def strings(self):
+        for child in self.children:
+            if isinstance(child, _StreamNode):
+                yield from child.strings()
+            elif not isinstance(child, _StreamComment):
+                yield child
+
+    @property
+    def text(self):
+        return ''.join(self.strings())
+
+
+def _raw_row_from_stream_cells(cells):
+    member_id = cells[0].text.strip()
+
+    profile_link_tag = cells[1].find('a')
+    relative_profile_url = profile_link_tag['href'] if profile_link_tag else None
+
+    image_tag = cells[1].find('img')
+    image_url = image_tag['src'] if image_tag else 'N/A'
+
+    name_link_tag = cells[2].find('a')
+    name = name_link_tag.text.strip() if name_link_tag else 'N/A'
+
+    other_info = []
+    for content in cells[2].children:
+        if isinstance(content, str):
+            text = content.strip()
+            if text:
+                other_info.append(text)
+
+    roles = [text.strip() for text in cells[3].strings() if text.strip()]
+
+    return member_id, relative_profile_url, image_url, name, other_info, roles
+
+
+class _MemberRowStreamParser(HTMLParser):
+    """Incremental html.parser tokenizer that collects finished `tbody tr` rows in `completed_rows`."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tbody_depth = 0
+        self.row_stack = []  # Open elements of the current row, row_stack[0] is the <tr> itself
+        self.completed_rows = []
+
+    def _append_child(self, child):
+        children = self.row_stack[-1].children
+        # Adjacent text is one string in BeautifulSoup, keep it that way
+        if children and type(child) is str and type(children[-1]) is str:
+            children[-1] += child
+        else:
+            children.append(child)
+
+    def _close(self, depth):
+        """Closes row_stack[depth] and everything opened inside it; closing the <tr> completes the row."""
+        row = self.row_stack[0]
+        del self.row_stack[depth:]
+        if not self.row_stack:
+            self.completed_rows.append(row)
+
+    def _close_implied(self, tags):
+        """
+        HTML's implied end tags: a <td>/<th> closes the open cell and a <tr> the open row, unless a table
+        nested inside the cell is open. Returns True if an element was closed.
+        """
+        for depth in range(len(self.row_stack) - 1, -1, -1):
+            open_tag = self.row_stack[depth].tag
+            if open_tag in tags:
+                self._close(depth)
+                return True
+            if open_tag == 'table':
+                return False
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self.row_stack:
+            if tag in ('td', 'th'):
+                self._close_implied(('td', 'th'))
+            elif tag in ('tr', 'tbody', 'thead', 'tfoot'):
+                self._close_implied(('tr',))
+
+        if tag == 'tbody':
+            self.tbody_depth += 1
+
+        if self.row_stack:
+            node = _StreamNode(tag, attrs)
+            self._append_child(node)
+            if tag not in VOID_ELEMENTS:
+                self.row_stack.append(node)
+        elif tag == 'tr' and self.tbody_depth:
+            self.row_stack.append(_StreamNode(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        if self.row_stack:
+            self._append_child(_StreamNode(tag, attrs))
+
+    def handle_endtag(self, tag):
+        if self.row_stack:
+            for depth in range(len(self.row_stack) - 1, -1, -1):
+                if self.row_stack[depth].tag == tag:
+                    self._close(depth)
+                    break
+            else:
+                if tag in ('tbody', 'table'):  # Unclosed <tr>, the table ending closes it
+                    self.completed_rows.append(self.row_stack[0])
+                    self.row_stack = []
+
+        if tag == 'tbody' and self.tbody_depth:
+            self.tbody_depth -= 1
+
+    def handle_data(self, data):
+        if self.row_stack:
+            self._append_child(data)
+
+    def handle_comment(self, data):
+        if self.row_stack:
+            self._append_child(_StreamComment(data))
+
+
+def _iter_chunks(html_or_stream, chunk_size):
+    if isinstance(html_or_stream, (str, bytes)):
+        yield html_or_stream
+        return
+    while True:
+        chunk = html_or_stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_text_chunks(html_or_stream, chunk_size):
+    decoder = None
+    for chunk in _iter_chunks(html_or_stream, chunk_size):
+        if isinstance(chunk, bytes):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+
+def _stream_rows_html_parser(html_or_stream, chunk_size):
+    parser = _MemberRowStreamParser()
+
+    def drain():
+        rows = parser.completed_rows
+        parser.completed_rows = []
+        for row in rows:
+            cells = list(row.iter('td'))
+            if len(cells) < 4:
+                continue
+            try:
+                yield _raw_row_from_stream_cells(cells)
+            except (AttributeError, IndexError, KeyError, TypeError) as e:
+                print(f"Error parsing a row: {e} - skipping row. HTML content might vary.")
+
+    for chunk in _iter_text_chunks(html_or_stream, chunk_size):
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def _stream_rows_lxml(html_or_stream, chunk_size):
+    if lxml_etree is None:
+        raise ImportError("The 'lxml' parser backend requires lxml (pip install lxml).")
+
+    parser = lxml_etree.HTMLPullParser(events=('end',), tag='tr', encoding='utf-8')
+
+    def drain():
+        for _, row in parser.read_events():
+            if next(row.iterancestors('tbody'), None) is None:
+                continue
+            cells = row.findall('.//td')
+            if len(cells) >= 4:
+                try:
+                    yield _raw_row_from_lxml_cells(cells)
+                except (AttributeError, IndexError, KeyError, TypeError) as e:
+                    print(f"Error parsing a row: {e} - skipping row. HTML content might vary.")
+            # Drop the finished row and everything before it so memory stays flat
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    for chunk in _iter_chunks(html_or_stream, chunk_size):
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+
+STREAM_PARSER_BACKENDS = {
+    'html.parser': _stream_rows_html_parser,
+    'lxml': _stream_rows_lxml,
+}
+
+
+# --- Public API ---
+
+def build_member(member_id, relative_profile_url, image_url, name, other_info, roles):
+    """Turns the raw fields of one listing row into a member dict."""
+    profile_url = urljoin(BASE_URL, relative_profile_url) if relative_profile_url else 'N/A'
+
+    # Assign based on expected order after the name link + <br> tags
+    faction_name_english = other_info[0] if len(other_info) > 0 else 'N/A'
+    faction_name_id = FACTION_NAMES_ID.get(faction_name_english)
+
+    district = other_info[1] if len(other_info) > 1 else 'N/A'
+    email_raw = other_info[2] if len(other_info) > 2 else 'N/A'
+    email = email_raw.replace('[at]', '@')  # Clean email
+
+    return {
+        'id': member_id,
+        'name': name,
+        'faction': faction_name_id,
+        'district': district,
+        'email': email,
+        'roles': roles,
+        'profile_url': profile_url,
+        'image_url': image_url
+    }
+
+
+@metrics.timed('parse')
+def parse_members(individual_row_html_content, backend=DEFAULT_PARSER_BACKEND):
+    """Parses the member listing page into a list of member dicts using the chosen backend."""
+    if not individual_row_html_content:
+        return []
+
+    try:
+        iter_rows = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend '{backend}'. Choose from: {', '.join(PARSER_BACKENDS)}")
+
+    members = [build_member(*raw_row) for raw_row in iter_rows(individual_row_html_content)]
+    metrics.add_current(items=len(members))
+    return members
+
+
+def iter_members(html_or_stream, backend=DEFAULT_PARSER_BACKEND, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields member dicts one by one as each listing row closes, without building the whole document.
+    Accepts HTML as str/bytes or any file-like object (text or binary), including several snapshots concatenated.
+    """
+    try:
+        stream_rows = STREAM_PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown streaming parser backend '{backend}'. Choose from: {', '.join(STREAM_PARSER_BACKENDS)}")
+
+    found_rows = False
+    for raw_row in stream_rows(html_or_stream, chunk_size):
+        found_rows = True
+        yield build_member(*raw_row)
+
+    if not found_rows:
+        print('No members found. Wrong HTML selector?')
+
+
+def write_members_json(members, f):
+    """
+    Writes members (any iterable, e.g. iter_members()) to an open file as they arrive.
+    The output is byte-identical to json.dump(list(members), f, ensure_ascii=False, indent=4).
+    Returns the number of members written.
+    """
+    count = 0
+    for member in members:
+        member_json = json.dumps(member, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+        f.write(('[\n    ' if count == 0 else ',\n    ') + member_json)
+        count += 1
+    f.write('\n]' if count else '[]')
+    return count
@@ -0,0 +1,298 @@
+import json
+import mmap
+import os
+import struct
+import sys
+
+SNAPSHOT_SUFFIX = '.snapshot'
+SNAPSHOT_MAGIC = b'DPRSNAP1'
+# magic, record count, field count, string count, source JSON size, source JSON mtime (ns)
+HEADER = struct.Struct('<8sIIIqq')
+
+# Column kinds
+KIND_STRING = 0  # one string table index per record
+KIND_STRING_LIST = 1  # per-record offsets into a flat array of string indexes (e.g. roles)
+KIND_JSON = 2  # anything else (socials, details, ...) as compact JSON in the string table
+
+# Reserved string indexes
+MISSING = 0xFFFFFFFF  # key absent from the member dict
+NULL = 0xFFFFFFFE  # key present with a None value
+
+
+def snapshot_filename_for(json_filename):
+    """'dpr_members.json' -> 'dpr_members.snapshot'"""
+    return f"{os.path.splitext(json_filename)[0]}{SNAPSHOT_SUFFIX}"
+
+
+def _column_kind(values):
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, str) for value in present):
+        return KIND_STRING
+    if all(isinstance(value, list) and all(isinstance(item, str) for item in value) for value in present):
+        return KIND_STRING_LIST
+    return KIND_JSON
+
+
+def _u32_array(values):
+    return struct.pack(f'<{len(values)}I', *values)
+
+
+def encode_snapshot(members, source_size=0, source_mtime_ns=0):
+    """
+    Encodes a list of member dicts as a columnar snapshot.
+
+    Every distinct string (values, roles, field names, JSON payloads) is stored once in a string table;
+    columns are arrays of uint32 indexes into it, so repeated factions, districts and roles cost 4 bytes each.
+    """
+    fields = []
+    for member in members:
+        for field in member:
+            if field not in fields:
+                fields.append(field)
+
+    strings = {}
+
+    def intern(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    field_indexes = [intern(field) for field in fields]
+    kinds = []
+    columns = []
+    for field in fields:
+        values = [member.get(field) for member in members]
+        kind = _column_kind(values)
+        kinds.append(kind)
+        if kind == KIND_STRING_LIST:
+            offsets = [0]
+            items = []
+            list_flags = []
+            for member in members:
+                value = member.get(field, None)
+                list_flags.append(MISSING if field not in member else NULL if value is None else 0)
+                items.extend(intern(item) for item in value or [])
+                offsets.append(len(items))
+            columns.append(_u32_array(list_flags) + _u32_array(offsets) + _u32_array(items))
+            continue
+
+        indexes = []
+        for member in members:
+            if field not in member:
+                indexes.append(MISSING)
+            elif member[field] is None:
+                indexes.append(NULL)
+            elif kind == KIND_STRING:
+                indexes.append(intern(member[field]))
+            else:
+                indexes.append(intern(json.dumps(member[field], ensure_ascii=False, separators=(',', ':'))))
+        columns.append(_u32_array(indexes))
+
+    # NUL-separated, so a reader that needs every string can decode the table with one decode() and split()
+    encoded = [string.encode('utf-8') for string in strings]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data) + 1)
+    blob = b''.join(data + b'\0' for data in encoded)
+    blob += b'\0' * (-len(blob) % 4)  # Keep the uint32 arrays after it aligned
+
+    return b''.join([
+        HEADER.pack(SNAPSHOT_MAGIC, len(members), len(fields), len(strings), source_size, source_mtime_ns),
+        _u32_array(string_offsets),
+        blob,
+        _u32_array(field_indexes),
+        _u32_array(kinds),
+        *columns,
+    ])
+
+
+def write_snapshot(members, filename, source_filename=None):
+    """Writes the snapshot atomically; source_filename's size and mtime are recorded to detect a stale snapshot."""
+    source_size, source_mtime_ns = 0, 0
+    if source_filename is not None:
+        source_stat = os.stat(source_filename)
+        source_size, source_mtime_ns = source_stat.st_size, source_stat.st_mtime_ns
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'wb') as f:
+        f.write(encode_snapshot(members, source_size, source_mtime_ns))
+    os.replace(temp_filename, filename)
+
+
+def write_snapshot_for(json_filename, members):
+    """Writes the snapshot next to a JSON file that was just saved from `members`. Never fails the caller."""
+    snapshot_filename = snapshot_filename_for(json_filename)
+    try:
+        write_snapshot(members, snapshot_filename, source_filename=json_filename)
+        return snapshot_filename
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Warning: Could not write snapshot {snapshot_filename}: {e}")
+        return None
+
+
+class MemberSnapshot:
+    """
+    Read-only view of a snapshot file through mmap: opening it only maps the file and reads the header,
+    strings are decoded on first use. Columns can be read without materializing member dicts.
+    """
+
+    def __init__(self, filename):
+        if sys.byteorder != 'little':
+            raise ValueError("Snapshots are little-endian and are read without byte swapping")
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._views = []  # Every uint32 view into the map; released before the map can be closed
+        try:
+            self._read_layout()
+        except (ValueError, struct.error, TypeError):
+            self.close()
+            raise
+
+    def _u32_view(self, position, count):
+        end = position + 4 * count
+        if end > len(self._view):
+            raise ValueError(f"Truncated snapshot: {self.filename}")
+        view = self._view[position:end].cast('I')
+        self._views.append(view)
+        return view, end
+
+    def _read_layout(self):
+        magic, self.record_count, field_count, string_count, self.source_size, self.source_mtime_ns = \
+            HEADER.unpack_from(self._view, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a member snapshot: {self.filename}")
+
+        self._string_offsets, position = self._u32_view(HEADER.size, string_count + 1)
+        self._blob_start = position
+        position += self._string_offsets[string_count]
+        position += -position % 4
+        self._strings = [None] * string_count
+        self._all_decoded = False
+
+        field_indexes, position = self._u32_view(position, field_count)
+        kinds, position = self._u32_view(position, field_count)
+        self.fields = [self.string(index) for index in field_indexes]
+        self._columns = {}
+        for field, kind in zip(self.fields, kinds):
+            if kind == KIND_STRING_LIST:
+                flags, position = self._u32_view(position, self.record_count)
+                offsets, position = self._u32_view(position, self.record_count + 1)
+                items, position = self._u32_view(position, offsets[self.record_count])
+                self._columns[field] = (kind, flags, offsets, items)
+            else:
+                indexes, position = self._u32_view(position, self.record_count)
+                self._columns[field] = (kind, indexes)
+
+    def __len__(self):
+        return self.record_count
+
+    def string(self, index):
+        value = self._strings[index]
+        if value is None:
+            start = self._blob_start + self._string_offsets[index]
+            end = self._blob_start + self._string_offsets[index + 1] - 1
+            value = self._strings[index] = str(self._view[start:end], 'utf-8')
+        return value
+
+    def _all_strings(self):
+        """Decodes the whole string table once, for reads that touch most of it anyway."""
+        if not self._all_decoded:
+            string_count = len(self._strings)
+            blob_end = self._blob_start + self._string_offsets[string_count]
+            parts = str(self._view[self._blob_start:blob_end], 'utf-8').split('\0')
+            if len(parts) == string_count + 1:
+                self._strings = parts[:string_count]
+            else:
+                # Some string contains a NUL itself; decode string by string
+                string = self.string
+                self._strings = [string(index) for index in range(string_count)]
+            self._all_decoded = True
+        return self._strings
+
+    def column(self, field):
+        """Returns the values of one field for every record (None where a member has no such key)."""
+        column = self._columns[field]
+        # Strings are decoded on demand unless the whole table was already decoded
+        string = self._strings.__getitem__ if self._all_decoded else self.string
+        if column[0] == KIND_STRING_LIST:
+            _, flags, offsets, items = column
+            items = items.tolist()
+            offsets = offsets.tolist()
+            return [None if flag else [string(item) for item in items[offsets[i]:offsets[i + 1]]]
+                    for i, flag in enumerate(flags.tolist())]
+
+        kind, indexes = column
+        if kind == KIND_JSON:
+            # One json.loads over the whole column instead of one call per member
+            payloads = ['null' if index >= NULL else string(index) for index in indexes.tolist()]
+            return json.loads(f"[{','.join(payloads)}]")
+        return [None if index >= NULL else string(index) for index in indexes.tolist()]
+
+    def to_members(self, fields=None):
+        """
+        Rebuilds the member dicts (same keys and values as the JSON file, keys in first-seen order).
+        With `fields`, only those columns are read and the dicts hold only those keys.
+        """
+        if fields is None:
+            fields = self.fields
+            self._all_strings()
+        else:
+            fields = [field for field in self.fields if field in fields]
+        members = [dict(zip(fields, row)) for row in zip(*(self.column(field) for field in fields))]
+        for field in fields:
+            markers = self._columns[field][1].tolist()
+            if MISSING in markers:
+                for member, marker in zip(members, markers):
+                    if marker == MISSING:
+                        del member[field]
+        return members
+
+    def is_current_for(self, json_filename):
+        try:
+            source_stat = os.stat(json_filename)
+        except FileNotFoundError:
+            return False
+        return (source_stat.st_size, source_stat.st_mtime_ns) == (self.source_size, self.source_mtime_ns)
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_members(json_filename, fields=None):
+    """
+    Loads the members of a JSON file, from its snapshot when one exists and matches the JSON file's size
+    and mtime; otherwise (no snapshot, stale or unreadable) with json.load as before.
+    `fields` limits the snapshot read to those columns; the JSON fallback returns whole members.
+    """
+    snapshot_filename = snapshot_filename_for(json_filename)
+    if os.path.exists(snapshot_filename):
+        try:
+            with MemberSnapshot(snapshot_filename) as snapshot:
+                if snapshot.is_current_for(json_filename):
+                    return snapshot.to_members(fields)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable snapshot {snapshot_filename}: {e}")
+    with open(json_filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    # Writes (or refreshes) the snapshot of each JSON file given, e.g. after editing the JSON by hand
+    for json_filename in sys.argv[1:] or ['dpr_members.json', 'dpr_members_socials.json']:
+        with open(json_filename, 'r', encoding='utf-8') as f:
+            members = json.load(f)
+        snapshot_filename = write_snapshot_for(json_filename, members)
+        if snapshot_filename:
+            print(f"{json_filename} ({os.path.getsize(json_filename) / 1024:.0f} KiB) -> {snapshot_filename} "
+                  f"({os.path.getsize(snapshot_filename) / 1024:.0f} KiB)")
@@ -0,0 +1,177 @@
+import argparse
+import re
+import sys
+
+from member_snapshot import load_members
+from snapshot_diff import member_key
+from social_platforms import PLATFORMS
+
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+
+# Fields of a member dict, in the order the scrapers write them
+MEMBER_FIELDS = ('id', 'name', 'faction', 'district', 'email', 'roles', 'profile_url', 'image_url', 'socials',
+                 'socials_checked_at', 'details')
+
+# 'JAWA BARAT IX' -> 'JAWA BARAT': electoral districts are numbered within their province
+DISTRICT_NUMBER_PATTERN = re.compile(r'\s+[IVXL]+$')
+
+_MISSING = object()
+
+
+def province_of(district):
+    return DISTRICT_NUMBER_PATTERN.sub('', district) if district else district
+
+
+class MemberRecord:
+    """One member with fixed attributes instead of a dict; repeated values (faction, district, roles) are interned."""
+
+    __slots__ = MEMBER_FIELDS + ('extra',)
+
+    def __init__(self, member):
+        for field in MEMBER_FIELDS:
+            value = member.get(field, _MISSING)
+            if field in ('faction', 'district') and isinstance(value, str):
+                value = sys.intern(value)
+            elif field == 'roles' and isinstance(value, list):
+                value = tuple(sys.intern(role) for role in value)
+            setattr(self, field, value)
+        # Keys written by other tools are kept so to_dict() round-trips the file
+        extra = {key: value for key, value in member.items() if key not in MEMBER_FIELDS}
+        self.extra = extra or None
+
+    def get(self, field, default=None):
+        """dict.get() for code written against member dicts."""
+        value = getattr(self, field, _MISSING) if field in MEMBER_FIELDS else (self.extra or {}).get(field, _MISSING)
+        return default if value is _MISSING else value
+
+    @property
+    def province(self):
+        return province_of(self.get('district'))
+
+    def to_dict(self):
+        member = {}
+        for field in MEMBER_FIELDS:
+            value = getattr(self, field)
+            if value is _MISSING:
+                continue
+            member[field] = list(value) if field == 'roles' and isinstance(value, tuple) else value
+        if self.extra:
+            member.update(self.extra)
+        return member
+
+    def __repr__(self):
+        return f"MemberRecord(id={self.get('id')!r}, name={self.get('name')!r})"
+
+
+class MemberStore:
+    """
+    Members loaded once into MemberRecords, with prebuilt indexes on member key, id, faction, district, province
+    and role. Records are keyed by member_key() (the profile URL): the listing id is a row number, so it repeats
+    across concatenated or historical files and by_id maps each id to every record carrying it.
+
+    find() starts from the smallest index matching the query and checks the remaining filters per record,
+    so "Commission V members in ACEH" touches a few dozen records instead of scanning all members.
+    """
+
+    def __init__(self, members):
+        self.records = [member if isinstance(member, MemberRecord) else MemberRecord(member) for member in members]
+        self.by_key = {}
+        self.by_id = {}
+        self.by_faction = {}
+        self.by_district = {}
+        self.by_province = {}
+        self.by_role = {}
+        for position, record in enumerate(self.records):
+            key = member_key(record)
+            if key in self.by_key:
+                print(f"Warning: {key} appears more than once, keeping the last record")
+            self.by_key[key] = position
+            self.by_id.setdefault(record.get('id'), []).append(position)
+            self.by_faction.setdefault(record.get('faction'), []).append(position)
+            self.by_district.setdefault(record.get('district'), []).append(position)
+            self.by_province.setdefault(record.province, []).append(position)
+            for role in record.get('roles') or ():
+                self.by_role.setdefault(role, []).append(position)
+
+    @classmethod
+    def load(cls, filename=SOCIALS_FILENAME):
+        return cls(load_members(filename))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def get(self, key):
+        """Returns the record with this member key (usually the profile URL), or None."""
+        position = self.by_key.get(key)
+        return None if position is None else self.records[position]
+
+    def with_id(self, member_id):
+        """Returns every record with this listing id (ids are strings in the JSON files)."""
+        return [self.records[position] for position in self.by_id.get(str(member_id), [])]
+
+    def find(self, faction=None, district=None, province=None, role=None):
+        """Returns the records matching every given filter, in file order."""
+        filters = [(index, value) for index, value in (
+            (self.by_faction, faction), (self.by_district, district), (self.by_province, province),
+            (self.by_role, role)) if value is not None]
+        if not filters:
+            return list(self.records)
+
+        smallest = min((index.get(value, []) for index, value in filters), key=len)
+        checks = [(field, value) for field, value in (('faction', faction), ('district', district))
+                  if value is not None]
+        return [record for record in (self.records[position] for position in smallest)
+                if all(record.get(field) == value for field, value in checks)
+                and (province is None or record.province == province)
+                and (role is None or role in (record.get('roles') or ()))]
+
+    def socials_coverage(self, group_by='faction'):
+        """Returns {group: {platform: members with a link}, 'members': count} for 'faction', 'province', ..."""
+        index = {'faction': self.by_faction, 'district': self.by_district, 'province': self.by_province,
+                 'role': self.by_role}[group_by]
+        coverage = {}
+        for group, positions in index.items():
+            counts = {platform: 0 for platform in PLATFORMS}
+            for position in positions:
+                socials = self.records[position].get('socials') or {}
+                for platform in PLATFORMS:
+                    if socials.get(platform):
+                        counts[platform] += 1
+            counts['members'] = len(positions)
+            coverage[group] = counts
+        return coverage
+
+    def to_dicts(self):
+        return [record.to_dict() for record in self.records]
+
+
+def print_coverage(coverage, group_by):
+    print(f"{group_by.title():<32} {'members':>7} " + " ".join(f"{platform:>9}" for platform in PLATFORMS))
+    for group, counts in sorted(coverage.items(), key=lambda item: str(item[0])):
+        print(f"{str(group):<32} {counts['members']:>7} "
+              + " ".join(f"{counts[platform]:>9}" for platform in PLATFORMS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query DPR members by faction, district, province and role.")
+    parser.add_argument('filename', nargs='?', default=SOCIALS_FILENAME)
+    parser.add_argument('--faction')
+    parser.add_argument('--district')
+    parser.add_argument('--province')
+    parser.add_argument('--role', help="e.g. 'Commission V'")
+    parser.add_argument('--coverage', choices=['faction', 'district', 'province', 'role'],
+                        help="print socials coverage per group instead of members")
+    args = parser.parse_args()
+
+    store = MemberStore.load(args.filename)
+    if args.coverage:
+        print_coverage(store.socials_coverage(args.coverage), args.coverage)
+    else:
+        found = store.find(faction=args.faction, district=args.district, province=args.province, role=args.role)
+        for record in found:
+            print(f"{record.get('id'):>4}  {record.get('faction') or '':<9} {record.get('district') or '':<28} "
+                  f"{record.get('name')}  ({', '.join(record.get('roles') or ())})")
+        print(f"{len(found)} of {len(store)} members")
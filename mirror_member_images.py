@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from http_client import AdaptiveRateLimiter, RequestExecutor, create_session
+from instrumentation import metrics, start_profiling, write_reports
+from snapshot_diff import changed_keys, load_changelog_for, member_key
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SOURCE_FILENAME = 'dpr_members.json'
+MIRROR_DIR = 'member_images'
+MANIFEST_FILENAME = os.path.join(MIRROR_DIR, 'manifest.json')
+HEADERS = {'User-Agent': 'Lynx'}
+REQUEST_TIMEOUT_SECONDS = 15
+MAX_WORKERS = 8  # Concurrent photo downloads
+REQUEST_INTERVAL_SECONDS = 0.1  # Starting spacing between two requests to the same host; adapts to the server
+THUMBNAIL_SIZE = (120, 160)  # Bounding box; the listing photos are portraits
+THUMBNAIL_WORKERS = os.cpu_count() or 2
+
+
+def image_url_for(member, base_url=None):
+    """Returns the photo URL of a member, optionally re-rooted on `base_url` (e.g. a local stub server)."""
+    image_url = member.get('image_url')
+    if not image_url or image_url == 'N/A':
+        return None
+    if base_url:
+        return urljoin(base_url, urlparse(image_url).path)
+    return image_url
+
+
+def blob_path_for(digest, content_type=None, mirror_dir=MIRROR_DIR):
+    extension = '.png' if content_type == 'image/png' else '.jpg'
+    return os.path.join(mirror_dir, 'blobs', digest[:2], f"{digest}{extension}")
+
+
+def thumbnail_path_for(digest, mirror_dir=MIRROR_DIR, size=THUMBNAIL_SIZE):
+    return os.path.join(mirror_dir, 'thumbs', f"{digest}_{size[0]}x{size[1]}.jpg")
+
+
+def load_manifest(filename=MANIFEST_FILENAME):
+    """Returns {'images': {url: entry}, 'members': {member_key: {...}}}; empty if nothing was mirrored yet."""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'images': {}, 'members': {}}
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from {filename}: {e}")
+        return {'images': {}, 'members': {}}
+
+
+def save_manifest(manifest, filename=MANIFEST_FILENAME):
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(temp_filename, filename)
+
+
+def store_blob(body, content_type, mirror_dir=MIRROR_DIR):
+    """Writes body under its SHA-256 unless an identical image is already stored. Returns (digest, path)."""
+    digest = hashlib.sha256(body).hexdigest()
+    path = blob_path_for(digest, content_type, mirror_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, path)
+    return digest, path
+
+
+@metrics.timed('images')
+def fetch_image(request_executor, url, previous=None):
+    """
+    GETs one photo, conditionally when a previous manifest entry has validators.
+    Returns ('not_modified', None), ('fetched', response) or ('failed', None).
+    """
+    headers = {}
+    if previous and os.path.exists(previous.get('path', '')):
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    try:
+        response = request_executor.get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+        if response.status_code == 304 and headers:
+            return 'not_modified', None
+        response.raise_for_status()
+        return 'fetched', response
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return 'failed', None
+
+
+def make_thumbnail(source_path, thumbnail_path, size=THUMBNAIL_SIZE):
+    """Runs in a worker process. Returns thumbnail_path, or None if the image could not be decoded."""
+    if os.path.exists(thumbnail_path):
+        return thumbnail_path
+    try:
+        with Image.open(source_path) as image:
+            image = image.convert('RGB')
+            image.thumbnail(size)
+            temp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+            image.save(temp_path, 'JPEG', quality=85, optimize=True)
+        os.replace(temp_path, thumbnail_path)
+        return thumbnail_path
+    except (OSError, ValueError) as e:
+        print(f"Error thumbnailing {source_path}: {e}")
+        return None
+
+
+def make_thumbnails(manifest, mirror_dir=MIRROR_DIR, max_workers=THUMBNAIL_WORKERS):
+    """
+    Thumbnails every distinct stored image in a process pool (image decoding is CPU-bound and holds the GIL).
+    Skipped with a note when Pillow is not installed. Returns the number of thumbnails available.
+    """
+    if Image is None:
+        print("Pillow is not installed (pip install Pillow), skipping thumbnails.")
+        return 0
+
+    jobs = {}
+    for entry in manifest['images'].values():
+        if entry.get('sha256') and entry['sha256'] not in jobs:
+            jobs[entry['sha256']] = (entry['path'], thumbnail_path_for(entry['sha256'], mirror_dir))
+    os.makedirs(os.path.join(mirror_dir, 'thumbs'), exist_ok=True)
+
+    thumbnails = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(make_thumbnail, *zip(*jobs.values())) if jobs else []
+        for digest, thumbnail_path in zip(jobs, results):
+            thumbnails[digest] = thumbnail_path
+
+    for entry in manifest['images'].values():
+        entry['thumbnail'] = thumbnails.get(entry.get('sha256'))
+    return sum(1 for path in thumbnails.values() if path)
+
+
+def photo_keys_to_refresh(source_filename=SOURCE_FILENAME, manifest_filename=MANIFEST_FILENAME):
+    """
+    Keys of the members added or with a new image_url since the last mirror, from the roster changelog;
+    None (refresh every photo) when the changelog does not describe the roster the manifest was built from.
+    """
+    changelog = load_changelog_for(source_filename, manifest_filename)
+    return None if changelog is None else set(changed_keys(changelog, fields=('image_url',)))
+
+
+def mirror_member_images(members, manifest, max_workers=MAX_WORKERS, request_interval=REQUEST_INTERVAL_SECONDS,
+                         base_url=None, session=None, mirror_dir=MIRROR_DIR, only_keys=None):
+    """
+    Downloads the photo of every member over one pooled session with `max_workers` concurrent requests.
+    Each distinct URL is fetched once (conditionally if mirrored before), identical images are stored once
+    by content hash, and `manifest` is updated in place. With only_keys, photos already in the manifest are
+    refetched only for members whose member_key is in it. Returns {'fetched', 'not_modified', 'failed', 'deduped'}.
+    """
+    session = session or create_session(HEADERS, pool_size=max_workers)
+    rate_limiter = AdaptiveRateLimiter(request_interval)
+    request_executor = RequestExecutor(session, rate_limiter)
+    images = manifest.setdefault('images', {})
+
+    urls = {}
+    for member in members:
+        url = image_url_for(member, base_url)
+        if url:
+            urls.setdefault(url, []).append(member)
+
+    def mirror_one(url):
+        status, response = fetch_image(request_executor, url, images.get(url))
+        if status != 'fetched':
+            return url, status, None
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        digest, path = store_blob(response.content, content_type, mirror_dir)
+        return url, status, {
+            'sha256': digest,
+            'path': path,
+            'bytes': len(response.content),
+            'content_type': content_type,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        }
+
+    fetch_urls = [url for url, url_members in urls.items()
+                  if only_keys is None or url not in images or any(member_key(member) in only_keys
+                                                                   for member in url_members)]
+    fetch_url_set = set(fetch_urls)
+    counts = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'deduped': 0}
+    digests_seen = {entry.get('sha256') for url, entry in images.items() if url not in fetch_url_set}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, (url, status, entry) in enumerate(executor.map(mirror_one, fetch_urls)):
+            counts[status] += 1
+            if entry is not None:
+                if entry['sha256'] in digests_seen:
+                    counts['deduped'] += 1
+                digests_seen.add(entry['sha256'])
+                entry['thumbnail'] = images.get(url, {}).get('thumbnail')
+                images[url] = entry
+            elif url in images:
+                digests_seen.add(images[url].get('sha256'))
+            names = ', '.join(member.get('name', 'N/A') for member in urls[url])
+            print(f"  [{index + 1}/{len(fetch_urls)}] {names}: {status}")
+    print(request_executor.summary())
+
+    # Keyed like the roster diff: the listing id is a row number and shifts when members are added or removed
+    manifest['members'] = {
+        member_key(member): {
+            'name': member.get('name'),
+            'profile_url': member.get('profile_url'),
+            'image_url': url,
+            'sha256': images.get(url, {}).get('sha256'),
+        }
+        for url, url_members in urls.items() for member in url_members
+    }
+    return counts
+
+
+if __name__ == '__main__':
+    start_profiling()  # Only when DPR_PROFILE is set
+    base_url_override = sys.argv[1] if len(sys.argv) > 1 else None
+
+    try:
+        with open(SOURCE_FILENAME, 'r', encoding='utf-8') as f:
+            dpr_members = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error loading {SOURCE_FILENAME}: {e}")
+        exit()
+
+    os.makedirs(MIRROR_DIR, exist_ok=True)
+    image_manifest = load_manifest()
+    print(f"Mirroring photos of {len(dpr_members)} members with {MAX_WORKERS} workers into {MIRROR_DIR}/...")
+    mirror_counts = mirror_member_images(dpr_members, image_manifest, base_url=base_url_override,
+                                         only_keys=photo_keys_to_refresh())
+    print(f"{mirror_counts['fetched']} downloaded ({mirror_counts['deduped']} duplicates stored once), "
+          f"{mirror_counts['not_modified']} unchanged (304), {mirror_counts['failed']} failed")
+
+    thumbnail_count = make_thumbnails(image_manifest)
+    print(f"{thumbnail_count} thumbnails in {os.path.join(MIRROR_DIR, 'thumbs')}")
+
+    save_manifest(image_manifest)
+    print(f"Manifest saved to {MANIFEST_FILENAME}")
+    write_reports()
+    print("\nFINISH")
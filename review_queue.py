@@ -0,0 +1,123 @@
+import queue
+import threading
+import webbrowser
+
+from http_client import TokenBucket
+from member_names import MemberNameIndex
+from social_candidates import SEARCH_BURST, SEARCH_RATE_PER_SECOND, candidate_key
+from social_query_planner import QueryPlanStats, plan_member_searches
+from social_search import API_KEY, CX_ID, PLATFORMS
+
+REVIEW_LOOKAHEAD = 3  # Members prepared ahead of the one being reviewed
+
+_END_OF_REVIEW = object()
+
+
+def open_in_browser(url):
+    """Opens a tab without blocking the prompt (webbrowser.open can take a while to spawn the browser)."""
+    threading.Thread(target=webbrowser.open, args=(url,), kwargs={'new': 2, 'autoraise': False}, daemon=True).start()
+
+
+def members_to_review(members, plan=None):
+    """
+    Yields (index, member) for members without a saved socials object, like the interactive loop always did,
+    or with a refresh plan ({member id: [platforms]}) for the planned members only.
+    """
+    for index, member in enumerate(members):
+        if (not member.get('socials')) if plan is None else member.get('id') in plan:
+            yield index, member
+
+
+def prepare_member(member, candidate_store, store_lock, bucket, api_key=API_KEY, cx_id=CX_ID, stats=None,
+                   platforms=None, max_age_seconds=None, name_index=None):
+    """
+    Returns {platform: store entry or None} for one member and the given platforms (all by default), searching
+    only the platforms missing from the store (through the query planner). None means the search failed.
+    New results are written to candidate_store so they survive a restart.
+    """
+    platforms = PLATFORMS if platforms is None else platforms
+    with store_lock:
+        prepared = {platform: candidate_store.get(candidate_key(member, platform)) for platform in platforms}
+    missing = {platform: PLATFORMS[platform] for platform, entry in prepared.items() if entry is None}
+    if not missing:
+        return prepared
+
+    def before_call():
+        bucket.acquire()
+        return True
+
+    entries = plan_member_searches(member, missing, api_key, cx_id, before_call=before_call, stats=stats,
+                                   max_age_seconds=max_age_seconds, name_index=name_index)
+    with store_lock:
+        for platform, entry in entries.items():
+            if entry is not None:
+                candidate_store[candidate_key(member, platform)] = entry
+    prepared.update(entries)
+    return prepared
+
+
+class ReviewSession:
+    """
+    Producer/consumer split of the socials review: a background thread searches and filters candidates
+    for up to `lookahead` members ahead, while the reviewer consumes ready members from a bounded queue.
+    """
+
+    def __init__(self, members, candidate_store, lookahead=REVIEW_LOOKAHEAD, rate=SEARCH_RATE_PER_SECOND,
+                 api_key=API_KEY, cx_id=CX_ID, plan=None, max_age_seconds=None):
+        self.members = members
+        self.candidate_store = candidate_store
+        self.store_lock = threading.Lock()
+        self.api_key = api_key
+        self.cx_id = cx_id
+        self.plan = plan  # {member id: [platforms]} from socials_refresh, or None to review unreviewed members
+        self.max_age_seconds = max_age_seconds
+        self.stats = QueryPlanStats()
+        self.name_index = MemberNameIndex(members)  # Ranks colleagues' profiles below the member's own
+        self._bucket = TokenBucket(rate, capacity=SEARCH_BURST)
+        self._queue = queue.Queue(maxsize=lookahead)
+        self._stopped = threading.Event()
+        self._error = None  # Raised by the producer; re-raised to the reviewer at the end of the queue
+        self._producer = threading.Thread(target=self._produce, name='review-producer', daemon=True)
+
+    def _put(self, item):
+        # Re-check the stop flag periodically so a stopped session never leaves the producer blocked
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for index, member in members_to_review(self.members, self.plan):
+                if self._stopped.is_set():
+                    return
+                platforms = None if self.plan is None else self.plan[member.get('id')]
+                prepared = prepare_member(member, self.candidate_store, self.store_lock, self._bucket,
+                                          self.api_key, self.cx_id, self.stats, platforms, self.max_age_seconds,
+                                          self.name_index)
+                if not self._put((index, member, prepared)):
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END_OF_REVIEW)
+
+    def __iter__(self):
+        """
+        Yields (index, member, {platform: entry or None}) in member order, each ready for prompting.
+        If preparing a member failed, the members prepared before it are yielded, then the error is raised.
+        """
+        self._producer.start()
+        while True:
+            item = self._queue.get()
+            if item is _END_OF_REVIEW:
+                if self._error is not None:
+                    raise self._error
+                return
+            yield item
+
+    def stop(self):
+        self._stopped.set()
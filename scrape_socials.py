@@ -1,33 +1,19 @@
 import json
+import sys
 import urllib
 
-import requests
-import os
-from urllib.parse import urlparse, urlunparse
-import time
-from dotenv import load_dotenv
-import webbrowser
-
-# --- Configuration ---
-load_dotenv()
-API_KEY = os.environ.get("GOOGLE_API_KEY")  # Get this from your Cloud console
-CX_ID = os.environ.get("GOOGLE_CX_ID")  # Enable Custom JSON Search, then get the CX code
-
-if not API_KEY or not CX_ID:
-    print("ERROR: Google API Key or CX ID not set.")
-    print("Please set GOOGLE_API_KEY and GOOGLE_CX_ID environment variables or edit the script (insecure).")
-    exit()
+from instrumentation import start_profiling, write_reports
+from member_names import search_name
+from review_queue import ReviewSession, open_in_browser
+from search_result_store import get_result_store
+from social_candidates import (load_candidate_store, prefetch_candidates, reclassify_candidates, reclassify_entry,
+                               save_candidate_store)
+from socials_journal import SocialsJournal, write_json_atomically
+from socials_refresh import MISSING_LINK_TTL_SECONDS, describe_plan, mark_checked, prepare_refresh
+from social_search import PLATFORMS, api_credentials_missing
 
 SOURCE_FILENAME = 'dpr_members_socials.json'  # Save to a new file initially
 
-PLATFORMS = {
-    "instagram": "instagram.com",
-    "twitter": "twitter.com",  # Consider adding x.com as well or handling redirects
-    "tiktok": "tiktok.com",
-    "facebook": "facebook.com",
-    "youtube": "youtube.com",
-}
-
 MANUAL_GOOGLE_SEARCH_API_URL = "https://www.google.com/search?q="
 MANUAL_TWITTER_SEARCH_API_URL = "https://x.com/search?q="
 MANUAL_TIKTOK_SEARCH_API_URL = "https://www.tiktok.com/search?q="
@@ -35,10 +21,6 @@ MANUAL_FACEBOOK_SEARCH_API_URL = "https://www.facebook.com/search/top/?q="
 MANUAL_YOUTUBE_SEARCH_API_URL = "https://www.youtube.com/results?search_query="
 
 
-SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
-REQUEST_DELAY_SECONDS = 1.1  # Add delay between API calls to avoid rate limits
-
-
 # --- Helper Functions ---
 
 def load_json_file(filename):
@@ -55,8 +37,7 @@ def load_json_file(filename):
 
 def save_update_json_file(filename, data):
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        write_json_atomically(filename, data)
         print(f"Data successfully saved to {filename}") # Optional: confirmation per save
         return True
     except IOError as e:
@@ -67,178 +48,90 @@ def save_update_json_file(filename, data):
         return False
 
 
-def call_google_search_api(query, api_key, cx_id, num_results=10):
-    params = {
-        'key': api_key,
-        'cx': cx_id,
-        'q': query,
-        'num': num_results
-    }
-    try:
-        response = requests.get(SEARCH_API_URL, params=params, timeout=15)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4XX or 5XX)
-        return response.json()
-    except requests.exceptions.Timeout:
-        print("Error: Google Search API request timed out.")
-        return None
-    except requests.exceptions.RequestException as e:
-        print(f"Error during Google Search API request: {e}")
-        # Check for specific status codes if needed (e.g., 429 Too Many Requests)
-        if e.response is not None:
-            print(f"API Response Status: {e.response.status_code}")
-            print(f"API Response Body: {e.response.text[:500]}...")  # Print snippet of error
-        return None
-
-
-def filter_potential_profile_link(link, platform_domain):
-    """
-    Filters a URL to check if it looks like a main profile/page/channel link
-    and not a link to a specific post/video/story.
-    Returns the cleaned URL if valid, otherwise None.
-    *** This logic needs refinement and is platform-specific. May change with time. ***
-    """
-    try:
-        parsed = urlparse(link)
-        # Basic check: Ensure scheme and correct domain
-        if not parsed.scheme or parsed.netloc.lower().replace('www.', '') != platform_domain:
-            return None
-
-        # Normalize path, remove trailing slash
-        path = parsed.path.rstrip('/')
-        # Remove query params and fragments for most checks initially
-        cleaned_url = urlunparse((parsed.scheme, parsed.netloc, path, '', '', ''))
-
-        # --- Platform-Specific Rules (EXAMPLES - NEEDS THOROUGH TESTING/REFINEMENT) ---
-        if platform_domain == "instagram.com":
-            # Allow root, /username/. Deny /p/, /reel/, /stories/
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) > 0:  # Basic username check, at least one path
-                if path_parts[0] not in ['p', 'reels', 'stories', 'explore']:  # Deny specific post types etc.
-                    return f"{parsed.scheme}://{platform_domain}/{path_parts[0]}" # Custom final combination
-
-
-        elif platform_domain == "twitter.com" or platform_domain == "x.com":  # Handle both
-            # Allow /username. Deny /status/, /i/, /explore/
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) > 0 and path_parts[0] != '':
-                if path_parts[0] not in ['i', 'status', 'explore', 'home', 'notifications', 'messages']:
-                    return f"{parsed.scheme}://{platform_domain}/{path_parts[0]}"  # Custom final combination
-
-        elif platform_domain == "tiktok.com":
-            # Allow /@username. Deny /video/, /music/
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) > 0:
-                if path_parts[0].startswith('@'):
-                    return f"{parsed.scheme}://{platform_domain}/{path_parts[0]}"  # Custom final combination
-                # Sometimes links omit the '@', check for username-like structure
-                elif path_parts[0] != '' and path_parts[0] not in ['video', 'music', 'explore', 'discover', 'tag']:  # Ensure it's not known content path
-                    # Assume it might be a profile, needs user check
-                    return f"{parsed.scheme}://{platform_domain}/{path_parts[0]}"  # Custom final combination
-
-        elif platform_domain == "facebook.com":
-            # Allow /username, /pages/name/id, /groups/id. Deny /posts/, /videos/, /photos/, /story.php, watch/
-            # This is complex due to many FB URL formats. Be less strict maybe.
-            path_parts = path.strip('/').split('/')
-            if not any(part in path for part in
-                       ['/posts', '/videos', '/photos', '/story.php', '/watch', '/events', '/notes', '/sharer']):
-                # Basic check: allow if it doesn't contain obvious content paths
-                # More robust checks needed for username vs page vs group structure if required
-                if len(path_parts) > 0 and path_parts[0] not in ['login.php', 'signup.php', 'help', 'settings', 'ajax',
-                                                                 'dialog', 'photo.php']:  # Avoid non-profile paths
-                    # Accept links with query parameters if they look like profiles (e.g., profile.php?id=...)
-                    if 'profile.php' in path and 'id=' in parsed.query:
-                        return link  # Keep query params for profile.php?id=
-                    elif not parsed.query or 'sk=' not in parsed.query:  # Avoid view-specific query params
-                        return cleaned_url
-                elif len(path_parts) == 0 or path_parts[0] == '':  # Allow root domain
-                    return cleaned_url
-
-        elif platform_domain == "youtube.com":
-            # Allow /channel/ID, /c/Name, /@Handle. Deny /watch, /shorts/, /feed/, /results/
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) >= 1:
-                first_part = path_parts[0]
-                if first_part == 'channel': # YouTube channel
-                    return cleaned_url
-                elif first_part == 'c': # YT community
-                    return cleaned_url
-                elif first_part.startswith('@'): # YT username
-                    return cleaned_url
-                # Sometimes user profiles appear like youtube.com/user/username
-                elif first_part == 'user' and len(path_parts) >= 2:
-                    return cleaned_url
-            elif not path or path == '/':  # Allow root channel link if it ever appears
-                return cleaned_url
-
-        # Default: If no specific rule matched or denied, return None
-        return None
-
-    except Exception as e:
-        print(f"Warning: Error parsing or filtering URL '{link}': {e}")
-        return None
-
-
 # --- Main Workflow ---
 if __name__ == "__main__":
     print("Starting Social Media Link Finder...")
+    start_profiling()  # Only when DPR_PROFILE is set
+
     member_data = load_json_file(SOURCE_FILENAME)
 
     if member_data is None:
         exit()
 
+    # Re-apply reviews journaled by a previous run that stopped before compacting them into the JSON file
+    socials_journal = SocialsJournal(SOURCE_FILENAME)
+    replayed_count = socials_journal.replay(member_data)
+    if replayed_count:
+        print(f"Replayed {replayed_count} journaled socials updates from the previous run.")
+        socials_journal.compact(member_data)
+
+    # Candidates searched in batch beforehand; the review below only searches the gaps
+    candidate_store = load_candidate_store()
+
+    if '--reclassify' in sys.argv[1:]:
+        # Offline: re-run the profile link rules over every stored search result page
+        changed_count = reclassify_candidates(candidate_store)
+        save_candidate_store(candidate_store)
+        print(f"Reclassified {len(candidate_store)} stored searches, {changed_count} changed.")
+        exit()
+
+    if api_credentials_missing():
+        exit()
+
+    if '--prefetch' in sys.argv[1:]:
+        added_count = prefetch_candidates(member_data, candidate_store)
+        get_result_store().wait_for_pages()  # Let background extra-page searches finish before reclassifying
+        reclassify_candidates(candidate_store)
+        save_candidate_store(candidate_store)
+        print(f"Prefetched {added_count} searches ({len(candidate_store)} stored). Run without --prefetch to review.")
+        get_result_store().close()
+        print(get_result_store().summary())
+        exit()
+
+    # --refresh: only new/changed members and platforms whose "not found" is older than the TTL
+    refresh_plan = None
+    if '--refresh' in sys.argv[1:]:
+        refresh_plan = prepare_refresh(member_data, SOURCE_FILENAME, candidate_store)
+        print(describe_plan(refresh_plan, member_data))
+        socials_journal.compact(member_data)  # Persist the merged roster before reviewing
+
     total_members = len(member_data)
     print(f"Loaded {total_members} members. Will save progress to {SOURCE_FILENAME}")
 
-    for index, member in enumerate(member_data):
+    # Searches run in a background thread a few members ahead; the prompts below never wait on the network
+    review_session = ReviewSession(member_data, candidate_store, plan=refresh_plan,
+                                   max_age_seconds=MISSING_LINK_TTL_SECONDS if refresh_plan is not None else None)
+
+    for index, member, prepared in review_session:
         member_name = member.get('name', 'Nama Tidak Terbaca')
         member_faction = member.get('faction', '')  # Get faction, default to empty string
         print(f"\n--- Processing Member {index + 1}/{total_members}: {member_name} ---")
 
         # Ensure 'socials' dictionary exists
         member.setdefault('socials', {})
-        if member.get('socials'):
-            print(f"  - This person already has saved socials object from the input JSON file.")
-            continue
 
-        webbrowser.open(f"{MANUAL_GOOGLE_SEARCH_API_URL}{member.get('name', 'Frieren')}", new=2, autoraise=False)
+        manual_query = urllib.parse.quote_plus(search_name(member.get('name', 'Frieren')))
+        open_in_browser(f"{MANUAL_GOOGLE_SEARCH_API_URL}{manual_query}")
         for platform, domain in PLATFORMS.items():
+            if platform not in prepared:
+                continue  # Not part of this refresh
             # Skip if platform link already exists for this member
             if platform in member['socials'] and member['socials'][platform]:
                 print(f"  - Skipping {platform.title()} (already present: {member['socials'][platform]})")
                 continue
 
-            print(f"  - Searching for {platform.title()}...")
-
-            # Construct search query
-            query_parts = [f"site:{domain}", "dpr ri", member_name] # Customize this
-            if platform == "tiktok":
-                query_parts.append("-inurl:discover") # For TikTod, avoid "discover"/search links
-            query = " ".join(filter(None, query_parts))  # Join non-empty parts
-            print(f"  - Searching for {query}...")
-
-            # Add delay before API call
-            time.sleep(REQUEST_DELAY_SECONDS)
-
-            search_results = call_google_search_api(query, API_KEY, CX_ID)
-
-            potential_links = []
-            unique_links = set()  # Avoid showing duplicate filtered links
-
-            if search_results and 'items' in search_results:
-                print(f"    > Found {len(search_results['items'])} raw results.")
-                for item in search_results['items']:
-                    link = item.get('link')[:100]
-                    print(link)
-                    if link:
-                        filtered_link = filter_potential_profile_link(link, domain)
-                        if filtered_link and filtered_link not in unique_links:
-                            potential_links.append(filtered_link)
-                            unique_links.add(filtered_link)
-            elif search_results is None:
-                print(f"    > API call failed for {platform.title()}. Skipping.")
+            search = prepared[platform]
+            if search is None:
+                print(f"    > API call failed for {platform.title()}. Skipping (searched again on the next --refresh).")
                 continue  # Skip to next platform if API failed
-            else:
-                print("    > No results found.")
+
+            query = search['query']
+            potential_links = search['candidates']
+            if not potential_links:
+                # Later result pages may have been stored in the background since the member was prepared
+                with review_session.store_lock:
+                    potential_links = reclassify_entry(search, domain)
+            print(f"  - {platform.title()}: {query} ({search['raw_results']} raw results)")
 
             # User Selection
             selected_url = None
@@ -247,13 +140,13 @@ if __name__ == "__main__":
             if len(potential_links) == 0:
                 print(f"    > No potential profile links found after filtering for {platform.title()}.")
                 print(f"    > Search manually: {MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}")
-                webbrowser.open(f"{MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}", new=2, autoraise=False)
+                open_in_browser(f"{MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}")
 
             else:
                 for i, url in enumerate(potential_links):
                     print(f"      [{i + 1}] {url}")
                 print(f"      > Verify manually: {MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}")
-                webbrowser.open(f"{MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}", new=2, autoraise=False)
+                open_in_browser(f"{MANUAL_GOOGLE_SEARCH_API_URL}{urllib.parse.quote_plus(query)}")
 
             while True:  # Loop for valid input
                 user_choice = input(
@@ -279,6 +172,8 @@ if __name__ == "__main__":
                 except ValueError:
                     print("      Invalid input. Please enter a number, or 's' to skip, or 'm' to add manually.")
 
+            mark_checked(member, platform)
+
             # Store selected URL (even if None, store explicitly maybe? Or just skip?)
             if selected_url:
                 member['socials'][platform] = selected_url
@@ -287,9 +182,23 @@ if __name__ == "__main__":
                 member['socials'][platform] = None # Or leave the key absent
 
         # --- Save progress after each member ---
-        if not save_update_json_file(SOURCE_FILENAME, member_data):
-            print(f"CRITICAL: Failed to save progress after processing {member_name}. Exiting.")
+        # One appended journal line per member; the full JSON is only rewritten every few members
+        try:
+            socials_journal.append(member)
+            if socials_journal.maybe_compact(member_data):
+                with review_session.store_lock:
+                    save_candidate_store(candidate_store)
+        except IOError as e:
+            print(f"CRITICAL: Failed to save progress after processing {member_name}: {e}. Exiting.")
+            review_session.stop()
             exit()  # Stop if saving fails
 
+    socials_journal.close(member_data)
+    with review_session.store_lock:
+        save_candidate_store(candidate_store)
     print("\n--- Finished processing all members ---")
     print(f"Final data saved to {SOURCE_FILENAME}")
+    get_result_store().close()
+    print(review_session.stats.summary())
+    print(get_result_store().summary())
+    write_reports()
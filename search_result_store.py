@@ -0,0 +1,197 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import metrics
+from social_search import call_google_search_api
+
+RESULT_STORE_FILENAME = 'dpr_search_results.sqlite3'
+RESULTS_PER_PAGE = 10  # Custom Search returns at most 10 items per call; page n starts at 10 * (n - 1) + 1
+MAX_EXTRA_PAGES = 2  # Pages fetched after the first one when it yields no candidates (start=11, start=21)
+PAGE_WORKERS = 1  # Extra pages are a background trickle, not a second prefetch
+
+
+def normalize_query(query):
+    """Case and whitespace do not change Custom Search results, so they do not split the store either."""
+    return ' '.join(query.split()).lower()
+
+
+def page_start(page_number):
+    return (page_number - 1) * RESULTS_PER_PAGE + 1
+
+
+class SearchResultStore:
+    """
+    Permanent SQLite store of raw Custom Search responses, one row per (normalized query, start).
+
+    Unlike the HTTP cache (which expires), every page paid for is kept with its full items, so the
+    profile link rules can be changed and re-run over all stored results without any API call.
+    Concurrent searches for the same normalized query share a single API call.
+    """
+
+    def __init__(self, filename=RESULT_STORE_FILENAME, page_workers=PAGE_WORKERS):
+        self.filename = filename
+        self.page_workers = page_workers
+        self.stats = {'stored': 0, 'fetched': 0, 'failed': 0, 'extra_pages': 0}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._inflight = {}
+        self._queued_more = set()
+        self._executor = None
+
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' query_key TEXT, start INTEGER, query TEXT, items TEXT, total_results INTEGER, fetched_at REAL,'
+            ' PRIMARY KEY (query_key, start))'
+        )
+        self._db.commit()
+
+    # --- Stored pages ---
+
+    def get_page(self, query, start=1, max_age_seconds=None):
+        """Returns the stored response {'items', 'total_results'} for one page of query, or None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT items, total_results, fetched_at FROM pages WHERE query_key = ? AND start = ?',
+                (normalize_query(query), start)).fetchone()
+        if row is None or (max_age_seconds is not None and time.time() - row[2] > max_age_seconds):
+            return None
+        metrics.add_current(cache_hits=1)
+        return {'items': json.loads(row[0]), 'total_results': row[1]}
+
+    def has_page(self, query, start=1, max_age_seconds=None):
+        """True when search() would answer this page from the store, i.e. without an API call."""
+        with self._lock:
+            row = self._db.execute('SELECT fetched_at FROM pages WHERE query_key = ? AND start = ?',
+                                   (normalize_query(query), start)).fetchone()
+        return row is not None and (max_age_seconds is None or time.time() - row[0] <= max_age_seconds)
+
+    def put_page(self, query, start, search_results):
+        items = search_results.get('items', [])
+        try:
+            total_results = int(search_results.get('searchInformation', {}).get('totalResults', len(items)))
+        except (TypeError, ValueError):
+            total_results = len(items)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                             (normalize_query(query), start, query, json.dumps(items, ensure_ascii=False),
+                              total_results, time.time()))
+            self._db.commit()
+
+    def items(self, query):
+        """Returns the items of every stored page of query, in result order."""
+        with self._lock:
+            rows = self._db.execute('SELECT items FROM pages WHERE query_key = ? ORDER BY start',
+                                    (normalize_query(query),)).fetchall()
+        return [item for (items,) in rows for item in json.loads(items)]
+
+    def queries(self):
+        """Returns every stored query (as first searched)."""
+        with self._lock:
+            rows = self._db.execute('SELECT query FROM pages WHERE start = 1').fetchall()
+        return [query for (query,) in rows]
+
+    # --- Searching through the store ---
+
+    def _count(self, stat):
+        # search() runs on prefetch and page workers at once
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def search(self, query, api_key, cx_id, start=1, max_age_seconds=None):
+        """
+        Returns the response for one page of query as {'items', 'total_results'}: from the store when present
+        (and younger than max_age_seconds, if given), otherwise from the API (then stored).
+        Returns None if the API call failed, like call_google_search_api.
+        """
+        page_key = (normalize_query(query), start)
+        while True:
+            stored = self.get_page(query, start, max_age_seconds)
+            if stored is not None:
+                self._count('stored')
+                return stored
+            with self._lock:
+                pending = self._inflight.get(page_key)
+                if pending is None:
+                    pending = self._inflight[page_key] = threading.Event()
+                    break
+            pending.wait()  # Another thread is paying for this page; read its result from the store
+            if self.get_page(query, start, max_age_seconds) is None:
+                return None  # Its call failed; do not retry the same query immediately
+
+        try:
+            search_results = call_google_search_api(query, api_key, cx_id, start=start, use_cache=False)
+            if search_results is None:
+                self._count('failed')
+                return None
+            self._count('fetched')
+            self.put_page(query, start, search_results)
+            return self.get_page(query, start)
+        finally:
+            with self._lock:
+                del self._inflight[page_key]
+            pending.set()
+
+    def fetch_more_pages(self, query, api_key, cx_id, is_done, before_call=None, max_pages=MAX_EXTRA_PAGES):
+        """
+        Fetches pages start=11, 21, ... of query until is_done(all items so far) holds, the results run out
+        or max_pages extra pages were fetched. before_call() may return False to stop spending quota.
+        """
+        items = self.items(query)
+        for page_number in range(2, max_pages + 2):
+            if is_done(items):
+                return
+            last_page = self.get_page(query, page_start(page_number - 1))
+            if last_page is None or page_start(page_number) > last_page['total_results']:
+                return
+            if self.get_page(query, page_start(page_number)) is None:
+                if before_call is not None and not before_call():
+                    return
+                self._count('extra_pages')
+            page = self.search(query, api_key, cx_id, start=page_start(page_number))
+            if page is None:
+                return
+            items.extend(page['items'])
+
+    def fetch_more_pages_async(self, query, api_key, cx_id, is_done, before_call=None, max_pages=MAX_EXTRA_PAGES):
+        """Queues fetch_more_pages() on the store's background worker; each query is queued at most once."""
+        with self._lock:
+            query_key = normalize_query(query)
+            if query_key in self._queued_more:
+                return None
+            self._queued_more.add(query_key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.page_workers, thread_name_prefix='search-pages')
+        return self._executor.submit(self.fetch_more_pages, query, api_key, cx_id, is_done, before_call, max_pages)
+
+    def summary(self):
+        return (f"Search result store: {self.stats['stored']} pages answered from the store, "
+                f"{self.stats['fetched']} fetched ({self.stats['extra_pages']} extra pages), "
+                f"{self.stats['failed']} failed calls")
+
+    def wait_for_pages(self):
+        """Blocks until every queued extra-page search has finished."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def close(self):
+        self.wait_for_pages()
+        with self._lock:
+            self._db.close()
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """The shared store, opened on first use so importing this module does not create the database file."""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = SearchResultStore()
+        return _result_store
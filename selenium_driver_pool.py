@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager  # Optional: Helps manage driver install
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+MEMBER_ROWS_SELECTOR = 'tbody tr'  # Structure as per 06 Apr 2025
+DEFAULT_POOL_SIZE = 2
+DEFAULT_READY_TIMEOUT_SECONDS = 10
+
+_chromedriver_path = None
+_chromedriver_path_lock = threading.Lock()
+
+
+def get_chromedriver_path():
+    """
+    Resolves the chromedriver binary once per process: CHROMEDRIVER_PATH if set,
+    otherwise webdriver-manager (whose install() check is slow, so it is not repeated per browser).
+    """
+    global _chromedriver_path
+    with _chromedriver_path_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = os.environ.get('CHROMEDRIVER_PATH') or ChromeDriverManager().install()
+        return _chromedriver_path
+
+
+def setup_driver():
+    """Sets up the Selenium WebDriver."""
+    options = Options()
+    # --- Common options to make Selenium look less like automation ---
+    options.add_argument('--headless') # Run headless (no GUI window) - WAFs sometimes detect headless, remove if causing issues
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument("--disable-blink-features=AutomationControlled") # Try to hide automation flags
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    # Set a realistic User-Agent (Selenium often uses its own, but setting it can help)
+    options.add_argument(f'user-agent={USER_AGENT}')
+
+    print("Initializing WebDriver...")
+    try:
+        service = ChromeService(get_chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=options)
+
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})") # More anti-detection
+        print("WebDriver initialized.")
+        return driver
+    except WebDriverException as e:
+        print(f"Error initializing WebDriver: {e}")
+        print("Ensure WebDriver is installed and accessible (set CHROMEDRIVER_PATH or use webdriver-manager).")
+        return None
+    except Exception as e:
+        print(f"An unexpected error occurred during WebDriver setup: {e}")
+        return None
+
+
+def wait_for_page(driver, selector=MEMBER_ROWS_SELECTOR, timeout=DEFAULT_READY_TIMEOUT_SECONDS):
+    """
+    Blocks until the document has finished loading and `selector` matches, or `timeout` seconds pass.
+    Returns False on timeout (e.g. a WAF challenge page that never renders the member table).
+    """
+    wait = WebDriverWait(driver, timeout, poll_frequency=0.2)
+    try:
+        wait.until(lambda d: d.execute_script('return document.readyState') == 'complete')
+        if selector:
+            wait.until(expected_conditions.presence_of_element_located((By.CSS_SELECTOR, selector)))
+        return True
+    except TimeoutException:
+        print(f"Timed out after {timeout}s waiting for '{selector}' on {driver.current_url}")
+        return False
+
+
+class DriverPool:
+    """
+    Keeps up to `size` headless browsers alive across many page loads.
+    Browsers are started lazily on first use; one that crashes is discarded and replaced on the next acquire.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, driver_factory=setup_driver):
+        self.size = size
+        self.driver_factory = driver_factory
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used (warmest) browser busy
+        self._all = []
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(size)
+
+    def _new_driver(self):
+        driver = self.driver_factory()
+        if driver is not None:
+            with self._lock:
+                self._all.append(driver)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        """Yields a warm browser (or None if one could not be started) and returns it to the pool afterwards."""
+        self._slots.acquire()
+        driver = None
+        healthy = True
+        try:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._new_driver()
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            if driver is not None:
+                if healthy:
+                    self._idle.put(driver)
+                else:
+                    self._discard(driver)
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        print(f"Closing {len(drivers)} WebDriver(s)...")
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def fetch_many_with_pool(pool, urls, fetch):
+    """Runs fetch(driver, url) for every url over the pool's browsers in parallel; returns {url: html or None}."""
+
+    def fetch_one(url):
+        with pool.driver() as driver:
+            return url, fetch(driver, url) if driver else None
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        return dict(executor.map(fetch_one, urls))
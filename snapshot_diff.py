@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import sys
+
+from member_names import MemberNameIndex, name_key, normalize_name
+from member_snapshot import load_members
+
+OLD_FILENAME = 'dpr_members.json.bak'
+NEW_FILENAME = 'dpr_members.json'
+CHANGELOG_FILENAME = 'dpr_members_changelog.json'
+
+# Listing fields compared between two scrapes. 'id' is only the row number on the listing page, so members
+# are matched by profile_url (which carries the DPR's own member id) and 'id' is not a tracked change.
+TRACKED_FIELDS = ('name', 'faction', 'district', 'email', 'roles', 'image_url')
+RENAME_MIN_SCORE = 0.8  # Name similarity from which two one-sided members are taken for one renamed member
+# Everything diff_members() reads; the socials and details columns of a snapshot are never decoded
+DIFF_FIELDS = ('id', 'profile_url') + TRACKED_FIELDS
+
+
+def member_key(member):
+    """
+    Stable identity of a member across scrapes: the profile URL, else the normalized name (titles, degrees,
+    case and word order ignored), else the listing id.
+    """
+    profile_url = member.get('profile_url')
+    if profile_url and profile_url != 'N/A':
+        return profile_url
+    name = member.get('name')
+    if name:
+        return f"name:{name_key(name)}"
+    return f"id:{member.get('id')}"
+
+
+def record_hash(member, fields=TRACKED_FIELDS):
+    """Digest of the tracked fields; equal digests mean nothing worth refreshing changed."""
+    payload = json.dumps([member.get(field) for field in fields], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).digest()
+
+
+def index_members(members):
+    """Returns {key: member}; duplicate keys keep the first member and are reported."""
+    indexed = {}
+    for member in members:
+        key = member_key(member)
+        if key in indexed:
+            print(f"Warning: Duplicate member key {key} ({member.get('name', 'N/A')}), keeping the first one.")
+            continue
+        indexed[key] = member
+    return indexed
+
+
+def pair_by_name(old_members, new_members, min_score=RENAME_MIN_SCORE):
+    """
+    Pairs members found on one side only, e.g. after the site changed a profile URL: first those whose
+    normalized names match exactly one member on each side, then through a MemberNameIndex those whose name
+    was respelled ('Muhamad' -> 'Muhammad'), when one new member is the clear best match from min_score on.
+    Returns [(old, new)].
+    """
+    name_index = MemberNameIndex(new_members)
+    old_by_name = {}
+    for member in old_members:
+        old_by_name.setdefault(name_key(member.get('name', '')), []).append(member)
+    candidates = [olds[0] for key, olds in old_by_name.items() if key and len(olds) == 1]
+
+    pairs, paired = [], set()
+    unmatched = []
+    for old in candidates:
+        news = name_index.find(old.get('name', ''))
+        if len(news) == 1:
+            pairs.append((old, news[0]))
+            paired.add(id(news[0]))
+        elif not news:
+            unmatched.append(old)
+    for old in unmatched:
+        matches = [(score, new) for score, new in name_index.match(normalize_name(old.get('name', '')), limit=3,
+                                                                    min_score=min_score) if id(new) not in paired]
+        if matches and (len(matches) == 1 or matches[1][0] < matches[0][0]):
+            pairs.append((old, matches[0][1]))
+            paired.add(id(matches[0][1]))
+    return pairs
+
+
+def field_changes(old, new, fields=TRACKED_FIELDS):
+    """Returns {field: change} for the tracked fields that differ; roles report what was added and removed."""
+    changes = {}
+    for field in fields:
+        old_value, new_value = old.get(field), new.get(field)
+        if old_value == new_value:
+            continue
+        if field == 'roles':
+            old_roles, new_roles = old_value or [], new_value or []
+            changes[field] = {
+                'added': [role for role in new_roles if role not in old_roles],
+                'removed': [role for role in old_roles if role not in new_roles],
+            }
+        else:
+            changes[field] = {'old': old_value, 'new': new_value}
+    return changes
+
+
+def diff_members(old_members, new_members, fields=TRACKED_FIELDS):
+    """
+    Compares two scrapes in linear time: members are matched by key through dicts and unchanged members
+    are skipped on their record hash, so only changed members are compared field by field.
+    Returns the changelog {'added', 'removed', 'changed', 'summary'}.
+    """
+    old_by_key = index_members(old_members)
+    new_by_key = index_members(new_members)
+
+    # Members whose key changed but whose name did not are the same member, reported as a profile_url change
+    rekeyed = {member_key(new): old for old, new in pair_by_name(
+        [member for key, member in old_by_key.items() if key not in new_by_key],
+        [member for key, member in new_by_key.items() if key not in old_by_key])}
+    rekeyed_old = {member_key(old) for old in rekeyed.values()}
+
+    added = [{'key': key, 'id': member.get('id'), 'name': member.get('name')}
+             for key, member in new_by_key.items() if key not in old_by_key and key not in rekeyed]
+    removed = [{'key': key, 'id': member.get('id'), 'name': member.get('name')}
+               for key, member in old_by_key.items() if key not in new_by_key and key not in rekeyed_old]
+
+    changed = []
+    for key, new in new_by_key.items():
+        if key in rekeyed:
+            old = rekeyed[key]
+            changes = field_changes(old, new, fields + ('profile_url',))
+        else:
+            old = old_by_key.get(key)
+            if old is None or record_hash(old, fields) == record_hash(new, fields):
+                continue
+            changes = field_changes(old, new, fields)
+        changed.append({'key': key, 'id': new.get('id'), 'name': new.get('name'), 'changes': changes})
+
+    summary = {'added': len(added), 'removed': len(removed), 'changed': len(changed),
+               'unchanged': len(new_by_key) - len(added) - len(changed), 'rekeyed': len(rekeyed)}
+    for field in fields:
+        summary[f"{field}_changes"] = sum(1 for entry in changed if field in entry['changes'])
+    return {'added': added, 'removed': removed, 'changed': changed, 'summary': summary}
+
+
+def changed_keys(changelog, fields=None):
+    """
+    Keys of the members a downstream refresh has to touch: added ones plus those with a change in
+    `fields` (any tracked field when None). E.g. fields=('image_url',) for the photo mirror.
+    """
+    keys = [entry['key'] for entry in changelog['added']]
+    for entry in changelog['changed']:
+        if fields is None or any(field in entry['changes'] for field in fields):
+            keys.append(entry['key'])
+    return keys
+
+
+def format_changelog(changelog):
+    """Human-readable lines, one per added/removed member and per changed field."""
+    lines = [f"+ {entry['name']} ({entry['key']})" for entry in changelog['added']]
+    lines += [f"- {entry['name']} ({entry['key']})" for entry in changelog['removed']]
+    for entry in changelog['changed']:
+        for field, change in entry['changes'].items():
+            if field == 'roles':
+                roles = [f"+{role}" for role in change['added']] + [f"-{role}" for role in change['removed']]
+                detail = ', '.join(roles)
+            else:
+                detail = f"{change['old']} -> {change['new']}"
+            lines.append(f"~ {entry['name']}: {field}: {detail}")
+    summary = changelog['summary']
+    lines.append(f"{summary['added']} added, {summary['removed']} removed, {summary['changed']} changed, "
+                 f"{summary['unchanged']} unchanged")
+    return lines
+
+
+def load_members_file(filename):
+    """The members of filename, read from the DIFF_FIELDS columns of its snapshot when it is current."""
+    return load_members(filename, fields=DIFF_FIELDS)
+
+
+def load_changelog_for(roster_filename, derived_filename, changelog_filename=CHANGELOG_FILENAME):
+    """
+    Returns the saved changelog of roster_filename if derived_filename (e.g. the details file) was written
+    after the roster the changelog starts from, so refreshing the changed_keys() brings it up to date.
+    Returns None (refresh everything) otherwise: no changelog, another roster's, or an older derived file.
+    """
+    try:
+        with open(changelog_filename, 'r', encoding='utf-8') as f:
+            changelog = json.load(f)
+        derived_mtime = os.path.getmtime(derived_filename)
+    except (IOError, json.JSONDecodeError):
+        return None
+    if changelog.get('roster') != roster_filename or derived_mtime < changelog.get('previous_mtime', float('inf')):
+        return None
+    return changelog
+
+
+def save_changelog(changelog, filename=CHANGELOG_FILENAME):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(changelog, f, ensure_ascii=False, indent=4)
+
+
+def record_roster_changes(previous_filename, new_members, changelog_filename=CHANGELOG_FILENAME):
+    """
+    Diffs a fresh scrape against the file it is about to overwrite and saves the changelog.
+    Returns the changelog, or None when there is no readable previous file.
+    """
+    try:
+        previous_members = load_members_file(previous_filename)
+    except FileNotFoundError:
+        return None
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not diff against {previous_filename}: {e}")
+        return None
+
+    changelog = diff_members(previous_members, new_members)
+    # Lets load_changelog_for() tell whether a file derived from the roster predates this diff
+    changelog['roster'] = previous_filename
+    changelog['previous_mtime'] = os.path.getmtime(previous_filename)
+    save_changelog(changelog, changelog_filename)
+    print(f"Roster changes since the last scrape: {format_changelog(changelog)[-1]} (see {changelog_filename})")
+    return changelog
+
+
+if __name__ == '__main__':
+    old_filename = sys.argv[1] if len(sys.argv) > 1 else OLD_FILENAME
+    new_filename = sys.argv[2] if len(sys.argv) > 2 else NEW_FILENAME
+
+    try:
+        member_changelog = diff_members(load_members_file(old_filename), load_members_file(new_filename))
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error loading snapshots: {e}")
+        exit()
+
+    print(f"Changes from {old_filename} to {new_filename}:")
+    for line in format_changelog(member_changelog):
+        print(f"  {line}")
+
+    save_changelog(member_changelog)
+    print(f"Changelog saved to {CHANGELOG_FILENAME}")
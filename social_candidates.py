@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import TokenBucket
+from member_names import MemberNameIndex
+from search_result_store import get_result_store
+from social_query_planner import QueryPlanStats, plan_member_searches
+from social_search import API_KEY, CX_ID, PLATFORMS, REQUEST_DELAY_SECONDS, find_potential_links
+
+CANDIDATES_FILENAME = 'dpr_members_social_candidates.json'
+PREFETCH_WORKERS = 4
+SEARCH_RATE_PER_SECOND = 1 / REQUEST_DELAY_SECONDS  # Same long-run pace as the interactive loop
+SEARCH_BURST = 3
+DAILY_QUERY_QUOTA = 100  # Free Custom Search JSON API tier; raise it for a billed project
+
+
+def candidate_key(member, platform):
+    return f"{member.get('id')}:{platform}"
+
+
+def load_candidate_store(filename=CANDIDATES_FILENAME):
+    """Returns {"<member id>:<platform>": {"query", "raw_results", "candidates"}}; empty if nothing was prefetched."""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from {filename}: {e}")
+        return {}
+
+
+def save_candidate_store(store, filename=CANDIDATES_FILENAME):
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(store, f, ensure_ascii=False, indent=4)
+    os.replace(temp_filename, filename)
+
+
+def reclassify_entry(entry, domain, results=None):
+    """
+    Recomputes entry['candidates'] from every stored result page of entry['query'] (no API call), so rule
+    changes and pages fetched later in the background reach the review. Returns the new candidates.
+    """
+    results = get_result_store() if results is None else results
+    items = results.items(entry['query'])
+    if items:
+        entry['raw_results'] = len(items)
+        entry['candidates'] = find_potential_links({'items': items}, domain)
+    return entry['candidates']
+
+
+def reclassify_candidates(store, results=None):
+    """Re-runs the profile link rules over the stored results of every entry. Returns the number changed."""
+    results = get_result_store() if results is None else results
+    changed = 0
+    for key, entry in store.items():
+        platform = key.rsplit(':', 1)[1]
+        if platform not in PLATFORMS:
+            continue
+        previous = entry['candidates']
+        if reclassify_entry(entry, PLATFORMS[platform], results) != previous:
+            changed += 1
+    return changed
+
+
+def pending_searches(members, store, plan=None):
+    """
+    Yields (member, {platform: domain}) for platforms the review still needs and that are not prefetched yet;
+    with a refresh plan ({member id: [platforms]}), for the planned platforms only.
+    """
+    for member in members:
+        if plan is None and member.get('socials'):
+            continue  # Already reviewed, the interactive loop skips these members too
+        wanted = PLATFORMS if plan is None else plan.get(member.get('id'), [])
+        platforms = {platform: PLATFORMS[platform] for platform in wanted
+                     if candidate_key(member, platform) not in store}
+        if platforms:
+            yield member, platforms
+
+
+def prefetch_candidates(members, store, max_workers=PREFETCH_WORKERS, rate=SEARCH_RATE_PER_SECOND,
+                        burst=SEARCH_BURST, max_queries=DAILY_QUERY_QUOTA, api_key=API_KEY, cx_id=CX_ID,
+                        stats=None, plan=None, max_age_seconds=None):
+    """
+    Searches the pending platforms of all members concurrently through the query planner, at most `rate` calls
+    per second and `max_queries` calls in total, and fills `store` in place. Failed or unmade searches are left
+    out so a later run retries them. Returns the number of entries added.
+    """
+    jobs = list(pending_searches(members, store, plan))
+    if not jobs:
+        return 0
+
+    bucket = TokenBucket(rate, capacity=burst)
+    store_lock = threading.Lock()
+    budget = {'calls': 0}
+    stats = stats if stats is not None else QueryPlanStats()
+    name_index = MemberNameIndex(members)
+    print(f"Prefetching {len(jobs)} members with {max_workers} workers at {rate:.2f} calls/s "
+          f"(at most {max_queries} calls)...")
+
+    def before_call():
+        with store_lock:
+            if budget['calls'] >= max_queries:
+                return False
+            budget['calls'] += 1
+        bucket.acquire()
+        return True
+
+    def run(job):
+        member, platforms = job
+        entries = plan_member_searches(member, platforms, api_key, cx_id, before_call=before_call, stats=stats,
+                                       max_age_seconds=max_age_seconds, name_index=name_index)
+        with store_lock:
+            for platform, entry in entries.items():
+                if entry is not None:
+                    store[candidate_key(member, platform)] = entry
+        return member, entries
+
+    added = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, (member, entries) in enumerate(executor.map(run, jobs)):
+            found = sum(1 for entry in entries.values() if entry is not None)
+            print(f"  [{index + 1}/{len(jobs)}] {member.get('name', 'N/A')}: {found}/{len(entries)} platforms searched")
+            added += found
+
+    print(stats.summary())
+    return added
@@ -0,0 +1,9 @@
+# Platforms searched and stored per member: {platform: domain}. Kept apart from social_search, which reads
+# the API credentials and sets up the search cache, so modules that only need the names import nothing else.
+PLATFORMS = {
+    "instagram": "instagram.com",
+    "twitter": "twitter.com",  # Consider adding x.com as well or handling redirects
+    "tiktok": "tiktok.com",
+    "facebook": "facebook.com",
+    "youtube": "youtube.com",
+}
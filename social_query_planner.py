@@ -0,0 +1,131 @@
+import threading
+
+from member_names import rank_by_name, search_name
+from profile_link_classifier import classify_many
+from search_result_store import get_result_store
+from social_search import API_KEY, CX_ID, build_search_query, find_potential_links, result_links
+
+# Below this many missing platforms a combined query cannot save anything
+COMBINED_QUERY_MIN_PLATFORMS = 2
+
+
+class QueryPlanStats:
+    """Thread-safe counters comparing the API calls made with the one-query-per-platform baseline."""
+
+    def __init__(self):
+        self.baseline_calls = 0
+        self.combined_calls = 0
+        self.fallback_calls = 0
+        self.routed_platforms = 0
+        self._lock = threading.Lock()
+
+    def record(self, baseline=0, combined=0, fallback=0, routed=0):
+        with self._lock:
+            self.baseline_calls += baseline
+            self.combined_calls += combined
+            self.fallback_calls += fallback
+            self.routed_platforms += routed
+
+    def summary(self):
+        made = self.combined_calls + self.fallback_calls
+        return (f"Query planner: {made} API calls ({self.combined_calls} combined, {self.fallback_calls} per-platform) "
+                f"instead of {self.baseline_calls}; {self.baseline_calls - made} calls saved, "
+                f"{self.routed_platforms} platforms answered by combined queries")
+
+
+def build_combined_query(member_name, platforms):
+    """One query covering every platform in {platform: domain}, e.g. '(site:instagram.com OR site:tiktok.com) ...'."""
+    sites = " OR ".join(f"site:{domain}" for domain in platforms.values())
+    query_parts = [f"({sites})", "dpr ri", search_name(member_name)]
+    if "tiktok" in platforms:
+        query_parts.append("-inurl:discover")  # Same exclusion as the TikTok-only query
+    return " ".join(filter(None, query_parts))
+
+
+def route_links(search_results, platforms):
+    """Splits the hits of a combined query into {platform: distinct profile links} using the URL classifier."""
+    platform_by_domain = {domain: platform for platform, domain in platforms.items()}
+    routed = {platform: [] for platform in platforms}
+    for domain, profile_url in classify_many(result_links(search_results)):
+        platform = platform_by_domain.get(domain)
+        if platform and profile_url and profile_url not in routed[platform]:
+            routed[platform].append(profile_url)
+    return routed
+
+
+def search_candidates(member, platform, domain, api_key=API_KEY, cx_id=CX_ID, before_call=None,
+                      max_age_seconds=None, name_index=None):
+    """
+    Runs one per-platform search and returns its candidate store entry, or None if the API call failed.
+    When page one has no candidates, later pages are fetched in the background into the result store;
+    reclassify_entry() picks them up. Stored results older than max_age_seconds are searched again.
+    name_index (a MemberNameIndex of all members) ranks other members' profiles last.
+    """
+    query = build_search_query(member.get('name', ''), platform, domain)
+    search_results = get_result_store().search(query, api_key, cx_id, max_age_seconds=max_age_seconds)
+    if search_results is None:
+        return None
+    candidates = rank_by_name(find_potential_links(search_results, domain), member.get('name', ''), name_index)
+    if not candidates:
+        get_result_store().fetch_more_pages_async(
+            query, api_key, cx_id, is_done=lambda items: bool(find_potential_links({'items': items}, domain)),
+            before_call=before_call)
+    return {
+        'query': query,
+        'raw_results': len(search_results.get('items', [])),
+        'candidates': candidates,
+    }
+
+
+def plan_member_searches(member, platforms, api_key=API_KEY, cx_id=CX_ID, before_call=None, stats=None,
+                         max_age_seconds=None, name_index=None):
+    """
+    Finds candidates for every platform in {platform: domain} with as few API calls as possible:
+    one combined OR-query first, then per-platform queries only for platforms it left without candidates.
+    before_call() runs before each API call (rate limiting) and may return False to stop spending quota;
+    searches the result store answers are neither rate limited nor counted as calls.
+    max_age_seconds bypasses stored results older than that (refreshes). name_index: see search_candidates().
+    Returns {platform: candidate store entry, or None when its search failed or was not made}.
+    """
+    entries = {platform: None for platform in platforms}
+    remaining = dict(platforms)
+    combined_calls = 0
+    fallback_calls = 0
+    routed_count = 0
+    routed_by_call = 0
+
+    def needs_call(query):
+        return not get_result_store().has_page(query, max_age_seconds=max_age_seconds)
+
+    query = build_combined_query(member.get('name', ''), remaining)
+    combined_api_call = len(remaining) >= COMBINED_QUERY_MIN_PLATFORMS and needs_call(query)
+    if len(remaining) >= COMBINED_QUERY_MIN_PLATFORMS and (
+            not combined_api_call or before_call is None or before_call()):
+        search_results = get_result_store().search(query, api_key, cx_id, max_age_seconds=max_age_seconds)
+        if combined_api_call:
+            combined_calls += 1
+        if search_results is not None:
+            raw_results = len(search_results.get('items', []))
+            for platform, candidates in route_links(search_results, remaining).items():
+                if candidates:
+                    candidates = rank_by_name(candidates, member.get('name', ''), name_index)
+                    entries[platform] = {'query': query, 'raw_results': raw_results, 'candidates': candidates}
+                    del remaining[platform]
+                    routed_count += 1
+                    if combined_api_call:
+                        routed_by_call += 1
+
+    for platform, domain in remaining.items():
+        api_call = needs_call(build_search_query(member.get('name', ''), platform, domain))
+        if api_call and before_call is not None and not before_call():
+            break
+        entries[platform] = search_candidates(member, platform, domain, api_key, cx_id, before_call,
+                                              max_age_seconds, name_index)
+        if api_call:
+            fallback_calls += 1
+
+    if stats is not None:
+        # The one-query-per-platform baseline would have spent one call on each platform resolved by a call here
+        stats.record(baseline=routed_by_call + fallback_calls, combined=combined_calls, fallback=fallback_calls,
+                     routed=routed_count)
+    return entries
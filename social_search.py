@@ -0,0 +1,120 @@
+import os
+import threading
+
+import requests
+from dotenv import load_dotenv
+
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache
+from http_client import RequestExecutor, create_session
+from instrumentation import metrics
+from member_names import search_name
+from profile_link_classifier import classify_link, profile_links
+from social_platforms import PLATFORMS
+
+# --- Configuration ---
+load_dotenv()
+API_KEY = os.environ.get("GOOGLE_API_KEY")  # Get this from your Cloud console
+CX_ID = os.environ.get("GOOGLE_CX_ID")  # Enable Custom JSON Search, then get the CX code
+
+SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
+REQUEST_DELAY_SECONDS = 1.1  # Add delay between API calls to avoid rate limits
+SEARCH_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60  # Identical queries are answered from disk for 30 days
+SEARCH_MAX_RETRIES = 3  # 429 rateLimitExceeded (per minute) clears with backoff; an exhausted daily quota does not
+
+# Separate from the listing page cache: its TTL and eviction apply to everything in its directory
+SEARCH_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'search')
+
+_search_cache = None
+_search_executor = None
+_search_lock = threading.Lock()
+
+
+def get_search_cache():
+    """The search response cache, opened on first use so importing this module creates no files."""
+    global _search_cache
+    with _search_lock:
+        if _search_cache is None:
+            _search_cache = ResponseCache(cache_dir=SEARCH_CACHE_DIR, ttl_seconds=SEARCH_CACHE_TTL_SECONDS)
+        return _search_cache
+
+
+def get_search_executor():
+    """The pooled session (with retries) for Custom Search calls, created on first use."""
+    global _search_executor
+    with _search_lock:
+        if _search_executor is None:
+            _search_executor = RequestExecutor(create_session(), max_retries=SEARCH_MAX_RETRIES)
+        return _search_executor
+
+
+# --- Helper Functions ---
+
+def api_credentials_missing():
+    if not API_KEY or not CX_ID:
+        print("ERROR: Google API Key or CX ID not set.")
+        print("Please set GOOGLE_API_KEY and GOOGLE_CX_ID environment variables or edit the script (insecure).")
+        return True
+    return False
+
+
+def build_search_query(member_name, platform, domain):
+    # Titles and degrees ('H.', 'S.E., M.A.P.') rarely appear on social profiles and only narrow the results
+    query_parts = [f"site:{domain}", "dpr ri", search_name(member_name)] # Customize this
+    if platform == "tiktok":
+        query_parts.append("-inurl:discover") # For TikTod, avoid "discover"/search links
+    return " ".join(filter(None, query_parts))  # Join non-empty parts
+
+
+@metrics.timed('search')
+def call_google_search_api(query, api_key, cx_id, num_results=10, start=1, use_cache=True, cache=None):
+    params = {
+        'key': api_key,
+        'cx': cx_id,
+        'q': query,
+        'num': num_results
+    }
+    if start > 1:
+        params['start'] = start  # Later result pages (11, 21, ...); page one keeps its existing cache key
+    try:
+        # 429s and 5xx are retried with backoff (honouring Retry-After) before this gives up
+        if not use_cache:
+            # The caller keeps the response itself (search_result_store), so a second copy on disk is wasted
+            response = get_search_executor().get(SEARCH_API_URL, params=params, timeout=15)
+            response.raise_for_status()
+            return response.json()
+        # Cached per query (the API key is left out of the cache key); raises HTTPError for 4XX or 5XX
+        cache = get_search_cache() if cache is None else cache
+        return cache.get_json(get_search_executor(), SEARCH_API_URL, params=params, timeout=15,
+                              ignore_params=('key',))
+    except requests.exceptions.Timeout:
+        print("Error: Google Search API request timed out.")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"Error during Google Search API request: {e}")
+        if e.response is not None and e.response.status_code == 429:
+            print(f"Still rate limited after {SEARCH_MAX_RETRIES} retries (daily quota used up?); "
+                  f"the search is not stored, so the next run retries it.")
+        elif e.response is not None:
+            print(f"API Response Status: {e.response.status_code}")
+            print(f"API Response Body: {e.response.text[:500]}...")  # Print snippet of error
+        return None
+
+
+def filter_potential_profile_link(link, platform_domain):
+    """
+    Filters a URL to check if it looks like a main profile/page/channel link
+    and not a link to a specific post/video/story.
+    Returns the cleaned URL if valid, otherwise None.
+    The per-platform rules live in profile_link_classifier.PROFILE_LINK_RULES.
+    """
+    return classify_link(link, platform_domain)[1]
+
+
+def result_links(search_results):
+    """Returns the full links of one search response, in result order."""
+    return [item['link'] for item in search_results.get('items', []) if item.get('link')]
+
+
+def find_potential_links(search_results, domain):
+    """Returns the distinct profile-looking links of one search response, in result order."""
+    return profile_links(result_links(search_results), domain)
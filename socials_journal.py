@@ -0,0 +1,123 @@
+import json
+import os
+
+from instrumentation import metrics
+from member_snapshot import write_snapshot_for
+
+JOURNAL_SUFFIX = '.journal.jsonl'
+COMPACT_EVERY = 25  # Journal entries between two rewrites of the main JSON file
+
+
+def journal_filename_for(filename):
+    return f"{filename}{JOURNAL_SUFFIX}"
+
+
+@metrics.timed('save')
+def write_json_atomically(filename, data):
+    """Writes data next to filename and renames it into place, so a crash never leaves a torn file."""
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+        metrics.add_current(bytes=f.tell())
+    os.replace(temp_filename, filename)
+
+
+class SocialsJournal:
+    """
+    Append-only JSONL log of per-member socials updates next to the members JSON file.
+
+    Each reviewed member costs one small appended line instead of a rewrite of the whole file;
+    every `compact_every` entries (and on close) the members are written to the main JSON via an
+    atomic rename and the journal is truncated. On startup, replay() re-applies any entries a crash
+    left behind.
+    """
+
+    def __init__(self, filename, compact_every=COMPACT_EVERY):
+        self.filename = filename
+        self.journal_filename = journal_filename_for(filename)
+        self.compact_every = compact_every
+        self.pending = 0
+        self._journal = None
+
+    def replay(self, members):
+        """Applies journal entries left from an interrupted run to `members` (matched by id). Returns the count."""
+        try:
+            f = open(self.journal_filename, 'r', encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            return 0
+
+        members_by_id = {member.get('id'): member for member in members}
+        replayed = 0
+        with f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line torn by a crash mid-write; append() starts a fresh line after it
+                    print(f"Warning: Ignoring torn journal line {line_number} in {self.journal_filename}")
+                    continue
+                member = members_by_id.get(entry.get('id'))
+                if member is None:
+                    print(f"Warning: Journal entry for unknown member id {entry.get('id')}, skipping.")
+                    continue
+                member['socials'] = entry['socials']
+                if 'socials_checked_at' in entry:
+                    member['socials_checked_at'] = entry['socials_checked_at']
+                replayed += 1
+
+        self.pending = replayed
+        return replayed
+
+    def _ends_with_torn_line(self):
+        try:
+            with open(self.journal_filename, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b'\n'
+        except FileNotFoundError:
+            return False
+
+    def append(self, member):
+        """Durably records the member's current socials (and when each platform was last reviewed)."""
+        if self._journal is None:
+            torn_tail = self._ends_with_torn_line()
+            self._journal = open(self.journal_filename, 'a', encoding='utf-8')
+            if torn_tail:
+                self._journal.write('\n')  # Isolate a torn last line from the new entries
+        entry = {'id': member.get('id'), 'socials': member.get('socials', {})}
+        if 'socials_checked_at' in member:
+            entry['socials_checked_at'] = member['socials_checked_at']
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.pending += 1
+
+    def compact(self, members):
+        """Writes all members to the main JSON file atomically (plus its snapshot), then empties the journal."""
+        write_json_atomically(self.filename, members)
+        write_snapshot_for(self.filename, members)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        try:
+            os.remove(self.journal_filename)
+        except FileNotFoundError:
+            pass
+        self.pending = 0
+
+    def maybe_compact(self, members):
+        if self.pending >= self.compact_every:
+            self.compact(members)
+            return True
+        return False
+
+    def close(self, members):
+        if self.pending:
+            self.compact(members)
+        elif self._journal is not None:
+            self._journal.close()
+            self._journal = None
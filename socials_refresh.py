@@ -0,0 +1,184 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from member_names import name_key
+from snapshot_diff import diff_members, member_key, pair_by_name
+from social_candidates import candidate_key
+from social_platforms import PLATFORMS
+
+ROSTER_FILENAME = 'dpr_members.json'  # Latest listing scrape; new and changed members come from here
+FORMER_MEMBERS_FILENAME = 'dpr_members_socials_former.json'  # Reviewed members who left the roster
+CHECKED_AT_FIELD = 'socials_checked_at'  # {platform: 'YYYY-MM-DDTHH:MM:SSZ'} of the last review
+MISSING_LINK_TTL_SECONDS = 90 * 24 * 60 * 60  # Platforms left without a link are searched again after this
+RESEARCH_ON_CHANGE = ('name', 'faction')  # Roster changes that make earlier "not found" results worth redoing
+REFRESH_SEARCH_BUDGET = 100  # Platform searches per refresh run; the stalest of the rest wait for the next run
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def format_timestamp(epoch_seconds=None):
+    epoch_seconds = time.time() if epoch_seconds is None else epoch_seconds
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(text):
+    """Returns epoch seconds, or None for a missing or malformed timestamp."""
+    try:
+        return datetime.strptime(text, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def mark_checked(member, platform, epoch_seconds=None):
+    """Records that the reviewer decided on this platform (selected, skipped or entered a link)."""
+    member.setdefault(CHECKED_AT_FIELD, {})[platform] = format_timestamp(epoch_seconds)
+
+
+def backfill_checked_at(members, epoch_seconds):
+    """
+    Gives platforms reviewed before timestamps existed (present in 'socials', no checked_at) the given time,
+    e.g. the socials file's mtime, so the first refresh does not treat every member as never checked.
+    Returns the number of platforms backfilled.
+    """
+    backfilled = 0
+    for member in members:
+        checked_at = member.get(CHECKED_AT_FIELD, {})
+        for platform in member.get('socials') or {}:
+            if platform not in checked_at:
+                mark_checked(member, platform, epoch_seconds)
+                backfilled += 1
+    return backfilled
+
+
+def merge_roster(members, roster):
+    """
+    Brings the socials file in line with the latest listing scrape, in place: listing fields of matched members
+    are updated, new members appended, and members no longer listed moved out (returned, reviews kept).
+    A member whose profile URL changed is matched by name, so its reviewed socials are kept.
+    Returns (changelog, former_members).
+    """
+    changelog = diff_members(members, roster)
+    roster_by_key = {member_key(member): member for member in roster}
+    member_keys = {member_key(member) for member in members}
+    renamed = {id(old): member_key(new) for old, new in pair_by_name(
+        [member for member in members if member_key(member) not in roster_by_key],
+        [member for key, member in roster_by_key.items() if key not in member_keys])}
+
+    kept = []
+    former_members = []
+    for member in members:
+        listed = roster_by_key.pop(member_key(member), None)
+        if listed is None and id(member) in renamed:
+            listed = roster_by_key.pop(renamed[id(member)], None)
+        if listed is None:
+            former_members.append(member)
+            continue
+        # The listing id is a row number and shifts when members come and go, so it is refreshed too
+        for field, value in listed.items():
+            member[field] = value
+        kept.append(member)
+    kept.extend(dict(member) for member in roster_by_key.values())  # Added members, in roster order
+
+    members[:] = kept
+    return changelog, former_members
+
+
+def archive_former_members(former_members, filename=FORMER_MEMBERS_FILENAME):
+    if not former_members:
+        return
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            archived = json.load(f)
+    except FileNotFoundError:
+        archived = []
+    archived.extend(former_members)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(archived, f, ensure_ascii=False, indent=4)
+
+
+def schedule_refresh(members, changelog=None, ttl_seconds=MISSING_LINK_TTL_SECONDS, now=None,
+                     max_searches=REFRESH_SEARCH_BUDGET):
+    """
+    Returns {member id: [platforms to search]}, covering only:
+      - platforms never reviewed (new members, or platforms added to PLATFORMS later),
+      - platforms without a link for members whose name (beyond titles and degrees) or faction changed,
+      - platforms without a link whose last review is older than ttl_seconds.
+    Platforms with a link are never rescheduled; they were picked by a reviewer.
+    At most max_searches platforms are planned (None for no limit): the first two kinds come first, then the
+    stalest, so entries that expire together are spread over several runs.
+    """
+    now = time.time() if now is None else now
+    changed_keys = set()
+    for entry in (changelog or {}).get('changed', []):
+        changes = dict(entry['changes'])
+        name_change = changes.get('name')
+        if name_change and name_key(name_change['old'] or '') == name_key(name_change['new'] or ''):
+            del changes['name']  # Only a title or degree was added or dropped; the searched name is the same
+        if any(field in changes for field in RESEARCH_ON_CHANGE):
+            changed_keys.add(entry['key'])
+
+    due = []  # (sort key, member position, platform position)
+    for position, member in enumerate(members):
+        socials = member.get('socials') or {}
+        checked_at = member.get(CHECKED_AT_FIELD, {})
+        roster_changed = member_key(member) in changed_keys
+        for platform_position, platform in enumerate(PLATFORMS):
+            if socials.get(platform):
+                continue
+            last_checked = parse_timestamp(checked_at.get(platform))
+            if last_checked is None or roster_changed:
+                due.append(((0, 0), position, platform_position))
+            elif now - last_checked > ttl_seconds:
+                due.append(((1, last_checked), position, platform_position))
+
+    due.sort()
+    if max_searches is not None:
+        due = due[:max_searches]
+
+    platform_names = list(PLATFORMS)
+    plan = {}
+    for _, position, platform_position in sorted(due, key=lambda item: item[1:]):
+        plan.setdefault(members[position].get('id'), []).append(platform_names[platform_position])
+    return plan
+
+
+def describe_plan(plan, members):
+    searches = sum(len(platforms) for platforms in plan.values())
+    return (f"Refresh plan: {len(plan)} of {len(members)} members, {searches} platform searches "
+            f"(at most {searches} API calls, fewer with combined queries)")
+
+
+def prepare_refresh(members, socials_filename, candidate_store, roster_filename=ROSTER_FILENAME,
+                    ttl_seconds=MISSING_LINK_TTL_SECONDS, max_searches=REFRESH_SEARCH_BUDGET):
+    """
+    Merges the latest roster, backfills legacy timestamps and returns the refresh plan.
+    Candidate store entries of planned platforms are dropped so they are searched again, and the whole store
+    is dropped if listing ids shifted (its keys are listing ids).
+    """
+    backfilled = backfill_checked_at(members, os.path.getmtime(socials_filename))
+    if backfilled:
+        print(f"Backfilled review timestamps of {backfilled} platforms from {socials_filename}'s mtime.")
+
+    changelog = None
+    try:
+        with open(roster_filename, 'r', encoding='utf-8') as f:
+            roster = json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read roster {roster_filename} ({e}); refreshing by age only.")
+    else:
+        ids_before = [member.get('id') for member in members]
+        changelog, former_members = merge_roster(members, roster)
+        archive_former_members(former_members)
+        summary = changelog['summary']
+        print(f"Roster: {summary['added']} new, {summary['removed']} left (archived to {FORMER_MEMBERS_FILENAME}), "
+              f"{summary['changed']} changed.")
+        if [member.get('id') for member in members] != ids_before:
+            candidate_store.clear()
+
+    plan = schedule_refresh(members, changelog, ttl_seconds, max_searches=max_searches)
+    for member in members:
+        for platform in plan.get(member.get('id'), []):
+            candidate_store.pop(candidate_key(member, platform), None)
+    return plan
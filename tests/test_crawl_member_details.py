@@ -0,0 +1,92 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from crawl_member_details import crawl_member_details, parse_member_details
+from member_parser import parse_members
+
+LISTING_HTML = '''<html><body><table class="table">
+<thead><tr><th>No</th><th>Photo</th><th>Name</th><th>Commission</th></tr></thead><tbody>
+<tr><td>1</td><td class="hidden-xs"><a href="/anggota/detail/id/101"><img src="101.jpg"></a></td>
+<td><a href="/anggota/detail/id/101">H. SATU</a><br>Golkar Party Faction<br>ACEH I<br>satu[at]dpr.go.id</td>
+<td>Commission I</td></tr>
+<tr><td>2</td><td class="hidden-xs"><a href="/anggota/detail/id/102"><img src="102.jpg"></a></td>
+<td><a href="/anggota/detail/id/102">DUA</a><br>Prosperous Justice Party Faction<br>ACEH II<br>dua[at]dpr.go.id</td>
+<td>Commission III</td></tr>
+<tr><td>3</td><td class="hidden-xs"><a href="/anggota/detail/id/103"><img src="103.jpg"></a></td>
+<td><a href="/anggota/detail/id/103">TIGA</a><br>Democrat Party Faction<br>BALI<br>tiga[at]dpr.go.id</td>
+<td>Commission IV</td></tr>
+</tbody></table></body></html>'''
+
+PAGES = {
+    '/anggota/': LISTING_HTML,
+    # Both layouts the site uses: two-cell table rows (th/td and td/td) and a definition list
+    '/anggota/detail/id/101': '''<html><body><table>
+<tr><th>Place of Birth:</th><td>: Banda Aceh</td></tr>
+<tr><td>Religion</td><td>Islam</td></tr>
+<tr><td>Empty</td><td></td></tr>
+<tr><td colspan="2">Education</td></tr>
+</table><dl><dt>Electoral District:</dt><dd>ACEH I</dd><dt>Orphan</dt></dl></body></html>''',
+    '/anggota/detail/id/102': '<html><body><p>Profile is being updated.</p></body></html>',
+    # /anggota/detail/id/103 is missing: the crawl gets a 404
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGES.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        body = (body or 'Not Found').encode('utf-8')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_parse_member_details_extracts_labels_and_values():
+    details = parse_member_details(PAGES['/anggota/detail/id/101'])
+    assert details == {'Place of Birth': 'Banda Aceh', 'Religion': 'Islam', 'Electoral District': 'ACEH I'}
+
+
+def test_parse_member_details_without_fields():
+    assert parse_member_details(PAGES['/anggota/detail/id/102']) == {}
+    assert parse_member_details(None) == {}
+
+
+def test_crawl_against_stub_server(stub_base_url):
+    listing = requests.get(f"{stub_base_url}/anggota/", timeout=5).text
+    members = parse_members(listing)
+    assert [member['name'] for member in members] == ['H. SATU', 'DUA', 'TIGA']
+
+    crawled = crawl_member_details(members, max_workers=2, request_interval=0, base_url=stub_base_url)
+
+    assert crawled == 1
+    assert members[0]['details'] == {'Place of Birth': 'Banda Aceh', 'Religion': 'Islam',
+                                     'Electoral District': 'ACEH I'}
+    assert 'details' not in members[1]  # Page without fields
+    assert 'details' not in members[2]  # 404: left untouched
+
+
+def test_crawl_only_keys(stub_base_url):
+    members = parse_members(LISTING_HTML)
+    crawled = crawl_member_details(members, request_interval=0, base_url=stub_base_url,
+                                   only_keys={members[1]['profile_url'], members[2]['profile_url']})
+    assert crawled == 0
+    assert not any('details' in member for member in members)
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+import sqlite3
+
+from export_members import SQLITE_FILENAME, export_tables, iter_json_array
+
+# The same member in two concatenated sources, and a newer listing reusing row id '1' for someone else
+MEMBERS = [
+    {'id': '1', 'name': 'H. SATU, S.H.', 'faction': 'PDIP', 'district': 'ACEH I', 'email': 'satu@dpr.go.id',
+     'roles': ['Commission V', 'Budget Agency'], 'profile_url': 'https://en.dpr.go.id/anggota/detail/id/101',
+     'image_url': 'https://www.dpr.go.id/101.jpg', 'socials': {'instagram': 'https://www.instagram.com/satu',
+                                                               'twitter': None},
+     'socials_checked_at': {'instagram': '2025-05-01T00:00:00+00:00'}},
+    {'id': '2', 'name': 'DUA', 'faction': 'PKS', 'district': 'JAWA BARAT IX', 'roles': [],
+     'profile_url': 'https://en.dpr.go.id/anggota/detail/id/102'},
+    {'id': '1', 'name': 'TIGA', 'faction': 'Golkar', 'district': 'BALI', 'roles': ['Commission I'],
+     'profile_url': 'https://en.dpr.go.id/anggota/detail/id/103'},
+    {'id': '7', 'name': 'H. SATU, S.H.', 'faction': 'PDIP', 'district': 'ACEH I', 'roles': ['Commission V'],
+     'profile_url': 'https://en.dpr.go.id/anggota/detail/id/101'},
+]
+VERIFIED = {'https://www.instagram.com/satu': {'status': 'alive'}}
+
+
+def read_csv(directory, table):
+    with open(directory / f"{table}.csv", 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_and_sqlite_round_trip(tmp_path):
+    source = io.StringIO(json.dumps(MEMBERS, indent=4))
+    counts = export_tables(iter_json_array(source, read_size=64), ['csv', 'sqlite'], str(tmp_path),
+                           verified=VERIFIED, chunk_members=2)
+
+    assert counts == {'members': 3, 'roles': 3, 'socials': 2}
+
+    members_csv = read_csv(tmp_path, 'members')
+    assert [row['member_key'] for row in members_csv] == [member['profile_url'] for member in MEMBERS[:3]]
+    assert [row['id'] for row in members_csv] == ['1', '2', '1']
+    assert members_csv[1]['province'] == 'JAWA BARAT'
+    assert members_csv[1]['email'] == ''  # NULL
+    roles_csv = read_csv(tmp_path, 'roles')
+    assert [(row['member_key'][-3:], row['position'], row['role']) for row in roles_csv] == [
+        ('101', '0', 'Commission V'), ('101', '1', 'Budget Agency'), ('103', '0', 'Commission I')]
+
+    db = sqlite3.connect(tmp_path / SQLITE_FILENAME)
+    try:
+        members_db = db.execute('SELECT member_key, id, name, faction, province FROM members').fetchall()
+        assert members_db == [(row['member_key'], row['id'], row['name'], row['faction'], row['province'])
+                              for row in members_csv]
+        socials = db.execute('SELECT m.name, s.platform, s.url, s.checked_at, s.status FROM socials s '
+                             'JOIN members m ON m.member_key = s.member_key ORDER BY s.platform').fetchall()
+        assert socials == [('H. SATU, S.H.', 'instagram', 'https://www.instagram.com/satu',
+                            '2025-05-01T00:00:00+00:00', 'alive'),
+                           ('H. SATU, S.H.', 'twitter', None, None, None)]
+        commission_v = db.execute("SELECT m.id, m.name FROM roles r JOIN members m ON m.member_key = r.member_key "
+                                  "WHERE r.role = 'Commission V'").fetchall()
+        assert commission_v == [('1', 'H. SATU, S.H.')]
+    finally:
+        db.close()
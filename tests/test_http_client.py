@@ -0,0 +1,68 @@
+import pytest
+import requests
+
+from http_client import CircuitBreaker, CircuitOpenError, RequestExecutor
+
+URL = 'http://members.example/anggota/'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class ScriptedSession:
+    """Plays back one outcome per request: an exception to raise or a status code to answer with."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = 0
+
+    def request(self, method, url, **kwargs):
+        self.sent += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def make_executor(outcomes, open_seconds=0):
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=open_seconds)
+    return RequestExecutor(ScriptedSession(outcomes), breaker=breaker, max_retries=0, max_wait_seconds=0.05)
+
+
+def test_half_open_trial_success_closes_the_circuit():
+    executor = make_executor([requests.exceptions.ConnectionError('refused'), 200, 200])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        executor.get(URL)
+    assert executor.get(URL).status_code == 200  # The trial
+    assert executor.get(URL).status_code == 200  # Closed again: no trial pending
+    assert executor.breaker.blocked_for('members.example') == 0
+
+
+def test_second_caller_waits_while_the_trial_is_out():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0)
+    breaker.record_failure('members.example')
+    assert breaker.blocked_for('members.example') == 0  # Claims the trial
+    assert breaker.blocked_for('members.example') > 0
+
+
+def test_unexpected_error_during_trial_releases_it():
+    executor = make_executor([requests.exceptions.ConnectionError('refused'),
+                              requests.exceptions.ChunkedEncodingError('truncated'), 200])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        executor.get(URL)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        executor.get(URL)  # The trial fails with an error request() does not retry
+    assert executor.get(URL).status_code == 200  # A new trial goes out instead of polling until the deadline
+    assert executor.session.sent == 3
+
+
+def test_open_circuit_gives_up_past_the_deadline():
+    executor = make_executor([requests.exceptions.ConnectionError('refused')], open_seconds=60)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        executor.get(URL)
+    with pytest.raises(CircuitOpenError):
+        executor.get(URL)
+    assert executor.session.sent == 1
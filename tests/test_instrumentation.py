@@ -0,0 +1,35 @@
+import threading
+import time
+
+from instrumentation import Metrics, format_prometheus
+
+
+def test_wall_seconds_count_concurrent_calls_once():
+    registry = Metrics()
+
+    def work():
+        with registry.timer('fetch'):
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counters = registry.report()['stages']['fetch']
+    assert counters['calls'] == 4
+    assert counters['busy_seconds'] >= 0.4
+    assert 0.1 <= counters['wall_seconds'] < 0.3
+
+
+def test_prometheus_values_are_gauges():
+    registry = Metrics()
+    registry.add_call('save', 10.0, 12.5, bytes=2048)
+
+    text = format_prometheus(registry)
+
+    assert '# TYPE dpr_stage_busy_seconds gauge' in text
+    assert 'dpr_stage_wall_seconds{stage="save"} 2.5' in text
+    assert 'dpr_stage_bytes{stage="save"} 2048' in text
+    assert ' counter' not in text and '_total' not in text
@@ -0,0 +1,83 @@
+import json
+import os
+import re
+
+import pytest
+
+from benchmark_parsers import render_listing_html
+from member_parser import iter_members, lxml_html, parse_members
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Valid HTML: </td> and </tr> are optional, each <td> closes the open cell and each <tr> the open row
+OMITTED_END_TAGS_HTML = '''<table class="table"><thead><tr><th>No<th>Photo<th>Name<th>Commission</thead>
+<tbody>
+<tr><td>1<td class="hidden-xs"><a href="/anggota/detail/id/1"><img src="1.jpg"></a>
+<td><a href="/anggota/detail/id/1">H. SATU</a><br>
+Golkar Party Faction<br>
+ACEH I<br>
+satu[at]dpr.go.id
+<td>Commission I<br>Budget Agency
+<tr><td>2<td class="hidden-xs"><a href="/anggota/detail/id/2"><img src="2.jpg"></a>
+<td><a href="/anggota/detail/id/2">DUA</a><br>
+Prosperous Justice Party Faction<br>
+ACEH II<br>
+dua[at]dpr.go.id
+<td>Commission III
+<tr><td>3<td class="hidden-xs"><a href="/anggota/detail/id/3"><img src="3.jpg"></a>
+<td><a href="/anggota/detail/id/3">TIGA</a><br>
+Democrat Party Faction<br>
+BALI<br>
+tiga[at]dpr.go.id
+<td>Commission IV
+</tbody></table>'''
+
+EXPECTED = [
+    ('1', 'H. SATU', 'Golkar', 'ACEH I', 'satu@dpr.go.id', ['Commission I', 'Budget Agency']),
+    ('2', 'DUA', 'PKS', 'ACEH II', 'dua@dpr.go.id', ['Commission III']),
+    ('3', 'TIGA', 'Demokrat', 'BALI', 'tiga@dpr.go.id', ['Commission IV']),
+]
+
+
+def summary(members):
+    return [(m['id'], m['name'], m['faction'], m['district'], m['email'], m['roles']) for m in members]
+
+
+def rendered_listing(limit=40):
+    with open(os.path.join(ROOT, 'dpr_members.json'), 'r', encoding='utf-8') as f:
+        return render_listing_html(json.load(f)[:limit])
+
+
+def without_end_tags(html_content):
+    return re.sub(r'</t[dr]>', '', html_content)
+
+
+def test_stream_parser_closes_implied_rows_and_cells():
+    assert summary(iter_members(OMITTED_END_TAGS_HTML, backend='html.parser')) == EXPECTED
+
+
+def test_stream_parser_implied_end_tags_across_chunks():
+    members = iter_members(OMITTED_END_TAGS_HTML.encode('utf-8'), backend='html.parser', chunk_size=7)
+    assert summary(members) == EXPECTED
+
+
+@pytest.mark.parametrize('html_content', [
+    OMITTED_END_TAGS_HTML,
+    rendered_listing(),
+    without_end_tags(rendered_listing()),
+], ids=['omitted-end-tags', 'rendered', 'rendered-without-end-tags'])
+def test_stream_parser_matches_lxml_tree_parser(html_content):
+    if lxml_html is None:
+        pytest.skip("lxml is not installed")
+    assert list(iter_members(html_content, backend='html.parser')) == parse_members(html_content, backend='lxml')
+
+
+def test_backends_agree_on_well_formed_markup():
+    html_content = rendered_listing()
+    reference = parse_members(html_content, backend='html.parser')
+    assert len(reference) == 40
+    assert parse_members(html_content, backend='strainer') == reference
+    assert list(iter_members(html_content, backend='html.parser')) == reference
+    if lxml_html is not None:
+        assert parse_members(html_content, backend='lxml') == reference
+        assert list(iter_members(html_content, backend='lxml')) == reference
@@ -0,0 +1,140 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import mirror_member_images
+from mirror_member_images import make_thumbnails, mirror_member_images as mirror
+
+PHOTO = b'\xff\xd8\xff\xe0 shared portrait bytes'
+OTHER_PHOTO = b'\xff\xd8\xff\xe0 another portrait'
+
+# Two URLs serving the same bytes; ETags as a server would send them
+IMAGES = {
+    '/photos/101.jpg': (PHOTO, '"a"'),
+    '/photos/102.jpg': (PHOTO, '"b"'),
+    '/photos/103.jpg': (OTHER_PHOTO, '"c"'),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get('If-None-Match')))
+        if self.path not in IMAGES:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body, etag = IMAGES[self.path]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_base_url():
+    StubHandler.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def make_member(member_id, photo_path, row):
+    return {
+        'id': str(row),
+        'name': f"MEMBER {member_id}",
+        'profile_url': f"https://en.dpr.go.id/anggota/detail/id/{member_id}",
+        'image_url': f"https://www.dpr.go.id{photo_path}",
+    }
+
+
+MEMBERS = [make_member(101, '/photos/101.jpg', 1), make_member(102, '/photos/102.jpg', 2),
+           make_member(103, '/photos/103.jpg', 3), make_member(104, '/photos/missing.jpg', 4)]
+
+
+def test_identical_images_are_stored_once(stub_base_url, tmp_path):
+    manifest = {'images': {}, 'members': {}}
+    counts = mirror(MEMBERS, manifest, request_interval=0, base_url=stub_base_url, mirror_dir=str(tmp_path))
+
+    assert counts == {'fetched': 3, 'not_modified': 0, 'failed': 1, 'deduped': 1}
+    images = manifest['images']
+    shared = images[f"{stub_base_url}/photos/101.jpg"]
+    assert shared['sha256'] == images[f"{stub_base_url}/photos/102.jpg"]['sha256']
+    assert shared['path'] == images[f"{stub_base_url}/photos/102.jpg"]['path']
+    assert len(list(tmp_path.glob('blobs/*/*.jpg'))) == 2
+    # Members are keyed by profile URL, not by the listing row number
+    assert manifest['members']['https://en.dpr.go.id/anggota/detail/id/101']['sha256'] == shared['sha256']
+    assert manifest['members']['https://en.dpr.go.id/anggota/detail/id/104']['sha256'] is None
+
+
+def test_second_run_refetches_conditionally(stub_base_url, tmp_path):
+    manifest = {'images': {}, 'members': {}}
+    mirror(MEMBERS[:3], manifest, request_interval=0, base_url=stub_base_url, mirror_dir=str(tmp_path))
+    first_entries = {url: dict(entry) for url, entry in manifest['images'].items()}
+    StubHandler.requests_seen = []
+
+    counts = mirror(MEMBERS[:3], manifest, request_interval=0, base_url=stub_base_url, mirror_dir=str(tmp_path))
+
+    assert counts == {'fetched': 0, 'not_modified': 3, 'failed': 0, 'deduped': 0}
+    assert sorted(StubHandler.requests_seen) == [('/photos/101.jpg', '"a"'), ('/photos/102.jpg', '"b"'),
+                                                 ('/photos/103.jpg', '"c"')]
+    assert manifest['images'] == first_entries
+
+
+def test_only_keys_limits_refetches(stub_base_url, tmp_path):
+    manifest = {'images': {}, 'members': {}}
+    mirror(MEMBERS[:3], manifest, request_interval=0, base_url=stub_base_url, mirror_dir=str(tmp_path))
+    StubHandler.requests_seen = []
+
+    counts = mirror(MEMBERS[:3], manifest, request_interval=0, base_url=stub_base_url, mirror_dir=str(tmp_path),
+                    only_keys={MEMBERS[2]['profile_url']})
+
+    assert counts == {'fetched': 0, 'not_modified': 1, 'failed': 0, 'deduped': 0}
+    assert StubHandler.requests_seen == [('/photos/103.jpg', '"c"')]
+    assert len(manifest['members']) == 3
+
+
+def test_thumbnails_once_per_distinct_image(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    blobs = {}
+    for color in ('red', 'blue'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (600, 800), color).save(buffer, 'JPEG')
+        blobs[color] = buffer.getvalue()
+    manifest = {'images': {}, 'members': {}}
+    for url, color in (('a.jpg', 'red'), ('b.jpg', 'red'), ('c.jpg', 'blue')):
+        digest, path = mirror_member_images.store_blob(blobs[color], 'image/jpeg', str(tmp_path))
+        manifest['images'][url] = {'sha256': digest, 'path': path}
+
+    assert make_thumbnails(manifest, mirror_dir=str(tmp_path), max_workers=2) == 2
+
+    thumbnail = manifest['images']['a.jpg']['thumbnail']
+    assert thumbnail == manifest['images']['b.jpg']['thumbnail']
+    with Image.open(thumbnail) as image:
+        assert image.size == (120, 160)
+
+
+def test_thumbnails_skipped_without_pillow(monkeypatch, tmp_path):
+    monkeypatch.setattr(mirror_member_images, 'Image', None)
+    manifest = {'images': {'a.jpg': {'sha256': 'ab' * 32, 'path': str(tmp_path / 'a.jpg')}}, 'members': {}}
+    assert make_thumbnails(manifest, mirror_dir=str(tmp_path)) == 0
+    assert 'thumbnail' not in manifest['images']['a.jpg']
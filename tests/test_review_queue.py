@@ -0,0 +1,27 @@
+import pytest
+
+import review_queue
+from review_queue import ReviewSession
+
+MEMBERS = [{'id': str(number), 'name': f"MEMBER {number}"} for number in range(1, 5)]
+
+
+def test_producer_error_reaches_the_reviewer(monkeypatch):
+    def prepare_member(member, *args):
+        if member['id'] == '3':
+            raise RuntimeError('search backend down')
+        return {'instagram': None}
+
+    monkeypatch.setattr(review_queue, 'prepare_member', prepare_member)
+    session = ReviewSession(MEMBERS, {}, lookahead=1)
+
+    reviewed = []
+    with pytest.raises(RuntimeError, match='search backend down'):
+        for index, member, prepared in session:
+            reviewed.append(member['id'])
+    assert reviewed == ['1', '2']
+
+
+def test_review_ends_normally_without_error(monkeypatch):
+    monkeypatch.setattr(review_queue, 'prepare_member', lambda member, *args: {})
+    assert [member['id'] for _, member, _ in ReviewSession(MEMBERS, {})] == ['1', '2', '3', '4']
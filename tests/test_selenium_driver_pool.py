@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip('selenium')
+
+from selenium.common.exceptions import WebDriverException
+
+from hybrid_fetcher import HybridFetcher
+from selenium_driver_pool import DriverPool
+
+
+class FakeDriver:
+    """Stands in for a WebDriver; crashes on get() when told to."""
+
+    def __init__(self, crash=False):
+        self.crash = crash
+        self.quit_called = False
+
+    def get(self, url):
+        if self.crash:
+            raise WebDriverException('chrome not reachable')
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_is_reused_after_a_clean_use():
+    pool = DriverPool(size=1, driver_factory=FakeDriver)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+    assert second is first and not first.quit_called
+
+
+def test_driver_raising_webdriver_exception_is_discarded():
+    pool = DriverPool(size=1, driver_factory=FakeDriver)
+    with pytest.raises(WebDriverException):
+        with pool.driver() as broken:
+            broken.crash = True
+            broken.get('https://www.dpr.go.id/')
+    assert broken.quit_called
+    with pool.driver() as replacement:
+        assert replacement is not broken
+
+
+def test_hybrid_fetcher_does_not_return_a_crashed_browser_to_the_pool():
+    fetcher = HybridFetcher()
+    fetcher._driver_pool = DriverPool(size=1, driver_factory=lambda: FakeDriver(crash=True))
+    assert fetcher._fetch_with_browser('https://www.dpr.go.id/anggota/') is None
+    assert fetcher._driver_pool._idle.empty()
+    assert fetcher._driver_pool._all == []
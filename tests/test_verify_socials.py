@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from verify_socials import comparable_url, verify_links
+
+# Stub paths are '/<host><path>', as rebase_url() builds them
+REDIRECTS = {
+    '/youtube.com/@dpr_ri': '/www.youtube.com/@dpr_ri',
+    '/facebook.com/dpr.ri': '/www.facebook.com/dpr.ri',
+    '/www.youtube.com/@old_handle': '/www.youtube.com/@new_handle',
+}
+PAGES = {'/www.youtube.com/@dpr_ri', '/www.facebook.com/dpr.ri', '/www.youtube.com/@new_handle'}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _respond(self, send_body):
+        if self.path in REDIRECTS:
+            self.send_response(301)
+            self.send_header('Location', REDIRECTS[self.path])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html><body>profile</body></html>'
+        self.send_response(200 if self.path in PAGES else 404)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_comparable_url_ignores_host_aliases_scheme_and_case():
+    assert comparable_url('https://youtube.com/@DPR_RI') == comparable_url('http://www.youtube.com/@dpr_ri')
+    assert comparable_url('https://m.facebook.com/dpr.ri') == comparable_url('https://www.facebook.com/dpr.ri')
+    assert comparable_url('https://www.youtube.com/@old') != comparable_url('https://www.youtube.com/@new')
+
+
+def test_redirect_to_www_host_is_not_a_move(stub_base_url):
+    links = [
+        ('youtube', 'https://youtube.com/@dpr_ri'),
+        ('facebook', 'https://facebook.com/dpr.ri'),
+        ('youtube', 'https://www.youtube.com/@old_handle'),
+        ('youtube', 'https://www.youtube.com/@gone'),
+    ]
+    results = asyncio.run(verify_links(links, base_url=stub_base_url))
+
+    assert results['https://youtube.com/@dpr_ri']['status'] == 'alive'
+    assert results['https://facebook.com/dpr.ri']['status'] == 'alive'
+    assert results['https://www.youtube.com/@old_handle']['status'] == 'moved'
+    assert results['https://www.youtube.com/@old_handle']['canonical_url'] == 'https://www.youtube.com/@new_handle'
+    assert results['https://www.youtube.com/@gone']['status'] == 'dead'
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from http_client import RETRY_STATUSES, RequestExecutor, backoff_delay, create_session, retry_after_seconds
+from instrumentation import metrics, start_profiling, write_reports
+from member_snapshot import load_members
+from profile_link_classifier import classify_link
+from social_platforms import PLATFORMS
+from socials_journal import write_json_atomically
+from socials_refresh import format_timestamp, parse_timestamp
+
+# httpx is optional: without it the checks run on the pooled requests session in worker threads
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+SOCIALS_FILENAME = 'dpr_members_socials.json'
+VERIFIED_FILENAME = 'dpr_members_socials_verified.json'  # {link: result of its last check}
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/124.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+REQUEST_TIMEOUT_SECONDS = 15
+MAX_CONNECTIONS = 16  # Across all platforms
+# Concurrent checks per platform; the big platforms throttle or wall off bursts of anonymous requests
+DOMAIN_CONCURRENCY = {
+    'instagram.com': 2,
+    'facebook.com': 2,
+    'tiktok.com': 2,
+    'twitter.com': 4,
+    'youtube.com': 4,
+}
+DEFAULT_DOMAIN_CONCURRENCY = 2
+MAX_RETRIES = 2  # On 429/5xx; a throttled platform is better rechecked on the next run than waited out
+MAX_WAIT_SECONDS = 60  # Longest backoff or Retry-After honoured for one link
+VERIFY_TTL_SECONDS = 7 * 24 * 60 * 60  # Links checked more recently than this are skipped
+MAX_BODY_CHARS = 200_000  # Dead-account markers are in the first part of the page
+
+# Platforms answering HEAD reliably with 404 for removed accounts; the rest need a GET and a look at the page
+HEAD_DOMAINS = frozenset({'youtube.com'})
+# Text of the "account not found" pages served with status 200
+DEAD_MARKERS = {
+    'instagram.com': ("Sorry, this page isn't available", "Page Not Found"),
+    'facebook.com': ("This content isn't available", "This page isn't available"),
+    'tiktok.com': ("Couldn't find this account", "couldn't find this account"),
+    'twitter.com': ("This account doesn’t exist", "This account doesn't exist", "Account suspended"),
+}
+LOGIN_WALL_PATHS = ('/accounts/login', '/login', '/checkpoint', '/i/flow/login')
+# Host spellings of the same site; platforms whose rule keeps the host ('path' output) may redirect between them
+HOST_ALIAS_PREFIXES = ('www.', 'm.', 'mobile.')
+BLOCKED_STATUSES = frozenset({401, 403, 429, 999})
+DEAD_STATUSES = frozenset({404, 410})
+
+
+def rebase_url(url, base_url):
+    """'https://x.com/dpr_ri' -> '<base_url>/x.com/dpr_ri': the stub server keeps the host in the path."""
+    parsed = urlparse(url)
+    return f"{base_url.rstrip('/')}/{parsed.netloc}{parsed.path}" + (f"?{parsed.query}" if parsed.query else '')
+
+
+def unrebase_url(url, base_url):
+    """Inverse of rebase_url for redirect targets on the stub server."""
+    if not base_url or not url.startswith(base_url.rstrip('/')):
+        return url
+    rest = url[len(base_url.rstrip('/')) + 1:]
+    return f"https://{rest}"
+
+
+def comparable_url(url):
+    """
+    Profile URL without the parts a redirect may change for the same account: scheme, host aliases and case
+    ('http://m.youtube.com/@DPR' and 'https://www.youtube.com/@dpr' compare equal).
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for prefix in HOST_ALIAS_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return (f"{host}{parsed.path}" + (f"?{parsed.query}" if parsed.query else '')).casefold()
+
+
+def iter_links(members):
+    """Yields (member, platform, link) for every stored link; explicit nulls ('not found') are skipped."""
+    for member in members:
+        for platform, link in (member.get('socials') or {}).items():
+            if link and platform in PLATFORMS:
+                yield member, platform, link
+
+
+def links_to_verify(members, verified, ttl_seconds=VERIFY_TTL_SECONDS, now=None):
+    """[(platform, link)] of distinct links never checked or checked longer than ttl_seconds ago."""
+    now = time.time() if now is None else now
+    due = {}
+    for _, platform, link in iter_links(members):
+        checked_at = parse_timestamp(verified.get(link, {}).get('checked_at'))
+        if checked_at is None or now - checked_at > ttl_seconds:
+            due.setdefault(link, platform)
+    return [(platform, link) for link, platform in due.items()]
+
+
+def classify_check(link, platform, status_code, final_url, body):
+    """
+    Turns one HTTP outcome into a result record: 'alive', 'moved' (the account now lives under another
+    handle), 'dead', 'blocked' (login wall, throttling) or 'error' (no response).
+    """
+    domain = PLATFORMS[platform]
+    result = {'platform': platform, 'http_status': status_code, 'final_url': final_url,
+              'canonical_url': None, 'checked_at': format_timestamp()}
+    if status_code is None:
+        result['status'] = 'error'
+    elif status_code in DEAD_STATUSES:
+        result['status'] = 'dead'
+    elif status_code in BLOCKED_STATUSES or urlparse(final_url).path.startswith(LOGIN_WALL_PATHS):
+        result['status'] = 'blocked'
+    elif status_code >= 400:
+        result['status'] = 'error'
+    elif body is not None and any(marker in body for marker in DEAD_MARKERS.get(domain, ())):
+        result['status'] = 'dead'
+    else:
+        stored_canonical = classify_link(link, domain)[1] or link
+        canonical_url = classify_link(final_url, domain)[1]
+        result['canonical_url'] = canonical_url
+        if canonical_url is None:
+            # Redirected off the profile (to the home page, a search, ...): the account is gone
+            result['status'] = 'dead' if final_url != link else 'alive'
+        else:
+            # Handles are case-insensitive on these platforms; twitter.com -> x.com or youtube.com ->
+            # www.youtube.com alone is not a move
+            moved = comparable_url(canonical_url) != comparable_url(stored_canonical)
+            result['status'] = 'moved' if moved else 'alive'
+    return result
+
+
+class ThreadedTransport:
+    """Runs requests through http_client.RequestExecutor (retries, circuit breaker) in a thread pool."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS):
+        self.executor = RequestExecutor(create_session(HEADERS, pool_size=max_connections), max_retries=MAX_RETRIES,
+                                        max_wait_seconds=MAX_WAIT_SECONDS)
+        self._threads = ThreadPoolExecutor(max_workers=max_connections)
+
+    @metrics.timed('verify_request')
+    def _request(self, method, url):
+        response = self.executor.request(method, url, timeout=REQUEST_TIMEOUT_SECONDS, allow_redirects=True)
+        body = response.text[:MAX_BODY_CHARS] if method == 'GET' else None
+        return response.status_code, response.url, body
+
+    async def request(self, method, url):
+        return await asyncio.get_running_loop().run_in_executor(self._threads, self._request, method, url)
+
+    async def close(self):
+        self._threads.shutdown()
+        self.executor.close()
+
+
+class HttpxTransport:
+    """Native asyncio client, with the same backoff and Retry-After handling as http_client."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS):
+        self.client = httpx.AsyncClient(headers=HEADERS, follow_redirects=True, timeout=REQUEST_TIMEOUT_SECONDS,
+                                        limits=httpx.Limits(max_connections=max_connections))
+
+    async def request(self, method, url):
+        # Coroutines interleave on one thread, so counters go to the stage directly instead of through timer()
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url)
+            except (httpx.TransportError, httpx.TooManyRedirects):
+                metrics.add_call('verify_request', start, time.perf_counter(), errors=1)
+                if attempt == MAX_RETRIES:
+                    raise
+                response = None
+            else:
+                metrics.add_call('verify_request', start, time.perf_counter(), requests=1,
+                                 bytes=len(response.content))
+            if response is not None and (response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES):
+                body = response.text[:MAX_BODY_CHARS] if method == 'GET' else None
+                return response.status_code, str(response.url), body
+            metrics.add('verify_request', retries=1)
+            await asyncio.sleep(min(MAX_WAIT_SECONDS, max(backoff_delay(attempt), retry_after_seconds(response) or 0)))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_transport(max_connections=MAX_CONNECTIONS):
+    return HttpxTransport(max_connections) if httpx is not None else ThreadedTransport(max_connections)
+
+
+async def check_link(transport, link, platform, base_url=None):
+    domain = PLATFORMS[platform]
+    request_url = rebase_url(link, base_url) if base_url else link
+    method = 'HEAD' if domain in HEAD_DOMAINS else 'GET'
+    try:
+        status_code, final_url, body = await transport.request(method, request_url)
+        if method == 'HEAD' and status_code in (403, 405, 501):  # HEAD refused; ask properly
+            status_code, final_url, body = await transport.request('GET', request_url)
+    except Exception as e:  # Any transport failure is recorded as 'error' for this link, never fatal
+        print(f"Error checking {link}: {e}")
+        return classify_check(link, platform, None, link, None)
+    return classify_check(link, platform, status_code, unrebase_url(final_url, base_url), body)
+
+
+async def verify_links(links, base_url=None, max_connections=MAX_CONNECTIONS, domain_concurrency=None):
+    """
+    Checks [(platform, link)] concurrently: at most max_connections in flight overall and
+    DOMAIN_CONCURRENCY per platform. Returns {link: result}, printing progress as checks finish.
+    """
+    domain_concurrency = DOMAIN_CONCURRENCY if domain_concurrency is None else domain_concurrency
+    semaphores = {domain: asyncio.Semaphore(domain_concurrency.get(domain, DEFAULT_DOMAIN_CONCURRENCY))
+                  for domain in PLATFORMS.values()}
+    transport = create_transport(max_connections)
+    results = {}
+
+    async def verify_one(platform, link):
+        async with semaphores[PLATFORMS[platform]]:
+            result = await check_link(transport, link, platform, base_url)
+        results[link] = result
+        print(f"  [{len(results)}/{len(links)}] {result['status']:<7} {link}"
+              + (f" -> {result['canonical_url']}" if result['status'] == 'moved' else ''))
+
+    try:
+        with metrics.timer('verify'):
+            await asyncio.gather(*(verify_one(platform, link) for platform, link in links))
+    finally:
+        await transport.close()
+    return results
+
+
+def load_verified(filename=VERIFIED_FILENAME):
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON from {filename}: {e}")
+        return {}
+
+
+def verify_socials(members, verified, base_url=None, ttl_seconds=VERIFY_TTL_SECONDS):
+    """Checks the due links of members and merges the results into `verified` in place. Returns the counts."""
+    links = links_to_verify(members, verified, ttl_seconds)
+    print(f"Checking {len(links)} links ({'httpx' if httpx is not None else 'requests in threads'}, "
+          f"at most {MAX_CONNECTIONS} at once)...")
+    verified.update(asyncio.run(verify_links(links, base_url)))
+    counts = {'checked': len(links)}
+    for _, _, link in iter_links(members):
+        status = verified.get(link, {}).get('status', 'unchecked')
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+if __name__ == '__main__':
+    start_profiling()  # Only when DPR_PROFILE is set
+    base_url_override = sys.argv[1] if len(sys.argv) > 1 else None  # e.g. a local stub server
+
+    try:
+        member_data = load_members(SOCIALS_FILENAME, fields=('socials',))  # Only the links are checked
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Error loading {SOCIALS_FILENAME}: {e}")
+        exit()
+
+    verified_links = load_verified()
+    verify_counts = verify_socials(member_data, verified_links, base_url=base_url_override)
+    write_json_atomically(VERIFIED_FILENAME, verified_links)
+    print(f"{verify_counts.pop('checked')} links checked; stored links: "
+          + ', '.join(f"{count} {status}" for status, count in sorted(verify_counts.items())))
+    print(f"Results saved to {VERIFIED_FILENAME}")
+    write_reports()
+    print("\nFINISH")